@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark for csv2track.py's in-memory and --stream modes.
+
+Generates synthetic "Include All Begin Casts" exports of increasing size, converts each one in a
+fresh subprocess, and reports the peak RSS and wall time of the conversion. Each conversion runs in
+its own process so that the RSS numbers are not polluted by earlier runs.
+
+Usage: python scripts/bench_csv2track.py [--rows 10000 100000 1000000]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+CSV2TRACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "csv2track.py")
+HEADER = [
+    "Time",
+    "Type",
+    "Ability",
+    "Source → Target",
+    "Track",
+    "Color",
+    "Override Description",
+    "Hide Text",
+    "No Adjust",
+]
+COLORS = ["red", "orange", "yellow", "green", "cyan", "blue", "purple", "pink", "grey"]
+
+
+def write_synthetic_csv(path, n_rows, seed=0):
+    rng = random.Random(seed)
+    t = 0.0
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        for i in range(n_rows):
+            t += rng.uniform(0.1, 3.0)
+            m, s = divmod(t, 60)
+            cast = round(rng.uniform(1, 6), 2)
+            is_begin = i % 2 == 0
+            w.writerow(
+                [
+                    f"{int(m):02d}:{s:06.3f}",
+                    "Begin Cast" if is_begin else "Cast",
+                    f"Ability {i % 500} {cast} sec" if is_begin else f"Ability {i % 500}",
+                    "Boss → Player",
+                    rng.randrange(0, 8),
+                    rng.choice(COLORS),
+                    "",
+                    "y" if rng.random() < 0.1 else "",
+                    "",
+                ]
+            )
+
+
+def run_once(src, dst, stream):
+    cmd = [sys.executable, CSV2TRACK, src, dst]
+    if stream:
+        cmd.append("--stream")
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} exited with status {proc.returncode}")
+    # ru_maxrss is reported in KiB on Linux
+    return rusage.ru_maxrss / 1024, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="bench_csv2track",
+        description="Measure peak RSS and wall time of csv2track.py",
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+    print(f"{'rows':>10} {'mode':>8} {'peak RSS (MiB)':>15} {'wall (s)':>9}")
+    with tempfile.TemporaryDirectory(prefix="bench-csv2track-") as tmp:
+        for n_rows in args.rows:
+            src = os.path.join(tmp, f"{n_rows}.csv")
+            write_synthetic_csv(src, n_rows)
+            outputs = []
+            for stream in (False, True):
+                dst = os.path.join(tmp, f"{n_rows}_{'stream' if stream else 'mem'}.json")
+                rss, elapsed = run_once(src, dst, stream)
+                mode = "stream" if stream else "memory"
+                print(f"{n_rows:>10} {mode:>8} {rss:>15.1f} {elapsed:>9.2f}")
+                # Only keep a digest of the output: a forked child inherits the parent's RSS high
+                # water mark, so the benchmark process itself must stay small.
+                with open(dst, "rb") as f:
+                    outputs.append(hashlib.file_digest(f, "sha256").digest())
+                os.remove(dst)
+            assert outputs[0] == outputs[1], "streaming output differs from in-memory output"
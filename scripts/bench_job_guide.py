@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark for job_guide.py's parsing of saved job guide pages.
+
+For each guide, reports the best of --repeat wall times of:
+- full: parsing the whole page with html.parser, like generate_job_data.py used to
+- targeted: parsing only the strained elements (job_guide.STRAINERS), with html.parser and with
+  lxml if it is installed
+- cached: loading the extracted tables from job_guide.py's JSON cache
+and checks that every mode extracts the same tables as the full parse.
+
+Usage: python scripts/bench_job_guide.py --en ~/Downloads/en_sch.html --zh ~/Downloads/zh_sch.html
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import job_guide
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_guide(path, lang, repeat, cache_dir):
+    modes = {
+        "full": lambda: job_guide.parse_tables(path, lang, "html.parser", targeted=False),
+        "targeted html.parser": lambda: job_guide.parse_tables(path, lang, "html.parser"),
+    }
+    if job_guide.PARSER == "lxml":
+        modes["targeted lxml"] = lambda: job_guide.parse_tables(path, lang, "lxml")
+    # the first load fills the cache, so the timed loads all read it
+    job_guide.load_tables(path, lang, cache_dir)
+    modes["cached"] = lambda: job_guide.load_tables(path, lang, cache_dir)
+    expected = None
+    for mode, fn in modes.items():
+        elapsed, tables = best_time(fn, repeat)
+        if expected is None:
+            expected = tables
+        status = "ok" if tables == expected else "MISMATCH"
+        print(
+            f"{os.path.basename(path):>20} {lang:>4} {mode:>22} {elapsed * 1000:>10.2f} {status:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="bench_job_guide",
+        description="Measure parse times of saved job guide pages",
+    )
+    parser.add_argument("--en", nargs="*", default=[], help="English job guide pages")
+    parser.add_argument("--zh", nargs="*", default=[], help="Chinese job guide pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if job_guide.PARSER != "lxml":
+        print("lxml is not installed; skipped targeted lxml parsing (`pip install lxml`)")
+    print(f"{'guide':>20} {'lang':>4} {'mode':>22} {'best (ms)':>10} {'tables':>9}")
+    with tempfile.TemporaryDirectory(prefix="bench-job-guide-") as cache_dir:
+        for lang, paths in (("en", args.en), ("zh", args.zh)):
+            for path in paths:
+                bench_guide(os.path.expanduser(path), lang, args.repeat, cache_dir)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Build step for the marker presets in public/presets/markers.
+
+Every preset is re-serialized as minified JSON, and gzip (.gz) and brotli (.br) siblings are
+written next to it so that a static host can serve them precompressed. A size report is printed
+at the end. Brotli output requires the brotli package (`pip install brotli`) and is skipped if it
+is not installed.
+
+By default, presets are read from public/presets/markers and written to build/presets/markers,
+so this should run after `npm run build`. The source presets are left untouched.
+
+With --compact, each MarkerTrackIndividual additionally factors the most common markerType,
+color, showText, and duration values into a per-track "defaults" object, and markers omit any
+field equal to its track's default. The app's marker loader (Timeline.#appendMarkersPreset)
+expands these defaults back into each marker.
+"""
+
+import argparse
+from collections import Counter
+import glob
+import gzip
+import json
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_SRC = "public/presets/markers"
+DEFAULT_OUT = "build/presets/markers"
+
+# Fields that may be factored into per-track defaults, with the value the app assumes when a
+# marker omits the field entirely.
+# https://github.com/xivintheshell/xivintheshell/blob/main/src/Controller/Timeline.ts
+DEFAULTABLE_FIELDS = {
+    "markerType": "Info",
+    "color": None,
+    "showText": False,
+    "duration": None,
+}
+
+
+def compact_track(track):
+    markers = track["markers"]
+    defaults = {}
+    for field, fallback in DEFAULTABLE_FIELDS.items():
+        values = Counter(
+            json.dumps(m.get(field, fallback)) for m in markers if field in m or fallback is not None
+        )
+        if not values:
+            continue
+        value, count = values.most_common(1)[0]
+        if count > 1:
+            defaults[field] = json.loads(value)
+    compacted = []
+    for m in markers:
+        out = {}
+        for k, v in m.items():
+            if k not in defaults or defaults[k] != v or type(defaults[k]) is not type(v):
+                out[k] = v
+        # Materialize fields whose implicit fallback would otherwise be replaced by the default.
+        for field, default in defaults.items():
+            fallback = DEFAULTABLE_FIELDS[field]
+            if field not in m and fallback is not None and default != fallback:
+                out[field] = fallback
+        compacted.append(out)
+    result = {"fileType": track["fileType"], "track": track["track"]}
+    if defaults:
+        result["defaults"] = defaults
+    result["markers"] = compacted
+    return result
+
+
+def compact(obj):
+    if obj.get("fileType") != "MarkerTracksCombined":
+        return obj
+    return {**obj, "tracks": [compact_track(t) for t in obj["tracks"]]}
+
+
+def build_preset(src_path, out_path, use_compact):
+    with open(src_path, "rb") as f:
+        raw = f.read()
+    obj = json.loads(raw)
+    if use_compact:
+        obj = compact(obj)
+    minified = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+    sizes = {"original": len(raw), "minified": len(minified)}
+    with open(out_path, "wb") as f:
+        f.write(minified)
+    # mtime=0 keeps the .gz output reproducible
+    gz = gzip.compress(minified, compresslevel=9, mtime=0)
+    with open(out_path + ".gz", "wb") as f:
+        f.write(gz)
+    sizes["gz"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(minified, mode=brotli.MODE_TEXT, quality=11)
+        with open(out_path + ".br", "wb") as f:
+            f.write(br)
+        sizes["br"] = len(br)
+    return sizes
+
+
+def print_report(report):
+    columns = ["original", "minified", "gz"] + (["br"] if brotli is not None else [])
+    name_width = max(len(name) for name in report) if report else 4
+    print(f"{'file':<{name_width}} " + " ".join(f"{c:>9}" for c in columns))
+    totals = Counter()
+    for name, sizes in report.items():
+        totals.update(sizes)
+        print(f"{name:<{name_width}} " + " ".join(f"{sizes[c]:>9}" for c in columns))
+    print(f"{'total':<{name_width}} " + " ".join(f"{totals[c]:>9}" for c in columns))
+    if brotli is None:
+        print("brotli is not installed; skipped .br output (`pip install brotli`)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="build_marker_presets",
+        description="Minify and precompress marker presets",
+    )
+    parser.add_argument("--src", default=DEFAULT_SRC)
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="factor repeated marker fields into per-track defaults",
+    )
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    report = {}
+    for src_path in sorted(glob.glob(os.path.join(args.src, "*.txt"))):
+        name = os.path.basename(src_path)
+        report[name] = build_preset(src_path, os.path.join(args.out, name), args.compact)
+    print_report(report)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Convert FFLogs cast timeline CSV exports of a player (like test-logs.csv) into timelines that can
+be loaded into the app, in the same Record format as the .txt files in src/__test__/Asset.
+
+Ability names in the log are the in-game names ("Fire IV"), while timelines use the names the app
+declares for each action in src/Game/Data/Jobs/*.ts and src/Game/Data/Shared/*.ts ("Fire 4"). A
+name index mapping normalized names (lowercase, Roman numerals as digits, straight apostrophes)
+to the app's names and jobs is built once from those files, and can be saved with the `index`
+command and reused with `convert --index`. Abilities that are not in the index (auto-attacks,
+actions the app does not implement) are skipped and counted.
+
+Rows are read with fflogs_csv.load_casts. Only the rows of one player are used: --player, or by
+default the source with the most "Cast" rows. Like the app's log import, a "Begin Cast" followed
+by a "Cast" of the same ability is one use at the time of the begin cast; begin casts that are
+interrupted or followed by a different ability are dropped. The timeline starts with a jump to
+the first use, and a jump to the logged time is inserted before any use that comes more than
+JUMP_GAP seconds after the previous use (plus its cast time), since that is probably a wait for a
+mechanic. All other uses are left for the simulation to place. The job is --job, or inferred from
+the abilities like the app does for files without one. Config fields other than the job and
+level are taken from --config (a JSON object, such as the config of an exported timeline). The
+fields of the app's DEFAULT_CONFIG that loading a timeline does not fill in when missing
+(DEFAULT_CONFIG_FIELDS, like spellSpeed and initialResourceOverrides) are written with their
+default values unless --config sets them; the app fills in the rest when the timeline is loaded.
+
+Every CSV matched by the inputs (files, directories, or quoted glob patterns) is converted to
+`<output dir>/<name>.txt` in a process pool, e.g. to build a corpus for corpus.test.ts:
+
+    python scripts/csv2timeline.py index --out name_index.json
+    python scripts/csv2timeline.py convert logs/ src/__test__/secretTestTimelines \
+        --index name_index.json
+
+Requires numpy (`pip install numpy`).
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import json
+import math
+import os
+import re
+import sys
+
+from fflogs_csv import EVENT_BEGIN_CAST, EVENT_CAST, load_casts
+from slidecast import log_paths, source_name
+
+DATA_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src/Game/Data")
+)
+
+# same threshold as applyImportedActions in src/Components/FFLogs/ImportInterface.tsx
+JUMP_GAP = 3.5
+SHELL_VERSION = 2
+# Fields of DEFAULT_CONFIG (makeDefaultConfig in src/Game/GameConfig.ts) that neither
+# Controller.loadBattleRecordFromFile nor the GameConfig constructor default when they are missing.
+DEFAULT_CONFIG_FIELDS = {
+    "spellSpeed": 978,
+    "countdown": 5,
+    "randomSeed": "sup",
+    "animationLock": 0.7,
+    "timeTillFirstManaTick": 1.2,
+    "initialResourceOverrides": [],
+}
+
+# log names of items and statuses that correspond to an app action
+ALIASES = {
+    "medicated": "Tincture",
+}
+
+ACTIONS_BLOCK = re.compile(r"export const \w+_ACTIONS = ensureRecord<ActionData>\(\)\(\{")
+ENTRY_START = re.compile(r"^\t(\w+): \{", re.MULTILINE)
+NAME_FIELD = re.compile(r'\bname: "((?:[^"\\]|\\.)*)"')
+ROMAN_NUMERALS = {"ii": "2", "iii": "3", "iv": "4", "v": "5", "vi": "6", "vii": "7", "viii": "8"}
+
+
+def normalize_name(name: str) -> str:
+    words = name.lower().replace("’", "'").split()
+    return " ".join(ROMAN_NUMERALS.get(w, w) for w in words)
+
+
+def _action_names(source: str):
+    """Yield the `name` of every entry of the *_ACTIONS records in a data file."""
+    for block in ACTIONS_BLOCK.finditer(source):
+        end = source.index("\n});", block.end())
+        body = source[block.end() : end]
+        starts = list(ENTRY_START.finditer(body))
+        for start, next_start in zip(starts, starts[1:] + [None]):
+            entry = body[start.end() : next_start.start() if next_start else len(body)]
+            name = NAME_FIELD.search(entry)
+            if name is not None:
+                yield json.loads(f'"{name.group(1)}"')
+
+
+def build_name_index(data_dir=DATA_DIR) -> dict:
+    """
+    Return {normalized name: {"name": app name, "jobs": [jobs]}} for every action declared in
+    `data_dir`. Actions from Shared/ (role actions, tinctures, limit breaks) have no jobs.
+    """
+    index = {}
+    paths = sorted(glob.glob(os.path.join(data_dir, "Jobs", "*.ts")))
+    paths += sorted(glob.glob(os.path.join(data_dir, "Shared", "*.ts")))
+    for path in paths:
+        job = os.path.splitext(os.path.basename(path))[0] if "Jobs" in path else None
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        for name in _action_names(source):
+            entry = index.setdefault(normalize_name(name), {"name": name, "jobs": []})
+            if job is not None and job not in entry["jobs"]:
+                entry["jobs"].append(job)
+    for alias, name in ALIASES.items():
+        index[alias] = index[normalize_name(name)]
+    return index
+
+
+def lookup(index, ability: str):
+    return index.get(normalize_name(ability))
+
+
+def player_uses(table, player=None):
+    """
+    Return (player, [(time, ability, cast time or NaN)]) for the uses of abilities by `player`
+    (by default the source with the most "Cast" rows), pairing begin casts with their casts.
+    """
+    sources = [source_name(s) for s in table.columns["Source → Target"].tolist()]
+    event_types = table.event_type.tolist()
+    if player is None:
+        counts = Counter(s for s, t in zip(sources, event_types) if t == EVENT_CAST)
+        if not counts:
+            return None, []
+        player = counts.most_common(1)[0][0]
+    uses = []
+    pending = None
+    for source, event_type, ability, time, cast_time in zip(
+        sources,
+        event_types,
+        table.ability_names().tolist(),
+        table.time.tolist(),
+        table.cast_duration.tolist(),
+    ):
+        if source != player:
+            continue
+        if event_type == EVENT_BEGIN_CAST:
+            pending = (time, ability, cast_time)
+        elif event_type == EVENT_CAST:
+            if pending is not None and pending[1] == ability:
+                uses.append(pending)
+            else:
+                uses.append((time, ability, math.nan))
+            pending = None
+    return player, uses
+
+
+def infer_job(index, abilities) -> str:
+    counts = Counter(job for a in abilities if lookup(index, a) for job in lookup(index, a)["jobs"])
+    return counts.most_common(1)[0][0] if counts else "BLM"
+
+
+def convert(src, index, job=None, player=None, level=100, offset=0.0, config=None):
+    """
+    Convert the CSV at `src` to a serialized Record. Returns (record, {skipped ability: count}).
+    """
+    table = load_casts(src, columns=("Source → Target",), split_plus=True)
+    player, uses = player_uses(table, player)
+    if job is None:
+        job = infer_job(index, [ability for _, ability, _ in uses])
+    actions = []
+    skipped = Counter()
+    prev_end = None
+    first_time = None
+    for time, ability, cast_time in uses:
+        entry = lookup(index, ability)
+        if entry is None:
+            skipped[ability] += 1
+            continue
+        time = round(time - offset, 3)
+        if prev_end is None or time - prev_end > JUMP_GAP:
+            actions.append({"type": "JumpToTimestamp", "targetTime": time})
+        if first_time is None:
+            first_time = time
+        actions.append({"type": "Skill", "skillName": entry["name"], "targetList": [1]})
+        prev_end = time + (0 if math.isnan(cast_time) else cast_time)
+    config = {**DEFAULT_CONFIG_FIELDS, **(config or {})}
+    countdown = config["countdown"]
+    # like the app's log import, lengthen the countdown if the first use is before it starts
+    if first_time is not None and -first_time > countdown:
+        countdown = math.ceil(-first_time)
+    record = {
+        "name": os.path.splitext(os.path.basename(src))[0],
+        "fileType": "Record",
+        "config": {
+            **config,
+            "job": job,
+            "shellVersion": SHELL_VERSION,
+            "level": level,
+            "countdown": countdown,
+        },
+        "actions": actions,
+    }
+    return record, dict(skipped)
+
+
+_index = None
+
+
+def _init_worker(index):
+    global _index
+    _index = index
+
+
+def _convert_file(task):
+    src, out_path, options = task
+    record, skipped = convert(src, _index, **options)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+    return src, out_path, record["config"]["job"], len(record["actions"]), skipped
+
+
+def convert_all(paths, out_dir, index, options, jobs=None):
+    """Convert every CSV in `paths` to `<out_dir>/<name>.txt` in a process pool."""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [
+        (src, os.path.join(out_dir, os.path.splitext(os.path.basename(src))[0] + ".txt"), options)
+        for src in paths
+    ]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(index,)) as pool:
+        for src, out_path, job, count, skipped in pool.map(_convert_file, tasks):
+            print(f"{src} -> {out_path}: {job}, {count} actions")
+            if skipped:
+                summary = ", ".join(f"{name} x{n}" for name, n in sorted(skipped.items()))
+                print(f"  skipped {summary}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="csv2timeline",
+        description="Convert FFLogs cast CSVs into app timelines",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    index_parser = subparsers.add_parser("index", help="write the ability name index")
+    index_parser.add_argument("--out", default="-", help="output JSON (default: stdout)")
+    convert_parser = subparsers.add_parser("convert", help="convert CSVs to timelines")
+    convert_parser.add_argument(
+        "logs", nargs="+", help="cast log .csv files, directories, or globs"
+    )
+    convert_parser.add_argument("out_dir", help="directory to write timelines to")
+    convert_parser.add_argument("--index", help="name index written by `index`")
+    convert_parser.add_argument("--job", help="job of the player, e.g. BLM (default: inferred)")
+    convert_parser.add_argument("--player", help="source name of the player")
+    convert_parser.add_argument("--level", type=int, default=100)
+    convert_parser.add_argument(
+        "--offset", type=float, default=0.0, help="seconds to subtract from every timestamp"
+    )
+    convert_parser.add_argument("--config", help="JSON file with base config fields")
+    convert_parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes")
+    args = parser.parse_args()
+    if args.command == "index":
+        index = build_name_index()
+        if args.out == "-":
+            json.dump(index, sys.stdout, ensure_ascii=False, indent=1)
+            print()
+        else:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=1)
+            print(f"wrote {args.out} ({len(index)} names)")
+    else:
+        if args.index is not None:
+            with open(args.index, encoding="utf-8") as f:
+                index = json.load(f)
+        else:
+            index = build_name_index()
+        config = None
+        if args.config is not None:
+            with open(args.config, encoding="utf-8") as f:
+                config = json.load(f)
+        options = {
+            "job": args.job,
+            "player": args.player,
+            "level": args.level,
+            "offset": args.offset,
+            "config": config,
+        }
+        convert_all(log_paths(args.logs), args.out_dir, index, options, args.jobs)
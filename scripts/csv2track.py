@@ -12,33 +12,63 @@
 # a track of -1, and the duration of the downtime in the Ability column.
 #
 # This script will add any cast that has a value in the "Track" column to the timeline.
+# With the --auto-tracks flag, rows that have a Color but an empty Track are also added, and are
+# packed into as few tracks as possible so that overlapping markers never share a track. Rows with
+# a Track value (including -1 for untargetability) stay on the track they were pinned to, and
+# auto-assigned tracks are numbered after the highest pinned track. Markers overlap if one starts
+# before the other ends, using the durations written to the output (including the 0.3s adjustment
+# below). Pass --lane-padding to treat each marker as lasting at least that many seconds, so that
+# 0s "Cast" markers have room for their text at the cost of more tracks.
 # "Begin Cast" events are applied with their duration + 0.3s (to account for an FFLogs limitation),
 # and "Cast" events are given a 0s duration. The duration "x.xx sec" at the end of ability names is automatically removed.
 #
 # To automatically adjust all event timestamps by a number of seconds, pass a value to the --offset
 # flag of this script. For example, `--offset 3` subtracts 3 seconds from all timestamps.
+#
+# For very large exports (e.g. every pull of an ultimate), pass the --stream flag. Rows are then
+# spilled to one temporary file per track as they are parsed, and the output JSON is written one
+# track at a time, so memory usage stays flat regardless of the size of the log. The output is
+# identical to the non-streaming mode.
+#
+# Rows are parsed with the columnar loader in fflogs_csv.py, which requires numpy.
+#
+# To convert a whole catalog of fights at once, pass a directory or a quoted glob pattern
+# (e.g. "sheets/dmu_*.csv") as the input and an output directory in place of the output JSON.
+# Every matched CSV is converted to `<output dir>/<path>.txt` in a process pool, where <path> is
+# the CSV's path relative to the deepest directory containing every match, without its extension
+# (so "sheets/*/p1.csv" converts sheets/dmu/p1.csv to <output dir>/dmu/p1.txt). A manifest
+# recording each input's hash, the offset, and the output's hash is kept in the output directory,
+# and files whose inputs are unchanged are skipped. Pass --force to reconvert everything. If some
+# files fail to convert, the others are still converted and recorded in the manifest, and the
+# failures are reported together at the end.
 
 import argparse
-from collections import defaultdict
-import csv
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import heapq
 import json
-import sys
-
-# https://github.com/miyehn/ffxiv-blm-rotation/blob/ac26a23c6f620a9c549ccf814e86b65ca7b210bf/src/Components/ColorTheme.tsx#L11
-COLOR_MAP = {
-    "red": "#f64141",
-    "orange": "#e89b5f",
-    "yellow": "#ffd535",
-    "green": "#50c53d",
-    "cyan": "#53e5e5",
-    "blue": "#217ff5",
-    "purple": "#9755ef",
-    "pink": "#ee79ee",
-    "grey": "#6f6f6f",
-}
-
-
-def parse_csv(src, dst, global_offset):
+import os
+import tempfile
+
+import numpy as np
+
+from fflogs_csv import EVENT_BEGIN_CAST, NO_TRACK, iter_cast_chunks
+from markers import COLOR_MAP, MarkerTracks
+
+# https://github.com/xivintheshell/xivintheshell/blob/main/src/Components/TimelineMarkers.tsx
+MAX_TRACK_NUMBER = 20
+DEFAULT_LANE_PADDING = 0.0
+
+
+def iter_markers(src, global_offset, auto_tracks=False):
+    """
+    Lazily parse the CSV at `src`, yielding a (track_id, marker) pair for every row with a value
+    in the "Track" column.
+
+    If `auto_tracks` is set, rows with an empty "Track" column but a "Color" are also yielded,
+    with a track_id of None.
+    """
     # https://github.com/miyehn/ffxiv-blm-rotation/blob/ac26a23c6f620a9c549ccf814e86b65ca7b210bf/src/Controller/Timeline.ts#L560
     # combined marker file has the form
     # { "fileType": "MarkerTracksCombined", "tracks": <individual track object> }
@@ -58,87 +88,305 @@ def parse_csv(src, dst, global_offset):
     #     ...
     #   ]
     # }
-    tracks = defaultdict(list)  # map track id to track object
-    with open(src) as infile:
-        i = 0
-        for row in csv.DictReader(infile):
-            i += 1
-            track_str = row["Track"]
-            if not track_str:
-                continue
-            try:
-                track_id = int(track_str)
-            except ValueError as e:
-                print("bad row:", row)
-                raise e
+    offset = float(global_offset)
+    for chunk in iter_cast_chunks(
+        src, columns=("Ability", "Color", "Override Description", "Hide Text", "No Adjust")
+    ):
+        # Durations, timestamps, and the 0.3s adjustment are computed for the whole chunk at once;
+        # only the per-marker dicts are built row by row.
+        track = chunk.track
+        cast_duration = chunk.cast_duration
+        # For some reason, logs usually report casts as 0.3s too short.
+        # Add 0.3s to compensate (except for manually-added untargetable durations.)
+        adjust = (cast_duration > 0) & (track != -1) & (chunk.columns["No Adjust"] == "")
+        cast_duration = np.where(adjust, cast_duration + 0.3, cast_duration)
+        # Only "Begin Cast" events with an "x.xx sec" suffix have a duration; everything else is 0.
+        has_duration = (chunk.event_type == EVENT_BEGIN_CAST) & ~np.isnan(cast_duration)
+        times = (chunk.time - offset).tolist()
+        names = chunk.ability_names()
+        selected = track != NO_TRACK
+        if auto_tracks:
+            selected |= chunk.columns["Color"] != ""
+        for i in np.flatnonzero(selected).tolist():
+            track_id = int(track[i]) if track[i] != NO_TRACK else None
             # TODO add validation to ensure fields are filled
-            color_str = row["Color"]
-            ability = row["Ability"]
-            cast_duration = 0
-            if ability.endswith("sec"):
-                # splice off "x.xx sec" string for casts
-                toks = ability.split()
-                ability = " ".join(toks[:-2])
-                cast_duration = float(toks[-2])
-                if (cast_duration > 0 and track_id != -1) and not (
-                    "No Adjust" in row and row["No Adjust"]
-                ):
-                    # For some reason, logs usually report casts as 0.3s too short.
-                    # Add 0.3s to compensate (except for manually-added untargetable durations.)
-                    cast_duration += 0.3
-            description = row["Override Description"] or ability
-            hide = row["Hide Text"] == "y"
-            # parse timestamp into seconds
-            ts_str = row["Time"]
-            ts_toks = ts_str.split(":")
-            ts_sec = int(ts_toks[0]) * 60 + float(ts_toks[1])
-            is_begin = row["Type"] == "Begin Cast"
-            if not is_begin:
-                # already parsed duration for "Begin" events
-                cast_duration = 0
+            color_str = chunk.columns["Color"][i]
+            description = chunk.columns["Override Description"][i] or str(names[i])
+            hide = chunk.columns["Hide Text"][i] == "y"
             if track_id == -1:
                 color_hex_str = "#6f6f6f"
-                cast_duration = float(row["Ability"].split()[0])
+                duration = float(chunk.columns["Ability"][i].split()[0])
             else:
                 if not color_str:
-                    raise ValueError(f"missing color in row {i + 1}")
+                    raise ValueError(f"missing color in row {chunk.row_offset + i + 2}")
                 color_hex_str = COLOR_MAP[color_str]
-            tracks[track_id].append(
-                {
-                    "time": ts_sec - float(global_offset),
-                    "markerType": "Info" if track_id != -1 else "Untargetable",
-                    "duration": cast_duration,
-                    "description": description,
-                    "color": color_hex_str,
-                    "showText": not hide,
-                }
-            )
+                duration = float(cast_duration[i]) if has_duration[i] else 0
+            yield track_id, {
+                "time": times[i],
+                "markerType": "Info" if track_id != -1 else "Untargetable",
+                "duration": duration,
+                "description": description,
+                "color": color_hex_str,
+                "showText": not hide,
+            }
 
-    with open(dst, "w") as outfile:
-        json.dump(
-            {
-                "fileType": "MarkerTracksCombined",
-                "tracks": [
-                    {
-                        "fileType": "MarkerTrackIndividual",
-                        "track": i,
-                        "markers": track,
-                    }
-                    for i, track in sorted(tracks.items())
-                ],
-            },
-            outfile,
-        )
+
+def write_tracks_streaming(markers, dst):
+    """
+    Write a MarkerTracksCombined file from an iterable of (track_id, marker) pairs without holding
+    all markers in memory.
+
+    The first pass appends each serialized marker to a per-track spill file. The second pass
+    writes the tracks in sorted order, copying each spill file line by line. The separators match
+    `json.dump`'s defaults, so the output is byte-for-byte identical to `MarkerTracks.dump`.
+    """
+    with tempfile.TemporaryDirectory(prefix="csv2track-") as spill_dir:
+        spills = {}
+        try:
+            for track_id, marker in markers:
+                spill = spills.get(track_id)
+                if spill is None:
+                    spill = open(os.path.join(spill_dir, f"{track_id}.jsonl"), "w+")
+                    spills[track_id] = spill
+                spill.write(json.dumps(marker))
+                spill.write("\n")
+            with open(dst, "w") as outfile:
+                outfile.write('{"fileType": "MarkerTracksCombined", "tracks": [')
+                for i, (track_id, spill) in enumerate(sorted(spills.items())):
+                    if i > 0:
+                        outfile.write(", ")
+                    outfile.write(
+                        '{"fileType": "MarkerTrackIndividual", "track": '
+                        + json.dumps(track_id)
+                        + ', "markers": ['
+                    )
+                    spill.seek(0)
+                    for j, line in enumerate(spill):
+                        if j > 0:
+                            outfile.write(", ")
+                        outfile.write(line[:-1])
+                    outfile.write("]}")
+                outfile.write("]}")
+        finally:
+            for spill in spills.values():
+                spill.close()
+
+
+def assign_tracks(markers, lane_padding=DEFAULT_LANE_PADDING):
+    """
+    Assign a track to every (None, marker) pair in `markers` by packing overlapping markers into
+    as few lanes as possible, returning the new list of (track_id, marker) pairs and the number of
+    lanes used. Markers with a track id are left where they were pinned.
+
+    Markers are swept in order of start time while a min-heap holds the end time of the last
+    marker in each lane; a marker reuses the lane that freed up earliest if it is free, and opens
+    a new lane otherwise. This greedy packing is optimal for interval graphs. If `lane_padding` is
+    set, each marker occupies at least that many seconds, so that 0-duration markers leave room
+    for their text.
+    Auto-assigned lanes are numbered after the highest pinned track.
+    """
+    pinned = [track_id for track_id, _ in markers if track_id is not None]
+    first_lane = max(max(pinned, default=-1) + 1, 0)
+    auto = sorted(
+        (i for i, (track_id, _) in enumerate(markers) if track_id is None),
+        key=lambda i: markers[i][1]["time"],
+    )
+    result = list(markers)
+    lane_ends = []  # heap of (end time, lane)
+    n_lanes = 0
+    for i in auto:
+        marker = markers[i][1]
+        start = marker["time"]
+        if lane_ends and lane_ends[0][0] <= start:
+            _, lane = heapq.heappop(lane_ends)
+        else:
+            lane = n_lanes
+            n_lanes += 1
+        heapq.heappush(lane_ends, (start + max(marker["duration"], lane_padding), lane))
+        result[i] = (first_lane + lane, marker)
+    print(
+        f"auto-assigned {len(auto)} marker(s) to {n_lanes} lane(s)"
+        + (f" (tracks {first_lane}-{first_lane + n_lanes - 1})" if n_lanes else "")
+    )
+    if first_lane + n_lanes - 1 > MAX_TRACK_NUMBER:
+        print(f"warning: the app only displays tracks up to {MAX_TRACK_NUMBER}")
+    return result, n_lanes
+
+
+def parse_csv(
+    src, dst, global_offset, stream=False, auto_tracks=False, lane_padding=DEFAULT_LANE_PADDING
+):
+    markers = iter_markers(src, global_offset, auto_tracks=auto_tracks)
+    if auto_tracks:
+        # Packing needs every marker sorted by time, so auto-tracks cannot stream.
+        markers, _ = assign_tracks(list(markers), lane_padding)
+    if stream:
+        write_tracks_streaming(markers, dst)
+    else:
+        tracks = MarkerTracks()
+        for track_id, marker in markers:
+            tracks.add_marker(track_id, marker)
+        tracks.dump(dst)
     print(f"wrote {dst}")
 
 
+MANIFEST_NAME = "csv2track_manifest.json"
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def is_batch_input(path):
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def batch_inputs(src):
+    """
+    Return the sorted CSV paths matched by `src` and the root directory their output paths are
+    relative to: `src` itself for a directory, or the deepest directory containing every match
+    for a glob pattern.
+    """
+    if os.path.isdir(src):
+        return sorted(glob.glob(os.path.join(src, "*.csv"))), src
+    paths = sorted(glob.glob(src))
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]) if paths else ""
+    return paths, root
+
+
+def batch_key(in_path, root):
+    """Manifest key of an input: its path relative to `root`, without extension, "/"-separated."""
+    rel = os.path.relpath(os.path.abspath(in_path), os.path.abspath(root))
+    return os.path.splitext(rel)[0].replace(os.sep, "/")
+
+
+def convert_one(src, dst, global_offset, stream, auto_tracks, lane_padding):
+    """Process pool worker for batch mode; returns the hash of the written file."""
+    parse_csv(
+        src, dst, global_offset, stream=stream, auto_tracks=auto_tracks, lane_padding=lane_padding
+    )
+    return file_sha256(dst)
+
+
+def parse_batch(
+    src,
+    dst_dir,
+    global_offset,
+    stream=False,
+    jobs=None,
+    force=False,
+    auto_tracks=False,
+    lane_padding=DEFAULT_LANE_PADDING,
+):
+    os.makedirs(dst_dir, exist_ok=True)
+    manifest_path = os.path.join(dst_dir, MANIFEST_NAME)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    offset = float(global_offset)
+    # lane padding if auto-tracks is enabled, recorded so toggling it reconverts every file
+    auto_tracks_key = lane_padding if auto_tracks else None
+    pending = {}
+    failures = {}
+    in_paths, root = batch_inputs(src)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for in_path in in_paths:
+            key = batch_key(in_path, root)
+            out_path = os.path.join(dst_dir, *key.split("/")) + ".txt"
+            in_hash = file_sha256(in_path)
+            entry = manifest.get(key)
+            if (
+                not force
+                and entry is not None
+                and entry["input_sha256"] == in_hash
+                and entry["offset"] == offset
+                and entry.get("auto_tracks") == auto_tracks_key
+                and os.path.exists(out_path)
+                and file_sha256(out_path) == entry["output_sha256"]
+            ):
+                print(f"skipping unchanged {in_path}")
+                continue
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            future = pool.submit(
+                convert_one, in_path, out_path, global_offset, stream, auto_tracks, lane_padding
+            )
+            pending[key] = (in_path, in_hash, future)
+        for key, (in_path, in_hash, future) in pending.items():
+            try:
+                out_hash = future.result()
+            except Exception as e:
+                print(f"failed to convert {in_path}: {e}")
+                failures[in_path] = e
+                # forget the previous conversion, so that the file is retried on the next run
+                manifest.pop(key, None)
+                continue
+            manifest[key] = {
+                "input": in_path,
+                "input_sha256": in_hash,
+                "offset": offset,
+                "auto_tracks": auto_tracks_key,
+                "output_sha256": out_hash,
+            }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"converted {len(pending) - len(failures)} file(s), manifest at {manifest_path}")
+    if failures:
+        raise ValueError(
+            f"failed to convert {len(failures)} file(s):\n"
+            + "\n".join(f"{in_path}: {e}" for in_path, e in failures.items())
+        )
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         prog="csv2track",
         description="Track generator for XIV in the Shell",
     )
-    parser.add_argument("input_csv")
-    parser.add_argument("output_json")
+    parser.add_argument("input_csv", help="a CSV file, or a directory/glob for batch mode")
+    parser.add_argument("output_json", help="a JSON file, or an output directory for batch mode")
     parser.add_argument("--offset", default=0)
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="spill rows to disk per track to keep memory usage constant on large exports",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=None, help="number of worker processes in batch mode"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="reconvert unchanged files in batch mode"
+    )
+    parser.add_argument(
+        "--auto-tracks",
+        action="store_true",
+        help="pack colored rows with an empty Track column into as few tracks as possible",
+    )
+    parser.add_argument(
+        "--lane-padding",
+        type=float,
+        default=DEFAULT_LANE_PADDING,
+        help="minimum seconds each marker occupies in its lane with --auto-tracks (default: 0)",
+    )
     args = parser.parse_args()
-    parse_csv(args.input_csv, args.output_json, args.offset)
+    if is_batch_input(args.input_csv):
+        parse_batch(
+            args.input_csv,
+            args.output_json,
+            args.offset,
+            stream=args.stream,
+            jobs=args.jobs,
+            force=args.force,
+            auto_tracks=args.auto_tracks,
+            lane_padding=args.lane_padding,
+        )
+    else:
+        parse_csv(
+            args.input_csv,
+            args.output_json,
+            args.offset,
+            stream=args.stream,
+            auto_tracks=args.auto_tracks,
+            lane_padding=args.lane_padding,
+        )
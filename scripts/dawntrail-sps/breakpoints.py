@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Generate src/Game/Data/SpeedBreakpoints.ts, the table behind XIVMath.minSpeedForGcd.
+
+A GCD or cast time only depends on the speed stat through the per-mille speed bonus
+floor(130 * (speed - substat base) / level div), which is the same at every level. For each
+base GCD in tiers.BASE_CAST_TIMES and each haste modifier in SPEED_MODIFIERS, the step function
+bonus -> GCD is evaluated for every bonus up to MAX_BONUS, and the bonuses at which the GCD drops
+by 0.01s are recorded. Since a bonus of k is first reached at speed
+substat base + ceil(k * level div / 130), "what is the minimum speed for a 2.43 GCD" becomes an
+array lookup at any level, and "where is the next GCD tier above this speed" a binary search.
+
+Each table is written as "<GCD at 0 bonus, in centiseconds>:<deltas>", where the deltas between
+consecutive breakpoint bonuses are single base-36 digits.
+
+`verify` checks the tables against the tier files in this directory, which list the spell
+speeds at which each base cast time drops at level 100.
+
+Requires numpy (`pip install numpy`).
+
+    python scripts/dawntrail-sps/breakpoints.py generate
+    python scripts/dawntrail-sps/breakpoints.py verify
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from tiers import (
+    BASE_CAST_TIMES,
+    LEVEL_DIV,
+    LEVEL_MAIN,
+    cast_time_cs_for_bonus,
+    read_table,
+    tier_path,
+)
+
+# Haste modifiers used by jobs in src/Game/Jobs (Ley Lines, Greased Lightning, Fuka,
+# Swiftscaled, Huton, Army's Paeon/Muse stacks).
+SPEED_MODIFIERS = (0, 1, 2, 3, 4, 8, 10, 12, 13, 15, 16, 20)
+# enough for 5000 speed at level 100
+MAX_BONUS = 250
+
+OUT_PATH = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../../src/Game/Data/SpeedBreakpoints.ts",
+    )
+)
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+TS_TEMPLATE = """// Generated by scripts/dawntrail-sps/breakpoints.py. Do not edit by hand.
+// Maps "<base GCD>/<speed modifier>" to "<GCD at 0 speed bonus (centiseconds)>:<deltas>", where
+// each base-36 digit of <deltas> is the increase in speed bonus from one 0.01s drop in GCD to the
+// next. See XIVMath.minSpeedForGcd.
+
+export const SPEED_BREAKPOINT_MAX_BONUS = {max_bonus};
+
+export const SPEED_BREAKPOINTS: Record<string, string> = {{
+{entries}
+}};
+"""
+
+
+def breakpoint_bonuses(base, haste, max_bonus=MAX_BONUS):
+    """Return (GCD in cs at bonus 0, sorted bonuses at which the GCD drops by 0.01s)."""
+    bonuses = np.arange(max_bonus + 1)
+    gcd = cast_time_cs_for_bonus(bonuses, (base,), haste)[:, 0]
+    steps = -np.diff(gcd)
+    # the GCD never drops by more than 0.01s from one bonus to the next
+    assert steps.min() >= 0 and steps.max() <= 1, (base, haste)
+    return int(gcd[0]), (np.flatnonzero(steps) + 1).tolist()
+
+
+def table_key(base, haste) -> str:
+    return f"{base:.2f}/{haste}"
+
+
+def encode(gcd0, bonuses) -> str:
+    deltas = np.diff([0] + bonuses)
+    assert deltas.max() < len(DIGITS)
+    return f"{gcd0}:" + "".join(DIGITS[d] for d in deltas)
+
+
+def generate(out_path=OUT_PATH):
+    entries = []
+    for base in BASE_CAST_TIMES:
+        for haste in SPEED_MODIFIERS:
+            encoded = encode(*breakpoint_bonuses(base, haste))
+            entries.append(f'\t"{table_key(base, haste)}": "{encoded}",')
+    with open(out_path, "w") as f:
+        f.write(TS_TEMPLATE.format(max_bonus=MAX_BONUS, entries="\n".join(entries)))
+    print(f"wrote {out_path} ({len(entries)} tables)")
+
+
+def min_speed(bonus, substat_base=LEVEL_MAIN, div=LEVEL_DIV) -> int:
+    return substat_base + -(-bonus * div // 130)
+
+
+def verify() -> int:
+    """Check that every row of the level 100 tier files is at a breakpoint. Returns # failures."""
+    failures = 0
+    for base in BASE_CAST_TIMES:
+        gcd0, bonuses = breakpoint_bonuses(base, 0)
+        path = tier_path(base)
+        for row in read_table(path)[1:]:
+            speed = int(row[0])
+            gcd_cs = round(float(row[3 + BASE_CAST_TIMES.index(base)]) * 100)
+            expected = min_speed(bonuses[gcd0 - gcd_cs - 1])
+            if expected != speed:
+                failures += 1
+                print(f"{path}: {gcd_cs / 100} starts at {speed}, table says {expected}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="breakpoints",
+        description="Generate the speed breakpoint table used by XIVMath",
+    )
+    parser.add_argument("command", choices=("generate", "verify"))
+    parser.add_argument("--out", default=OUT_PATH)
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.out)
+    else:
+        failures = verify()
+        if failures:
+            print(f"{failures} failure(s)")
+            sys.exit(1)
+        print("all breakpoints match the tier files")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Verify and regenerate the spell speed tier tables in this directory.
+
+Each tiers-<base>.csv lists every spell speed at which a <base>s cast becomes 0.01s shorter,
+up to MAX_SPEED. A row is
+
+    speed, speed - 420, speed multiplier, cast time for each of BASE_CAST_TIMES
+
+and the first row (speed 420, where every cast time equals its base) doubles as the header. See
+source.txt for where the tables come from.
+
+Cast times are evaluated with NumPy over the whole grid of speeds 420..MAX_SPEED times every
+base cast time at once, using the same floating-point operations as `adjustedCastTime` in test.js
+(and `allaganGcd` in ../sps-LL/test.js for haste), so results match the JS implementation bit for
+bit. `verify` checks every cell of every tier file; `generate` rewrites them. To add a base cast
+time, append it to BASE_CAST_TIMES and run `generate`; haste tables (e.g. Ley Lines, 15) can be
+written with `generate --haste 15 --out <dir>`.
+
+Requires numpy (`pip install numpy`).
+
+    python scripts/dawntrail-sps/tiers.py verify
+    python scripts/dawntrail-sps/tiers.py generate
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+LEVEL_MAIN = 420
+LEVEL_DIV = 2780
+BASE_CAST_TIMES = (1.5, 2.0, 2.5, 2.8, 3.0, 3.5, 4.0)
+# the tables stop at the last breakpoint below 3799
+MAX_SPEED = 3798
+
+TIERS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def speed_bonus(speeds) -> np.ndarray:
+    """floor(130 * (speed - 420) / 2780), the per-mille reduction in cast time."""
+    return -np.ceil((LEVEL_MAIN - np.asarray(speeds, dtype=float)) * 130 / LEVEL_DIV)
+
+
+def cast_time_cs(speeds, base_cast_times, haste=0) -> np.ndarray:
+    """
+    Adjusted cast times in hundredths of a second, as an int64 array of shape
+    (len(speeds), len(base_cast_times)).
+    """
+    speeds = np.asarray(speeds, dtype=float)
+    return cast_time_cs_for_bonus(speed_bonus(speeds), base_cast_times, haste)
+
+
+def cast_time_cs_for_bonus(bonuses, base_cast_times, haste=0) -> np.ndarray:
+    """
+    Like `cast_time_cs`, but for the per-mille speed bonuses returned by `speed_bonus` instead
+    of speeds. Cast times only depend on the speed stat through this bonus.
+    """
+    ceil = -np.asarray(bonuses, dtype=float)[:, None]
+    bases = np.asarray(base_cast_times, dtype=float)[None, :]
+    pts = np.floor(bases * (1000 + ceil))
+    return np.floor((100 - haste) * pts / 1000).astype(np.int64)
+
+
+def format_number(x) -> str:
+    """Format like JS's Number.prototype.toString for the values in the tables."""
+    return f"{x:g}"
+
+
+def tier_table(base_cast_time, max_speed=MAX_SPEED, haste=0, base_cast_times=BASE_CAST_TIMES):
+    """Return the rows of the tier table for `base_cast_time` as lists of strings."""
+    speeds = np.arange(LEVEL_MAIN, max_speed + 1)
+    grid = cast_time_cs(speeds, base_cast_times, haste)
+    column = grid[:, base_cast_times.index(base_cast_time)]
+    rows_idx = np.concatenate(([0], np.flatnonzero(np.diff(column)) + 1))
+    multipliers = 1 + speed_bonus(speeds[rows_idx]) / 1000
+    rows = []
+    for i, multiplier in zip(rows_idx.tolist(), multipliers.tolist()):
+        speed = int(speeds[i])
+        rows.append(
+            [str(speed), str(speed - LEVEL_MAIN), format_number(multiplier)]
+            + [format_number(cs / 100) for cs in grid[i].tolist()]
+        )
+    # the first row is also the header, so it lists the base cast times themselves
+    rows[0][3:] = [format_number(b) for b in base_cast_times]
+    return rows
+
+
+def tier_path(base_cast_time, directory=TIERS_DIR, haste=0) -> str:
+    suffix = f"-haste{haste}" if haste else ""
+    return os.path.join(directory, f"tiers-{base_cast_time:.1f}{suffix}.csv")
+
+
+def read_table(path):
+    with open(path) as f:
+        return [line.strip().split(",") for line in f if line.strip()]
+
+
+def verify(directory=TIERS_DIR, max_speed=MAX_SPEED, haste=0) -> int:
+    """Compare every tier file against the formula, printing mismatches. Returns their number."""
+    failures = 0
+    for base in BASE_CAST_TIMES:
+        path = tier_path(base, directory, haste)
+        expected = tier_table(base, max_speed, haste)
+        actual = read_table(path)
+        for row, (want, got) in enumerate(zip(expected, actual)):
+            if [float(x) for x in want] != [float(x) for x in got]:
+                failures += 1
+                print(f"{path} row {row + 1}: expected {','.join(want)}, got {','.join(got)}")
+        if len(expected) != len(actual):
+            failures += 1
+            print(f"{path}: expected {len(expected)} rows, got {len(actual)}")
+    return failures
+
+
+def generate(directory=TIERS_DIR, max_speed=MAX_SPEED, haste=0):
+    os.makedirs(directory, exist_ok=True)
+    for base in BASE_CAST_TIMES:
+        path = tier_path(base, directory, haste)
+        with open(path, "w") as f:
+            # the original tables have no trailing newline
+            f.write("\n".join(",".join(row) for row in tier_table(base, max_speed, haste)))
+        print(f"wrote {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="tiers",
+        description="Verify or regenerate the spell speed tier tables",
+    )
+    parser.add_argument("command", choices=("verify", "generate"))
+    parser.add_argument("--out", default=TIERS_DIR, help="directory of the tier files")
+    parser.add_argument("--max-speed", type=int, default=MAX_SPEED)
+    parser.add_argument(
+        "--haste", type=int, default=0, help="haste modifier, e.g. 15 for Ley Lines"
+    )
+    args = parser.parse_args()
+    if args.command == "verify":
+        failures = verify(args.out, args.max_speed, args.haste)
+        if failures:
+            print(f"{failures} failure(s)")
+            sys.exit(1)
+        print(f"all tests passed ({len(BASE_CAST_TIMES)} tier files)")
+    else:
+        generate(args.out, args.max_speed, args.haste)
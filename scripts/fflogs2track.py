@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Convert an FFLogs events response (the JSON returned by the GraphQL `events` query, like the
+files in src/__test__/Asset/fflogs_responses) directly into a MarkerTracksCombined file, without
+exporting and hand-annotating a CSV first.
+
+The events array is read incrementally with fflogs_events.stream_json, so memory usage does not
+depend on the size of the response. Casts are built the same way as the app's log import and
+csv2track.py:
+- a "begincast" is paired with the next "cast" of the same source. If the cast is of the same
+  ability, one marker is made at the begincast's timestamp whose duration is the cast time + 0.3s
+  (to account for an FFLogs limitation; set "noAdjust" to skip this). Begincasts that are
+  interrupted or followed by a different ability are dropped.
+- a "cast" without a matching begincast becomes a 0s marker.
+Marker times are relative to the start of the first fight in the response (override with
+--start-time, in ms since the start of the report), minus --offset seconds.
+
+Which abilities go where is decided by a rules file, which plays the role of the Track, Color,
+Override Description, Hide Text, and No Adjust columns of a csv2track sheet:
+
+    {
+        "sources": [12, 13],
+        "abilities": {
+            "40118": {"track": 0, "color": "red", "description": "Cyclonic Break"},
+            "40129": {"track": 1, "color": "purple", "hideText": true, "noAdjust": true}
+        },
+        "default": {"track": 2, "color": "grey"}
+    }
+
+"abilities" is keyed by abilityGameID. "sources" optionally restricts which sourceIDs are read.
+If "default" is present, abilities without a rule are placed according to it; otherwise they are
+skipped. Colors are either names from COLOR_MAP or #hex strings. Without a "description", the
+ability's name is taken from the response's masterData if it was queried, and is otherwise
+"Ability <id>".
+
+    python scripts/fflogs2track.py response.json rules.json out.txt --offset 3
+"""
+
+import argparse
+import json
+
+from fflogs_events import EVENTS_PATH, FIGHTS_PATH, stream_json
+from markers import COLOR_MAP, MarkerTracks
+
+MASTER_ABILITIES_PATH = ("data", "reportData", "report", "masterData", "abilities")
+CAST_ADJUST = 0.3
+
+
+def load_rules(path):
+    with open(path) as f:
+        rules = json.load(f)
+    abilities = {int(k): v for k, v in rules.get("abilities", {}).items()}
+    sources = set(rules["sources"]) if rules.get("sources") else None
+    for ability_id, rule in [*abilities.items(), (None, rules.get("default"))]:
+        if rule is None:
+            continue
+        if "track" not in rule or "color" not in rule:
+            raise ValueError(f"rule for ability {ability_id} needs both a track and a color")
+        if not rule["color"].startswith("#") and rule["color"] not in COLOR_MAP:
+            raise ValueError(f"unknown color {rule['color']!r} for ability {ability_id}")
+    return abilities, sources, rules.get("default")
+
+
+def iter_casts(events, sources=None):
+    """
+    Pair begincast and cast events, yielding (timestamp ms, abilityGameID, cast time s) for
+    every completed cast. Instant casts have a cast time of 0.
+    """
+    pending = {}
+    for event in events:
+        event_type = event.get("type")
+        if event_type not in ("begincast", "cast"):
+            continue
+        source = event.get("sourceID")
+        if sources is not None and source not in sources:
+            continue
+        if event_type == "begincast":
+            # a new begincast from the same source means the previous one was interrupted
+            pending[source] = event
+            continue
+        begin = pending.pop(source, None)
+        ability_id = event["abilityGameID"]
+        if begin is not None and begin["abilityGameID"] == ability_id:
+            yield begin["timestamp"], ability_id, begin.get("duration", 0) / 1000
+        else:
+            yield event["timestamp"], ability_id, 0
+
+
+def convert(src, rules_path, dst, global_offset=0, start_time=None):
+    abilities, sources, default = load_rules(rules_path)
+    captured = {}
+    placed = []
+    first_timestamp = None
+    with open(src) as f:
+        events = stream_json(f, EVENTS_PATH, (FIGHTS_PATH, MASTER_ABILITIES_PATH), captured)
+        for timestamp, ability_id, cast_time in iter_casts(events, sources):
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            rule = abilities.get(ability_id, default)
+            if rule is not None:
+                placed.append((timestamp, ability_id, cast_time, rule))
+    # fights and masterData come after the events in the response, so times and names are only
+    # resolved once the whole stream has been read
+    if start_time is None:
+        fights = captured.get(FIGHTS_PATH)
+        start_time = fights[0]["startTime"] if fights else (first_timestamp or 0)
+    names = {a["gameID"]: a["name"] for a in captured.get(MASTER_ABILITIES_PATH) or ()}
+    tracks = MarkerTracks()
+    for timestamp, ability_id, cast_time, rule in placed:
+        duration = cast_time
+        if cast_time > 0 and not rule.get("noAdjust"):
+            duration = round(cast_time + CAST_ADJUST, 3)
+        color = rule["color"]
+        tracks.add(
+            rule["track"],
+            (timestamp - start_time) / 1000 - global_offset,
+            "Info",
+            duration,
+            rule.get("description") or names.get(ability_id) or f"Ability {ability_id}",
+            COLOR_MAP.get(color, color),
+            not rule.get("hideText", False),
+        )
+    tracks.dump(dst)
+    return len(tracks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="fflogs2track",
+        description="Convert an FFLogs events response into a marker track file",
+    )
+    parser.add_argument("response_json")
+    parser.add_argument("rules_json")
+    parser.add_argument("output_json")
+    parser.add_argument("--offset", type=float, default=0)
+    parser.add_argument(
+        "--start-time",
+        type=int,
+        default=None,
+        help="report timestamp (ms) to use as time 0 instead of the first fight's start",
+    )
+    args = parser.parse_args()
+    n = convert(args.response_json, args.rules_json, args.output_json, args.offset, args.start_time)
+    print(f"wrote {args.output_json} ({n} markers)")
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Download every event of one or more fights of an FFLogs report through the v2 GraphQL API, and
+a local stand-in for that API that replays recorded responses for offline testing.
+
+Requires requests (`pip install requests`).
+
+The `fetch` command first lists the report's fights, then splits each fight's time range into
+--splits slices. Slices are downloaded concurrently by a pool of --jobs threads sharing one
+pooled `requests.Session`; each slice follows `nextPageTimestamp` until it reaches the end of
+the slice. Every page is streamed straight to disk as
+
+    <output dir>/<report code>/fight<id>/<page start time>.json
+
+with the same shape as the files in src/__test__/Asset/fflogs_responses, so the pages can be fed
+to fflogs2track.py one at a time. Throughput (pages/s, events/s) is printed at the end.
+
+An access token is read from --token or the FFLOGS_TOKEN environment variable. See
+https://www.fflogs.com/api/docs for how to create a client and obtain one.
+
+    python scripts/fflogs_client.py fetch ABCDEFGH logs/ --fight 5 --source 31 --jobs 4 --splits 4
+
+The `serve` command starts a server that answers the same queries from the recorded responses in
+a directory, each of which is treated as a report whose code is the file name without ".json".
+Events are served --page-size at a time, optionally after --latency milliseconds, so the client
+can be tested and benchmarked offline:
+
+    python scripts/fflogs_client.py serve src/__test__/Asset/fflogs_responses --port 8400
+    python scripts/fflogs_client.py fetch shanzhe_pct_fru_response logs/ --api-url http://127.0.0.1:8400/
+"""
+
+import argparse
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fflogs_events import EVENTS_PATH, NEXT_PAGE_PATH, stream_json
+
+DEFAULT_API_URL = "https://www.fflogs.com/api/v2/client"
+DEFAULT_PAGE_SIZE = 1000
+RESPONSE_CHUNK_SIZE = 1 << 16
+
+LIST_FIGHTS_QUERY = """
+query ListReportFights($reportCode: String, $fightIDs: [Int]) {
+	reportData {
+		report(code: $reportCode) {
+			fights(fightIDs: $fightIDs) {
+				id
+				name
+				startTime
+				endTime
+			}
+		}
+	}
+}"""
+
+EVENTS_QUERY = """
+query GetEvents($reportCode: String, $fightIDs: [Int], $sourceID: Int, $startTime: Float, $endTime: Float) {
+	reportData {
+		report(code: $reportCode) {
+			events(fightIDs: $fightIDs, sourceID: $sourceID, startTime: $startTime, endTime: $endTime) {
+				data
+				nextPageTimestamp
+			}
+		}
+	}
+}"""
+
+
+def make_session(token, pool_size):
+    session = requests.Session()
+    # FFLogs rate limits with 429s; retry those and transient server errors with backoff
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+def post_query(session, api_url, query, variables, stream=False):
+    response = session.post(api_url, json={"query": query, "variables": variables}, stream=stream)
+    response.raise_for_status()
+    return response
+
+
+def check_errors(blob):
+    if blob.get("error") is not None:
+        raise RuntimeError(blob["error"])
+    if blob.get("errors") is not None:
+        raise RuntimeError(blob["errors"])
+
+
+def list_fights(session, api_url, report_code, fight_ids=None):
+    blob = post_query(
+        session, api_url, LIST_FIGHTS_QUERY, {"reportCode": report_code, "fightIDs": fight_ids}
+    ).json()
+    check_errors(blob)
+    return blob["data"]["reportData"]["report"]["fights"]
+
+
+def split_range(start, end, splits):
+    """Split [start, end) into `splits` contiguous integer ranges."""
+    bounds = [start + (end - start) * i // splits for i in range(splits + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def fetch_slice(session, api_url, out_dir, report_code, fight, start, end, source_id=None):
+    """
+    Download the events of `fight` in [start, end), following nextPageTimestamp. Returns the
+    number of pages and events written.
+    """
+    fight_dir = os.path.join(out_dir, report_code, f"fight{fight['id']}")
+    os.makedirs(fight_dir, exist_ok=True)
+    pages = events = 0
+    page_start = start
+    while page_start is not None and page_start < end:
+        variables = {
+            "reportCode": report_code,
+            "fightIDs": [fight["id"]],
+            "sourceID": source_id,
+            "startTime": page_start,
+            "endTime": end,
+        }
+        path = os.path.join(fight_dir, f"{page_start}.json")
+        with post_query(session, api_url, EVENTS_QUERY, variables, stream=True) as response:
+            with open(path, "wb") as f:
+                for chunk in response.iter_content(RESPONSE_CHUNK_SIZE):
+                    f.write(chunk)
+        # re-read the page from disk to count its events without holding it in memory
+        captured = {}
+        with open(path) as f:
+            events += sum(1 for _ in stream_json(f, EVENTS_PATH, (NEXT_PAGE_PATH,), captured))
+        if NEXT_PAGE_PATH not in captured:
+            with open(path) as f:
+                check_errors(json.load(f))
+            raise RuntimeError(f"{path} has no events; is the report code correct?")
+        pages += 1
+        page_start = captured[NEXT_PAGE_PATH]
+    return pages, events
+
+
+def fetch(
+    report_code,
+    out_dir,
+    api_url=DEFAULT_API_URL,
+    token=None,
+    fight_ids=None,
+    source_id=None,
+    jobs=4,
+    splits=1,
+):
+    session = make_session(token, jobs)
+    started = time.perf_counter()
+    fights = list_fights(session, api_url, report_code, fight_ids)
+    work = [
+        (fight, start, end)
+        for fight in fights
+        # endTime is inclusive for fights but exclusive for events queries
+        for start, end in split_range(fight["startTime"], fight["endTime"] + 1, splits)
+    ]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(
+                fetch_slice, session, api_url, out_dir, report_code, fight, start, end, source_id
+            )
+            for fight, start, end in work
+        ]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    pages = sum(p for p, _ in results)
+    events = sum(e for _, e in results)
+    print(
+        f"fetched {events} events in {pages} pages from {len(fights)} fight(s) "
+        f"in {elapsed:.2f}s ({events / elapsed:.0f} events/s, {pages / elapsed:.1f} pages/s)"
+    )
+    return pages, events
+
+
+class FixtureReport:
+    """A recorded events response, served back one page at a time."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            report = json.load(f)["data"]["reportData"]["report"]
+        self.events = report["events"]["data"]
+        self.timestamps = [e["timestamp"] for e in self.events]
+        fight_ids = sorted({e["fight"] for e in self.events if "fight" in e}) or [1]
+        # recorded responses only contain the queried fight, which may not list its id
+        self.fights = [
+            {"id": fight.get("id", fight_id), **fight}
+            for fight, fight_id in zip(report["fights"], fight_ids)
+        ]
+
+    def page(self, variables, page_size):
+        start = variables.get("startTime") or 0
+        end = variables.get("endTime") or float("inf")
+        fight_ids = variables.get("fightIDs")
+        source_id = variables.get("sourceID")
+        data = []
+        next_page = None
+        # events are recorded in timestamp order
+        for i in range(bisect_left(self.timestamps, start), len(self.events)):
+            event = self.events[i]
+            if event["timestamp"] >= end:
+                break
+            if fight_ids and event.get("fight") not in fight_ids:
+                continue
+            if source_id is not None and event.get("sourceID") != source_id:
+                continue
+            ts = event["timestamp"]
+            # the next page starts at a timestamp, so events sharing one are never split across
+            # pages; a page is only extended past page_size if one timestamp fills all of it
+            if len(data) >= page_size and data[0]["timestamp"] != ts:
+                while data[-1]["timestamp"] == ts:
+                    data.pop()
+                next_page = ts
+                break
+            data.append(event)
+        return {"data": data, "nextPageTimestamp": next_page}
+
+
+def make_handler(reports, page_size, latency):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            variables = body.get("variables") or {}
+            report = reports.get(variables.get("reportCode"))
+            if report is None:
+                blob = {"errors": [{"message": f"unknown report {variables.get('reportCode')}"}]}
+            elif "events(" in body["query"]:
+                blob = {"data": {"reportData": {"report": {"events": report.page(variables, page_size)}}}}
+            else:
+                fight_ids = variables.get("fightIDs")
+                fights = [f for f in report.fights if not fight_ids or f["id"] in fight_ids]
+                blob = {"data": {"reportData": {"report": {"fights": fights}}}}
+            if latency:
+                time.sleep(latency / 1000)
+            payload = json.dumps(blob).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def make_server(fixture_dir, port=0, page_size=DEFAULT_PAGE_SIZE, latency=0):
+    reports = {
+        os.path.splitext(os.path.basename(path))[0]: FixtureReport(path)
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "*.json")))
+    }
+    return ThreadingHTTPServer(("127.0.0.1", port), make_handler(reports, page_size, latency))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="fflogs_client",
+        description="Download FFLogs events, or serve recorded responses locally",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = subparsers.add_parser("fetch", help="download every event page of a report")
+    fetch_parser.add_argument("report_code")
+    fetch_parser.add_argument("output_dir")
+    fetch_parser.add_argument("--api-url", default=DEFAULT_API_URL)
+    fetch_parser.add_argument("--token", default=os.environ.get("FFLOGS_TOKEN"))
+    fetch_parser.add_argument(
+        "--fight", type=int, action="append", help="fight id to download (default: all)"
+    )
+    fetch_parser.add_argument("--source", type=int, default=None, help="only this sourceID")
+    fetch_parser.add_argument("--jobs", "-j", type=int, default=4)
+    fetch_parser.add_argument(
+        "--splits", type=int, default=1, help="number of time slices to fetch per fight"
+    )
+    serve_parser = subparsers.add_parser("serve", help="replay recorded responses")
+    serve_parser.add_argument("fixture_dir")
+    serve_parser.add_argument("--port", type=int, default=8400)
+    serve_parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    serve_parser.add_argument("--latency", type=float, default=0, help="delay per response (ms)")
+    args = parser.parse_args()
+    if args.command == "fetch":
+        fetch(
+            args.report_code,
+            args.output_dir,
+            args.api_url,
+            args.token,
+            args.fight,
+            args.source,
+            args.jobs,
+            args.splits,
+        )
+    else:
+        server = make_server(args.fixture_dir, args.port, args.page_size, args.latency)
+        print(f"serving {args.fixture_dir} on http://127.0.0.1:{server.server_address[1]}/")
+        server.serve_forever()
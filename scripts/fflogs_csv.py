@@ -0,0 +1,164 @@
+"""
+Columnar loader for FFLogs cast timeline CSV exports, shared by csv2track.py and
+slidecast-window.py.
+
+Requires numpy (`pip install numpy`).
+
+An export is read into a `CastTable` of parallel NumPy arrays instead of one dict per row:
+- time: seconds since the start of the log (float64)
+- event_type: EVENT_BEGIN_CAST, EVENT_CAST, or EVENT_OTHER (int8)
+- ability_id: index into the table's interned `abilities` list (int32)
+- cast_duration: the "x.xx sec" suffix of the Ability column, or NaN if there is none (float64)
+- track: the hand-filled "Track" column used by csv2track, or NO_TRACK if empty (int32)
+
+Timestamps and durations are parsed with vectorized string operations. Unlike
+`datetime.strptime("%M:%S.%f")`, timestamps may have more than 59 minutes ("75:02.100") or an
+hour component ("1:15:02.100").
+"""
+
+import csv
+from dataclasses import dataclass, field
+
+import numpy as np
+
+EVENT_BEGIN_CAST = 0
+EVENT_CAST = 1
+EVENT_OTHER = 2
+EVENT_TYPE_CODES = {"Begin Cast": EVENT_BEGIN_CAST, "Cast": EVENT_CAST}
+
+NO_TRACK = np.iinfo(np.int32).min
+
+DEFAULT_CHUNK_ROWS = 65536
+
+
+@dataclass
+class CastTable:
+    time: np.ndarray
+    event_type: np.ndarray
+    ability_id: np.ndarray
+    cast_duration: np.ndarray
+    track: np.ndarray
+    abilities: list[str]
+    # Raw string columns requested by the caller, keyed by header name.
+    columns: dict[str, np.ndarray] = field(default_factory=dict)
+    # Index of this table's first row within the CSV (0 is the first row after the header).
+    row_offset: int = 0
+
+    def __len__(self):
+        return len(self.time)
+
+    def ability_names(self) -> np.ndarray:
+        return np.asarray(self.abilities, dtype=str)[self.ability_id]
+
+
+def parse_timestamps(strs) -> np.ndarray:
+    """
+    Convert an array of "[H:]MM:SS.mmm" strings to seconds.
+
+    Only the leading component is signed, and the rest is a positive offset from it, as in the
+    times track2csv.py writes: "-1:55.000" is 5 seconds before the pull.
+    """
+    arr = np.char.strip(np.asarray(strs, dtype=str))
+    head, _, seconds = np.char.rpartition(arr, ":").T
+    hours, _, minutes = np.char.rpartition(head, ":").T
+    hours = np.where(hours == "", "0", hours)
+    minutes = np.where(minutes == "", "0", minutes)
+    return hours.astype(np.int64) * 3600 + minutes.astype(np.int64) * 60 + seconds.astype(float)
+
+
+def split_abilities(strs, split_plus=False) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Split "Name x.xx sec" ability strings into names and cast durations.
+
+    Abilities without a duration suffix keep their name unchanged and get a NaN duration. If
+    `split_plus` is set, anything after a "+" in the ability column is discarded first.
+    """
+    names = np.asarray(strs, dtype=str)
+    if split_plus:
+        names = np.char.strip(np.char.partition(names, "+")[:, 0])
+    has_sec = np.char.endswith(names, "sec")
+    body = np.char.rstrip(np.char.rpartition(names, " ")[:, 0])
+    stripped_names, _, duration_strs = np.char.rpartition(body, " ").T
+    has_sec &= np.char.isdigit(np.char.replace(duration_strs, ".", "", 1))
+    durations = np.full(len(names), np.nan)
+    durations[has_sec] = duration_strs[has_sec].astype(float)
+    names = np.where(has_sec, np.char.strip(stripped_names), names)
+    return names, durations
+
+
+def _parse_tracks(strs, row_offset) -> np.ndarray:
+    arr = np.char.strip(np.asarray(strs, dtype=str))
+    present = arr != ""
+    tracks = np.full(len(arr), NO_TRACK, dtype=np.int32)
+    try:
+        tracks[present] = arr[present].astype(np.int32)
+    except ValueError:
+        for i in np.flatnonzero(present):
+            try:
+                int(arr[i])
+            except ValueError:
+                raise ValueError(
+                    f"bad track {str(arr[i])!r} in row {row_offset + i + 2}"
+                ) from None
+        raise
+    return tracks
+
+
+def _build_table(header, rows, row_offset, columns, split_plus) -> CastTable:
+    def column(name):
+        if name not in header:
+            return np.full(len(rows), "", dtype=str)
+        i = header.index(name)
+        return np.asarray([r[i] if i < len(r) else "" for r in rows], dtype=str)
+
+    names, durations = split_abilities(column("Ability"), split_plus=split_plus)
+    abilities, ability_id = np.unique(names, return_inverse=True)
+    type_strs = column("Type")
+    event_type = np.full(len(rows), EVENT_OTHER, dtype=np.int8)
+    for type_str, code in EVENT_TYPE_CODES.items():
+        event_type[type_strs == type_str] = code
+    return CastTable(
+        time=parse_timestamps(column("Time")),
+        event_type=event_type,
+        ability_id=ability_id.astype(np.int32),
+        cast_duration=durations,
+        track=_parse_tracks(column("Track"), row_offset),
+        abilities=abilities.tolist(),
+        columns={name: column(name) for name in columns},
+        row_offset=row_offset,
+    )
+
+
+def iter_cast_chunks(
+    src, columns=(), chunk_rows=DEFAULT_CHUNK_ROWS, split_plus=False
+):
+    """
+    Lazily read the CSV at `src` as a sequence of CastTables of at most `chunk_rows` rows each,
+    keeping memory bounded for very large exports.
+
+    `columns` lists additional header names whose raw string values should be kept in
+    `CastTable.columns`; missing columns are filled with empty strings.
+    """
+    with open(src, newline="") as infile:
+        reader = csv.reader(infile)
+        header = [h.strip() for h in next(reader)]
+        rows = []
+        row_offset = 0
+        for row in reader:
+            # skip blank lines, like csv.DictReader
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                yield _build_table(header, rows, row_offset, columns, split_plus)
+                row_offset += len(rows)
+                rows = []
+        if rows or row_offset == 0:
+            yield _build_table(header, rows, row_offset, columns, split_plus)
+
+
+def load_casts(src, columns=(), split_plus=False) -> CastTable:
+    """Read the entire CSV at `src` into a single CastTable."""
+    return next(
+        iter_cast_chunks(src, columns=columns, chunk_rows=None, split_plus=split_plus)
+    )
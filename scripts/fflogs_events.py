@@ -0,0 +1,128 @@
+"""
+Incremental reader for FFLogs GraphQL event responses, like the ones saved in
+src/__test__/Asset/fflogs_responses.
+
+A response has the shape
+    {"data": {"reportData": {"report": {"events": {"data": [...], "nextPageTimestamp": ...},
+                                        "fights": [...], ...}}}}
+and the events array can be many megabytes. `stream_json` walks the document while reading it in
+fixed-size chunks and yields the elements of one array one at a time, so the whole document is
+never held in memory. Values at other paths (like the fights list) can be captured on the way.
+Values that are neither on the path to the target array or to a captured value nor captured
+themselves are decoded and discarded, so they should be small.
+"""
+
+import json
+
+EVENTS_PATH = ("data", "reportData", "report", "events", "data")
+FIGHTS_PATH = ("data", "reportData", "report", "fights")
+NEXT_PAGE_PATH = ("data", "reportData", "report", "events", "nextPageTimestamp")
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class _Reader:
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop consumed input so the buffer stays bounded
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ("" at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, c: str):
+        if self.peek() != c:
+            raise ValueError(f"expected {c!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode one complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut off at the end of the buffer (e.g. "2." of "2.5") may continue in
+                # the next chunk, so only accept a value once the character after it is seen.
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _walk(reader, path, target, captures, captured, prefixes):
+    c = reader.peek()
+    if path == target and c == "[":
+        reader.expect("[")
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        while True:
+            yield reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+            else:
+                reader.expect("]")
+                return
+    elif c == "{" and path in prefixes and path not in captures:
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+            return
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            yield from _walk(reader, path + (key,), target, captures, captured, prefixes)
+            if reader.peek() == ",":
+                reader.pos += 1
+            else:
+                reader.expect("}")
+                return
+    else:
+        value = reader.value()
+        if path in captures:
+            captured[path] = value
+
+
+def stream_json(f, target=EVENTS_PATH, captures=(), captured=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the elements of the array at key path `target` of the JSON document in file `f`.
+
+    Values at any key path in `captures` that are encountered along the way are stored in the
+    `captured` dict, keyed by path. Since the document is read in order, a captured value is only
+    available once the generator has passed it (e.g. after it is exhausted).
+    """
+    if captured is None:
+        captured = {}
+    target = tuple(target)
+    captures = {tuple(p) for p in captures}
+    # objects are only descended into on the way to the target or a captured value
+    prefixes = {p[:i] for p in (target, *captures) for i in range(len(p))}
+    yield from _walk(_Reader(f, chunk_size), (), target, captures, captured, prefixes)
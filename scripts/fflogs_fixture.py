@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Shrink the recorded FFLogs responses in src/__test__/Asset/fflogs_responses down to what the app's
+log import (`queryPlayerEvents` in src/Components/FFLogs/Queries.tsx) actually reads.
+
+A recorded response holds every event of the fight with every field FFLogs sends, pretty-printed.
+The import only looks at the imported player's own events of a few types (EVENT_FIELDS), and only
+at a handful of fields of each, so everything else is dropped:
+- events from other sources, and of types the import ignores (damage, heal, refreshbuff, ...)
+- unused event fields (packetID, hitType, amount, gear, auras, ...)
+- unused fight and playerDetails fields
+The "fight" field of events is kept so that fflogs_client.py's stand-in server can still tell
+fights apart, and the "duration" of begincasts is kept for fflogs2track.py. The result is written
+as compact JSON.
+
+Before anything is written, the same extraction the import performs (cast sequence with
+begincast pairing and damage targets, buff applications/removals, combatantinfo stats, combat
+start time) and the casts fflogs2track.py reads of the player (with their cast times) are
+computed for both the original and the shrunk response, and the file is only written if they are
+identical.
+
+The imported player is --player if given, and otherwise the source of the response's
+combatantinfo event. Files are rewritten in place unless --out is given.
+
+    python scripts/fflogs_fixture.py src/__test__/Asset/fflogs_responses/*.json
+"""
+
+import argparse
+from collections import defaultdict
+import json
+import os
+import sys
+
+from fflogs2track import iter_casts
+
+# Fields of each event type read by queryPlayerEvents (and fflogs2track.py, which also reads the
+# duration of begincasts). Events of other types are dropped.
+COMMON_FIELDS = ("timestamp", "type", "fight", "sourceID")
+COMBATANT_STATS = (
+    "strength",
+    "dexterity",
+    "intelligence",
+    "mind",
+    "spellSpeed",
+    "skillSpeed",
+    "criticalHit",
+    "directHit",
+    "determination",
+    "piety",
+    "tenacity",
+)
+EVENT_FIELDS = {
+    "begincast": COMMON_FIELDS + ("abilityGameID", "duration"),
+    "cast": COMMON_FIELDS + ("abilityGameID",),
+    "calculateddamage": COMMON_FIELDS + ("targetID", "abilityGameID", "unmitigatedAmount"),
+    "applybuff": COMMON_FIELDS + ("targetID", "abilityGameID"),
+    "removebuff": COMMON_FIELDS + ("targetID", "abilityGameID"),
+    "combatantinfo": COMMON_FIELDS + ("level",) + COMBATANT_STATS,
+}
+FIGHT_FIELDS = ("id", "name", "combatTime", "startTime", "endTime")
+ACTOR_FIELDS = ("name", "id", "type", "server")
+
+# Keep in sync with FILTERED_ACTION_IDS in src/Components/FFLogs/Queries.tsx.
+FILTERED_ACTION_IDS = {7, 8, 33218, 34682}
+
+
+def _pick(obj, fields):
+    return {k: obj[k] for k in fields if k in obj}
+
+
+def default_player(report):
+    for event in report["events"]["data"]:
+        if event["type"] == "combatantinfo":
+            return event["sourceID"]
+    raise ValueError("response has no combatantinfo event; pass --player")
+
+
+def shrink(response, player_id):
+    """Return a copy of `response` with only what the import of `player_id` reads."""
+    report = response["data"]["reportData"]["report"]
+    events = {
+        "data": [
+            _pick(event, EVENT_FIELDS[event["type"]])
+            for event in report["events"]["data"]
+            if event.get("sourceID") == player_id and event["type"] in EVENT_FIELDS
+        ]
+    }
+    if "nextPageTimestamp" in report["events"]:
+        events["nextPageTimestamp"] = report["events"]["nextPageTimestamp"]
+    roles = report["playerDetails"]["data"]["playerDetails"]
+    shrunk = {
+        "events": events,
+        "fights": [_pick(fight, FIGHT_FIELDS) for fight in report["fights"]],
+        "playerDetails": {
+            "data": {
+                "playerDetails": {
+                    role: [_pick(actor, ACTOR_FIELDS) for actor in actors]
+                    for role, actors in roles.items()
+                }
+            }
+        },
+    }
+    return {"data": {"reportData": {"report": shrunk}}}
+
+
+def import_summary(response, player_id):
+    """
+    What queryPlayerEvents extracts from `response` for `player_id`: the imported actor, every
+    cast as (timestamp, abilityGameID, target numbers), buff applications and removals, the last
+    combatantinfo and the combat start time. Also includes the casts of `player_id` that
+    fflogs2track.py reads, as (timestamp, abilityGameID, cast time).
+    """
+    report = response["data"]["reportData"]["report"]
+    actors = [a for role in report["playerDetails"]["data"]["playerDetails"].values() for a in role]
+    actor = next(_pick(a, ACTOR_FIELDS) for a in actors if a["id"] == player_id)
+    casts = []
+    staged_begin = None
+    hardcast_snap_times = {}
+    damage_events = defaultdict(list)
+    seen_targets = []
+    buffs = []
+    combatant = None
+    for entry in report["events"]["data"]:
+        if entry.get("sourceID") != player_id:
+            continue
+        kind = entry["type"]
+        if kind == "cast" and entry["abilityGameID"] not in FILTERED_ACTION_IDS:
+            if staged_begin is not None:
+                if staged_begin["abilityGameID"] == entry["abilityGameID"]:
+                    hardcast_snap_times[staged_begin["timestamp"]] = entry["timestamp"]
+                    entry = staged_begin
+                staged_begin = None
+            casts.append(entry)
+        elif kind == "begincast" and entry["abilityGameID"] not in FILTERED_ACTION_IDS:
+            staged_begin = entry
+        elif kind == "calculateddamage":
+            damage_events[entry["timestamp"]].append(entry)
+            if entry["targetID"] not in seen_targets:
+                seen_targets.append(entry["targetID"])
+        elif kind == "combatantinfo":
+            combatant = {k: entry.get(k) for k in ("level",) + COMBATANT_STATS}
+        elif kind in ("applybuff", "removebuff"):
+            buffs.append((kind, entry["timestamp"], entry["abilityGameID"], entry["targetID"]))
+
+    def targets(cast):
+        ability = cast["abilityGameID"]
+        paired = [d for d in damage_events[cast["timestamp"]] if d["abilityGameID"] == ability]
+        snap_time = hardcast_snap_times.get(cast["timestamp"])
+        if not paired and snap_time is not None:
+            paired = [d for d in damage_events[snap_time] if d["abilityGameID"] == ability]
+        if not paired:
+            return [1]
+        # the target that took the most damage is the primary target
+        primary = paired[0]
+        for dmg in paired[1:]:
+            if dmg["unmitigatedAmount"] > primary["unmitigatedAmount"]:
+                primary = dmg
+        ids = [primary["targetID"]]
+        for dmg in paired:
+            if dmg["targetID"] not in ids:
+                ids.append(dmg["targetID"])
+        return [seen_targets.index(i) + 1 for i in ids]
+
+    fight = report["fights"][0]
+    return {
+        "actor": actor,
+        "casts": [(c["timestamp"], c["abilityGameID"], targets(c)) for c in casts],
+        "buffs": buffs,
+        "combatant": combatant,
+        "combatStartTime": fight["endTime"] - fight["combatTime"],
+        "fflogs2trackCasts": list(iter_casts(report["events"]["data"], {player_id})),
+    }
+
+
+def shrink_file(path, out_path, player_id=None):
+    with open(path, encoding="utf-8") as f:
+        response = json.load(f)
+    if player_id is None:
+        player_id = default_player(response["data"]["reportData"]["report"])
+    shrunk = shrink(response, player_id)
+    expected = import_summary(response, player_id)
+    actual = import_summary(shrunk, player_id)
+    if actual != expected:
+        for key in expected:
+            if actual[key] != expected[key]:
+                print(f"{path}: shrinking changed the imported {key}", file=sys.stderr)
+        return False
+    before = os.path.getsize(path)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(shrunk, f, ensure_ascii=False, separators=(",", ":"))
+        f.write("\n")
+    after = os.path.getsize(out_path)
+    print(
+        f"{path} -> {out_path}: player {player_id}, {len(expected['casts'])} casts, "
+        f"{before} -> {after} bytes"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="fflogs_fixture",
+        description="Shrink recorded FFLogs responses to what the log import reads",
+    )
+    parser.add_argument("paths", nargs="+", help="recorded events responses")
+    parser.add_argument("--player", type=int, help="sourceID of the imported player")
+    parser.add_argument("--out", help="directory to write to (default: rewrite in place)")
+    args = parser.parse_args()
+    ok = True
+    for path in args.paths:
+        out_path = path if args.out is None else os.path.join(args.out, os.path.basename(path))
+        ok = shrink_file(path, out_path, args.player) and ok
+    if not ok:
+        sys.exit(1)
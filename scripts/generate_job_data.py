@@ -3,7 +3,8 @@
 Script to automatically generate a significant amount of boilerplate for a new job.
 This script must be run from repository root.
 
-Requires installing the beautifulsoup and requests libraries (`pip install bs4 requests`).
+Requires installing the beautifulsoup and requests libraries (`pip install bs4 requests`), and
+parses job guides faster if lxml is installed (`pip install lxml`).
 Probably requires at least Python 3.11 (I tested with 3.13).
 
 By default, this script will print out the contents of `src/Game/Data/Jobs/$JOB.ts` and
@@ -14,13 +15,27 @@ Make sure any previously-made changes were saved to version control before runni
 Running this script performs the following actions:
 - Scrapes the job guide's HTML for relevant action names and unlock levels
 - Scrapes the Chinese job guide's HTML for translations of these actions to Chinese
+    - (only the elements holding the tables are parsed, and the tables extracted from a guide are
+      cached by file hash; see job_guide.py)
 - Downloads image assets from XIVAPI to the appropriate sub-folder in `public/assets/`
-- Retrieves action IDs from XIVAPI
+    - (all XIVAPI requests run concurrently through xivapi.py, with rate limiting and retries)
+- Retrieves action IDs from XIVAPI (cached across runs and jobs by xivapi_cache.py)
+    - (a job's actions and statuses are fetched in a few requests and matched by name locally;
+      names matching more than one row are reported)
+    - (or looks them up offline in a local mirror of the sheets, see xivapi_mirror.py)
 - Retrieves Japanese translations of skills from XIVAPI
     - (this can eventually be extended to work for buffs/debuffs too but I'm lazy)
 - Read the application delay spreadsheet for application delay values
 - Attempts to parse base potency and falloff amount from tooltips
 
+These run as a pipeline of stages: scrape (job guides and tooltips) -> resolve (XIVAPI data) ->
+assets (icons) -> application-delay (spreadsheet) -> codegen. The output of each stage is memoized
+in `scripts/.job_data_cache/`, keyed by the stage's code, its inputs (config values and hashes of
+the files it reads) and the outputs of the stages it depends on, so a run only re-does the stages
+affected by what changed since the last one. Editing the TypeScript templates only re-runs
+codegen. `--from STAGE` re-runs a stage and all later ones regardless, e.g. `--from resolve` to
+pick up changed XIVAPI data.
+
 Note that Japanese translations are obtained from XIVAPI while Chinese ones are scraped because
 XIVAPI only reports data available in the international client, which contains English, French,
 German, and Japanese data.
@@ -32,17 +47,23 @@ See the "YOUR CHANGES HERE" for further instructions on precise setup.
 """
 import argparse
 from collections import defaultdict
-from collections.abc import MutableMapping
+from collections.abc import Callable, MutableMapping
 import csv
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import functools
+import hashlib
+import inspect
 import json
 import os
 import re
 import textwrap
+import time
 
-from bs4 import BeautifulSoup
-import requests
+import job_guide
+from job_guide import file_sha256
+from xivapi import XIVAPIClient, match_names, pick_candidates
+from xivapi_cache import XIVAPICache
+import xivapi_mirror
 
 
 @dataclass
@@ -151,23 +172,13 @@ DATA_FILE_PATH = f"src/Game/Data/Jobs/{JOB}.ts"
 status_names = {i.en for i in STATUSES}
 
 # Cache all action and status info queries to XIVAPI so we don't have to re-issue them.
+# The cache is a SQLite database shared by all jobs; see xivapi_cache.py for how entries expire
+# and how to evict them. Set XIVAPI_GAME_VERSION to generate data for an older patch.
 # A second level of caching explicitly checks the presence of an image file when we perform query.
-cache_action_csv_path = f"scripts/{JOB}_actions_xivapi_cache.csv"
-cache_status_csv_path = f"scripts/{JOB}_status_xivapi_cache.csv"
-# unstructured map of english action/status name -> list of fields of interest
-cached_xivapi_action_calls = {}
-cached_xivapi_status_calls = {}
-if os.path.exists(cache_action_csv_path):
-    with open(cache_action_csv_path) as f:
-        for row in csv.reader(f):
-            cached_xivapi_action_calls[row[0]] = row[1:]
-if os.path.exists(cache_status_csv_path):
-    with open(cache_status_csv_path) as f:
-        for row in csv.reader(f):
-            cached_xivapi_status_calls[row[0]] = row[1:]
-
-cache_action_csv_writer = csv.writer(open(cache_action_csv_path, "a"))
-cache_status_csv_writer = csv.writer(open(cache_status_csv_path, "a"))
+XIVAPI_GAME_VERSION = ""
+
+# Memoized stage outputs, see run_pipeline
+MEMO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".job_data_cache")
 
 
 @functools.cache
@@ -181,65 +192,13 @@ def proper_case_to_allcaps_name(name: str) -> str:
     )
 
 
-with open(os.path.expanduser(EN_JOB_GUIDE_HTML)) as f:
-    en_soup = BeautifulSoup(f, "html.parser")
-with open(os.path.expanduser(ZH_JOB_GUIDE_HTML)) as f:
-    zh_soup = BeautifulSoup(f, "html.parser")
-
-# === Parsing action declarations ===
-# The EN job guide has a tbody with class "job__tbody", with each action declared in a tr.
-# The name is then found in a child div with class "skill__wrapper", which then contains a
-# <p><strong> with the actual name of the skill.
-# The CN job guide has a div with class "job_tbody", which eventually has a child <p> with
-# class "skill_txt", containing a <strong> with the Chinese name. The zh job guide also has text
+# === Stage: scrape ===
+# See job_guide.py for where the tables are found in the job guides. The zh job guide also has text
 # indicating if a skill is learned from job quest ("通过特职任务获得"), so we need to filter those lines as well.
 zh_learned_by_quest = {"通过职业任务获得", "通过特职任务获得"}
-en_skill_names = [
-    t.contents[0] for t in en_soup.select("div.skill__wrapper > p > strong")
-]
-en_tooltips = [
-    "\n".join(filter(lambda s: isinstance(s, str), t.contents))
-    for t in en_soup.select("tbody.job__tbody > tr > td.content")
-]
-
-level_columns = [
-    t.contents[0].replace("Lv. ", "")
-    for t in en_soup.select("div.jobclass__wrapper > p")
-]
-trait_names_and_levels = list(
-    zip(
-        en_skill_names,
-        level_columns,
-    )
-)[en_skill_names.index(FIRST_TRAIT) : en_skill_names.index(LAST_TRAIT) + 1]
-zh_skill_names = [
-    t.contents[0]
-    for t in zh_soup.select("p.skill_txt > strong")
-    if t.contents[0] not in zh_learned_by_quest
-]
-last_idx = en_skill_names.index(LAST_PVE_ACTION)
-en_skill_names = en_skill_names[: last_idx + 1]
-en_tooltips = en_tooltips[: last_idx + 1]
-zh_skill_names = zh_skill_names[: last_idx + 1]
-for exclude_action in EXCLUDE_ACTIONS:
-    idx = en_skill_names.index(exclude_action)
-    if idx >= 0:
-        del en_skill_names[idx]
-        del en_tooltips[idx]
-        del zh_skill_names[idx]
 
 # Job guide language is very consistent, so we use regexes to parse out basic potency, falloff, and
 # prerequisite buff information.
-skill_count = last_idx + 1
-potencies = [None] * skill_count
-heal_potencies = [None] * skill_count
-falloffs = [None] * skill_count
-required_statuses = [None] * skill_count
-# tooltip includes "This action cannot be assigned to a hotbar"
-hotbar_assignable = [None] * skill_count
-# tooltip includes "X changes to Y when requirement"; X is stored for skill at index Y
-replace_group = [None] * skill_count
-
 base_potency_re = re.compile(r"with a potency of ([\d,]+)\.")
 heal_potency_re = re.compile(r"Cure Potency: ([\d,]+)")
 # works for line and proximity splash cleaves
@@ -257,40 +216,90 @@ requirement_re = re.compile(
 hotbar_assignable_re = re.compile(r"This action cannot be assigned to a hotbar")
 # A skill name is one or more words starting with a capital letter, before lowercase "changes""
 replace_group_re = re.compile(r"(?P<target_skill>([A-Z][a-z': ]+)+) changes to [A-Z]")
-for i, tooltip in enumerate(en_tooltips):
-    base_potency_match = base_potency_re.search(tooltip)
-    aoe_falloff_match = aoe_falloff_re.search(tooltip)
-    aoe_no_falloff_match = aoe_no_falloff_re.search(tooltip)
-    heal_potency_match = heal_potency_re.search(tooltip)
-    requirement_match = requirement_re.search(tooltip)
-    hotbar_assignable_match = hotbar_assignable_re.search(tooltip)
-    replace_group_match = replace_group_re.search(tooltip)
-    if base_potency_match:
-        potencies[i] = base_potency_match.group(1).replace(",", "")
-    elif aoe_falloff_match:
-        potencies[i] = aoe_falloff_match.group(1).replace(",", "")
-        falloffs[i] = "0." + aoe_falloff_match.group(2)
-    elif aoe_no_falloff_match:
-        potencies[i] = aoe_no_falloff_match.group(1).replace(",", "")
-        falloffs[i] = "0"
-    if heal_potency_match:
-        heal_potencies[i] = heal_potency_match.group(1).replace(",", "")
-    if requirement_match:
-        maybe_requirement_name = requirement_match.group(1)
-        if maybe_requirement_name in status_names:
-            required_statuses[i] = maybe_requirement_name
-    if hotbar_assignable_match:
-        hotbar_assignable[i] = False
-    if replace_group_match:
-        replace_group[i] = replace_group_match.group("target_skill")
-
-XIVAPI_BASE = "https://v2.xivapi.com/api/"
-os.makedirs(f"public/assets/Skills/{JOB}", exist_ok=True)
-os.makedirs(f"public/assets/Buffs/{JOB}", exist_ok=True)
-
-skill_api_infos = []
 
 
+def parse_tooltips(en_tooltips: list[str], skill_count: int) -> dict[str, list]:
+    potencies = [None] * skill_count
+    heal_potencies = [None] * skill_count
+    falloffs = [None] * skill_count
+    required_statuses = [None] * skill_count
+    # tooltip includes "This action cannot be assigned to a hotbar"
+    hotbar_assignable = [None] * skill_count
+    # tooltip includes "X changes to Y when requirement"; X is stored for skill at index Y
+    replace_group = [None] * skill_count
+    for i, tooltip in enumerate(en_tooltips):
+        base_potency_match = base_potency_re.search(tooltip)
+        aoe_falloff_match = aoe_falloff_re.search(tooltip)
+        aoe_no_falloff_match = aoe_no_falloff_re.search(tooltip)
+        heal_potency_match = heal_potency_re.search(tooltip)
+        requirement_match = requirement_re.search(tooltip)
+        hotbar_assignable_match = hotbar_assignable_re.search(tooltip)
+        replace_group_match = replace_group_re.search(tooltip)
+        if base_potency_match:
+            potencies[i] = base_potency_match.group(1).replace(",", "")
+        elif aoe_falloff_match:
+            potencies[i] = aoe_falloff_match.group(1).replace(",", "")
+            falloffs[i] = "0." + aoe_falloff_match.group(2)
+        elif aoe_no_falloff_match:
+            potencies[i] = aoe_no_falloff_match.group(1).replace(",", "")
+            falloffs[i] = "0"
+        if heal_potency_match:
+            heal_potencies[i] = heal_potency_match.group(1).replace(",", "")
+        if requirement_match:
+            maybe_requirement_name = requirement_match.group(1)
+            if maybe_requirement_name in status_names:
+                required_statuses[i] = maybe_requirement_name
+        if hotbar_assignable_match:
+            hotbar_assignable[i] = False
+        if replace_group_match:
+            replace_group[i] = replace_group_match.group("target_skill")
+    return {
+        "potencies": potencies,
+        "heal_potencies": heal_potencies,
+        "falloffs": falloffs,
+        "required_statuses": required_statuses,
+        "hotbar_assignable": hotbar_assignable,
+        "replace_group": replace_group,
+    }
+
+
+def scrape() -> dict:
+    """Scrape action names, translations, traits and tooltip data from the job guides."""
+    en_tables = job_guide.load_tables(EN_JOB_GUIDE_HTML, "en")
+    zh_tables = job_guide.load_tables(ZH_JOB_GUIDE_HTML, "zh")
+
+    en_skill_names = en_tables["skill_names"]
+    en_tooltips = en_tables["tooltips"]
+
+    level_columns = [level.replace("Lv. ", "") for level in en_tables["levels"]]
+    trait_names_and_levels = list(
+        zip(
+            en_skill_names,
+            level_columns,
+        )
+    )[en_skill_names.index(FIRST_TRAIT) : en_skill_names.index(LAST_TRAIT) + 1]
+    zh_skill_names = [
+        name for name in zh_tables["skill_names"] if name not in zh_learned_by_quest
+    ]
+    last_idx = en_skill_names.index(LAST_PVE_ACTION)
+    en_skill_names = en_skill_names[: last_idx + 1]
+    en_tooltips = en_tooltips[: last_idx + 1]
+    zh_skill_names = zh_skill_names[: last_idx + 1]
+    for exclude_action in EXCLUDE_ACTIONS:
+        idx = en_skill_names.index(exclude_action)
+        if idx >= 0:
+            del en_skill_names[idx]
+            del en_tooltips[idx]
+            del zh_skill_names[idx]
+    return {
+        "en_skill_names": en_skill_names,
+        "zh_skill_names": zh_skill_names,
+        "trait_names_and_levels": trait_names_and_levels,
+        "tooltips": parse_tooltips(en_tooltips, last_idx + 1),
+    }
+
+
+# === Stage: resolve ===
 @dataclass
 class SkillAPIInfo:
     name: str
@@ -303,78 +312,154 @@ class SkillAPIInfo:
     ja_name: str
 
 
-for name in en_skill_names:
-    if name in cached_xivapi_action_calls:
-        print("using cached xivapi query for " + name)
-        action_id, icon_path, unlock_level, category, cooldown, stacks, ja_name = (
-            cached_xivapi_action_calls[name]
-        )
+# All XIVAPI searches and icon downloads share one pooled session and run on a thread pool.
+# Results are collected in input order, so the generated code does not depend on request timing.
+@functools.cache
+def xivapi_client() -> XIVAPIClient:
+    return XIVAPIClient(version=XIVAPI_GAME_VERSION)
+
+
+@functools.cache
+def local_mirror() -> xivapi_mirror.XIVAPIMirror | None:
+    """
+    The local mirror of the sheets if it was synced with `python scripts/xivapi_mirror.py sync`
+    for XIVAPI_GAME_VERSION. Names are then looked up in it instead of XIVAPI, so only icons that
+    were never downloaded need the network.
+    """
+    if not os.path.exists(xivapi_mirror.DEFAULT_DB):
+        return None
+    mirror = xivapi_mirror.XIVAPIMirror()
+    if mirror.game_version != XIVAPI_GAME_VERSION:
+        print(f"ignoring XIVAPI mirror of game version {mirror.game_version!r}")
+        return None
+    return mirror
+
+
+def resolve_names(sheet: str, names: list[str], query: str, fields: str, extract) -> list:
+    """
+    Return the cached fields of interest of each name in `names`, or `extract(row)` of the row
+    XIVAPI has for it. Names that are not cached are resolved together: every `sheet` row matching
+    `query` is fetched in a few paginated requests and names are matched against them locally.
+    With a local mirror, names are looked up in it instead, and the cache is not used.
+    """
+    mirror = local_mirror()
+    xivapi_cache = XIVAPICache(game_version=XIVAPI_GAME_VERSION)
+    cached = {} if mirror is not None else xivapi_cache.entries(sheet, JOB)
+    missing = []
+    for name in names:
+        if name in cached:
+            print("using cached xivapi query for " + name)
+        elif name not in missing:
+            missing.append(name)
+    if not missing:
+        return [cached[name] for name in names]
+    if mirror is not None:
+        print(f"looking up {len(missing)} {sheet} names in the local XIVAPI mirror")
+        matched, ambiguous = pick_candidates(missing, lambda name: mirror.find(sheet, name, JOB))
     else:
-        print("querying xivapi for " + name)
-        r = requests.get(
-            XIVAPI_BASE + "search?sheets=Action",
-            params={
-                # + means the constraint is mandatory
-                # this helps restrict a bunch of random skill images that aren't actually the pve skill we want
-                # use ~ (LIKE) for name since there may be some casing errors
-                "query": f'+Name~"{name}" +IsPvP=false +ClassJobCategory.{JOB}=true',
-                "fields": "Name,Name@lang(ja),Icon,ClassJobCategory,ActionCategory.Name,ClassJobLevel,Recast100ms,MaxCharges",
-            },
+        print(f"querying xivapi for {len(missing)} {sheet} names")
+        matched, ambiguous = match_names(
+            xivapi_client().search_all(sheet, query, fields), missing
+        )
+    for name, rows in ambiguous.items():
+        candidates = ", ".join(f'{row["row_id"]} "{row["fields"]["Name"]}"' for row in rows)
+        print(f'ambiguous xivapi match for "{name}": {candidates}; using the first')
+    unmatched = [name for name in missing if name not in matched]
+    if unmatched:
+        raise ValueError(
+            f"xivapi returned no {sheet} data for {', '.join(unmatched)}, "
+            "check the names and try again"
         )
-        r.raise_for_status()
-        blob = json.loads(r.text)["results"][0]
-        action_id = blob["row_id"]
-        unlock_level = blob["fields"]["ClassJobLevel"]
-        category = blob["fields"]["ActionCategory"]["fields"]["Name"]
-        icon_path = blob["fields"]["Icon"]["path_hr1"]
-        ja_name = blob["fields"]["Name@lang(ja)"]
-        cooldown = blob["fields"]["Recast100ms"] * 10 // 100
-        stacks = blob["fields"]["MaxCharges"]
-    info = [
-        name,
-        action_id,
-        icon_path,
-        unlock_level,
-        category,
-        cooldown,
-        stacks,
-        ja_name,
+    resolved = {name: extract(matched[name]) for name in missing}
+    if mirror is None:
+        xivapi_cache.put_many(sheet, JOB, resolved)
+    cached.update(resolved)
+    return [cached[name] for name in names]
+
+
+def action_fields(blob: dict) -> list:
+    return [
+        blob["row_id"],
+        blob["fields"]["Icon"]["path_hr1"],
+        blob["fields"]["ClassJobLevel"],
+        blob["fields"]["ActionCategory"]["fields"]["Name"],
+        blob["fields"]["Recast100ms"] * 10 // 100,
+        blob["fields"]["MaxCharges"],
+        blob["fields"]["Name@lang(ja)"],
     ]
-    skill_api_infos.append(SkillAPIInfo(*info))
-    cache_action_csv_writer.writerow(info)
-    local_img_path = f"public/assets/Skills/{JOB}/{name.replace(':', '')}.png"
-    if os.path.exists(local_img_path):
-        print("skipping already-downloaded icon for " + name)
-    else:
-        with open(local_img_path, "wb") as f:
-            print("downloading image for " + name)
-            img_r = requests.get(
-                XIVAPI_BASE + "asset/" + icon_path,
-                params={"format": "png"},
-            )
-            img_r.raise_for_status()
-            f.write(img_r.content)
 
 
-# Used in Data folder
-ACTIONS_DATA_DECL_BLOCK = textwrap.indent(
-    ",\n".join(
-        (
-            proper_case_to_allcaps_name(s.name) + ": {\n"
-            "\tid: " + str(s.action_id) + ",\n"
-            '\tname: "' + s.name + '",\n'
-            "\tlabel: {\n"
-            f'\t\tzh: "{zh_skill_names[i]}",\n'
-            f'\t\tja: "{s.ja_name}",\n'
-            "\t},\n"
-            "}"
-        )
-        for i, s in enumerate(skill_api_infos)
-    ),
-    "\t",
-)
+# TODO update this to use ja translations and other data
+def status_fields(blob: dict) -> list:
+    return [
+        blob["fields"]["Icon"]["id"],
+        blob["fields"]["Icon"]["path_hr1"],
+        blob["fields"]["Name@lang(ja)"],
+    ]
 
 
+def resolve(scraped: dict) -> dict:
+    """Look up the XIVAPI fields of interest of every scraped action and every status."""
+    en_skill_names = scraped["en_skill_names"]
+    actions = resolve_names(
+        "Action",
+        en_skill_names,
+        # this helps restrict a bunch of random skill images that aren't actually the pve skill we want
+        f"+IsPvP=false +ClassJobCategory.{JOB}=true",
+        "Name,Name@lang(ja),Icon,ClassJobCategory,ActionCategory.Name,ClassJobLevel,Recast100ms,MaxCharges",
+        action_fields,
+    )
+    statuses = resolve_names(
+        "Status",
+        [info.en for info in STATUSES],
+        f"+ClassJobCategory.{JOB}=true",
+        "Name,Name@lang(ja),Icon,ClassJobCategory,ClassJobLevel",
+        status_fields,
+    )
+    return {
+        "actions": [[name, *fields] for name, fields in zip(en_skill_names, actions)],
+        "statuses": statuses,
+    }
+
+
+# === Stage: assets ===
+def download_icon(arg: tuple[str, str, str]):
+    name, icon_path, local_img_path = arg
+    if xivapi_client().download_icon(icon_path, local_img_path):
+        print("downloaded image for " + name)
+    else:
+        print("skipping already-downloaded icon for " + name)
+
+
+def assets(resolved: dict) -> list[str]:
+    """Download the icons of every action and status. Returns the local paths of the icons."""
+    os.makedirs(f"public/assets/Skills/{JOB}", exist_ok=True)
+    os.makedirs(f"public/assets/Buffs/{JOB}", exist_ok=True)
+    skill_api_infos = [SkillAPIInfo(*info) for info in resolved["actions"]]
+    skill_icon_downloads = [
+        (s.name, s.icon_path, f"public/assets/Skills/{JOB}/{s.name.replace(':', '')}.png")
+        for s in skill_api_infos
+    ]
+    xivapi_client().map(download_icon, skill_icon_downloads)
+
+    status_icon_downloads = []
+    for info, fields in zip(STATUSES, resolved["statuses"]):
+        name = info.en
+        icon_id = fields[0]
+        # Statuses with stacks have one icon per stack count, with consecutive icon IDs
+        for i in range(info.max_stacks):
+            local_img_path = f"public/assets/Buffs/{JOB}/{name.replace(':', '')}"
+            if i + 1 > 1:
+                local_img_path += str(i + 1)
+            local_img_path += ".png"
+            iconset = icon_id // 1000 * 1000
+            icon_path = f"ui/icon/{iconset}/{icon_id + i}_hr1.tex"
+            status_icon_downloads.append((name, icon_path, local_img_path))
+    xivapi_client().map(download_icon, status_icon_downloads)
+    return [path for _, _, path in skill_icon_downloads + status_icon_downloads]
+
+
+# === Stage: application-delay ===
 def normalize_application_delay_name(s: str) -> str:
     return s.replace("-", "").replace("'", "").replace(" ", "").lower()
 
@@ -402,23 +487,25 @@ class ApplicationDelayDict(MutableMapping):
         return iter(self.data)
 
 
-normalized_application_delay_map = ApplicationDelayDict()
-
-
-with open(APPLICATION_DELAY_CSV_PATH) as f:
-    reader = csv.reader(f)
-    for row in reader:
-        # Multiple jobs will have entries within the same row
-        # Treat any non-numeric value as a possible skill name, and if it's followed by a numer or
-        # "instant" then treat that as its application delay
-        for i in range(len(row) - 1):
-            maybe_skill_name, maybe_delay = row[i], row[i + 1]
-            if maybe_delay == "instant":
-                normalized_application_delay_map[maybe_skill_name] = 0
-            elif maybe_delay.replace(".", "").isdigit():
-                normalized_application_delay_map[maybe_skill_name] = maybe_delay
-
-
+def application_delays() -> dict:
+    """Read the application delay of every skill in the spreadsheet, by normalized name."""
+    normalized_application_delay_map = ApplicationDelayDict()
+    with open(APPLICATION_DELAY_CSV_PATH) as f:
+        reader = csv.reader(f)
+        for row in reader:
+            # Multiple jobs will have entries within the same row
+            # Treat any non-numeric value as a possible skill name, and if it's followed by a
+            # numer or "instant" then treat that as its application delay
+            for i in range(len(row) - 1):
+                maybe_skill_name, maybe_delay = row[i], row[i + 1]
+                if maybe_delay == "instant":
+                    normalized_application_delay_map[maybe_skill_name] = 0
+                elif maybe_delay.replace(".", "").isdigit():
+                    normalized_application_delay_map[maybe_skill_name] = maybe_delay
+    return normalized_application_delay_map.data
+
+
+# === Stage: codegen ===
 shared_cd_mapping = {}
 for src_ability, dst_list in COOLDOWNS.items():
     for dst_ability in dst_list:
@@ -430,16 +517,17 @@ def normalize_cd_label(name: str) -> str:
     return "".join(map(lambda x: x[0].upper() + x[1:], re.split(r"[ \-]", name)))
 
 
-replace_group_mapping = defaultdict(list)
-for maybe_replaces, info in zip(replace_group, skill_api_infos):
-    if maybe_replaces:
-        replace_group_mapping[maybe_replaces].append(info.name)
-
-
-def generate_action_makefn(arg: tuple[int, SkillAPIInfo]):
+def generate_action_makefn(
+    arg: tuple[int, SkillAPIInfo],
+    tooltips: dict[str, list],
+    replace_group_mapping: dict[str, list[str]],
+    normalized_application_delay_map: ApplicationDelayDict,
+):
     i, s = arg
     name = s.name
     allcaps_name = proper_case_to_allcaps_name(name)
+    hotbar_assignable = tooltips["hotbar_assignable"]
+    replace_group = tooltips["replace_group"]
     sb = []
     is_ability = s.category == "Ability"
     # If there's an equivalent status name, then make a resource ability.
@@ -471,15 +559,15 @@ def generate_action_makefn(arg: tuple[int, SkillAPIInfo]):
         sb.append(f"\tcooldown: {s.cooldown},")
     if int(s.max_charges) > 0:
         sb.append(f"\tmaxCharges: {s.max_charges},")
-    if potencies[i] is not None:
-        sb.append(f"\tpotency: {potencies[i]},")
-    if falloffs[i] is not None:
-        sb.append(f"\tfalloff: {falloffs[i]},")
-    if heal_potencies[i] is not None:
-        sb.append(f"\thealingPotency: {heal_potencies[i]},")
+    if tooltips["potencies"][i] is not None:
+        sb.append(f"\tpotency: {tooltips['potencies'][i]},")
+    if tooltips["falloffs"][i] is not None:
+        sb.append(f"\tfalloff: {tooltips['falloffs'][i]},")
+    if tooltips["heal_potencies"][i] is not None:
+        sb.append(f"\thealingPotency: {tooltips['heal_potencies'][i]},")
     confirm_lines = []
-    if required_statuses[i] is not None:
-        allcaps_required_status = proper_case_to_allcaps_name(required_statuses[i])
+    if tooltips["required_statuses"][i] is not None:
+        allcaps_required_status = proper_case_to_allcaps_name(tooltips["required_statuses"][i])
         # Assume that the skill is highlighted when the relevant status is present.
         sb.append(
             f'\thighlightIf: (state) => state.hasResourceAvailable("{allcaps_required_status}"),'
@@ -500,77 +588,6 @@ def generate_action_makefn(arg: tuple[int, SkillAPIInfo]):
     return "\n".join(sb)
 
 
-# Used in GameState file
-ACTIONS_DECL_BLOCK = "\n\n".join(
-    map(generate_action_makefn, enumerate(skill_api_infos))
-)
-
-# Create a cooldown for every ability that doesn't share a CD with another ability.
-COOLDOWNS_DECL_BLOCK = textwrap.indent(
-    "\n".join(
-        f'cd_{proper_case_to_allcaps_name(name)}: {{ name: "cd_{normalize_cd_label(name)}" }},'
-        # Combine ability keys with explicit cooldown keys
-        for name in {
-            **{
-                info.name: None
-                for info in skill_api_infos
-                if info.category == "Ability"
-            },
-            **COOLDOWNS,
-        }
-        if name not in shared_cd_mapping
-    ),
-    "\t",
-)
-
-# TODO update this loop to use ja translations and other data
-for info in STATUSES:
-    name = info.en
-    if name in cached_xivapi_status_calls:
-        print("using cached xivapi query for " + name)
-        icon_id, icon_path, ja_name = cached_xivapi_status_calls[name]
-        icon_id = int(icon_id)
-    else:
-        print("querying xivapi for " + name)
-        r = requests.get(
-            XIVAPI_BASE + "search?sheets=Status",
-            params={
-                # + means the constraint is mandatory
-                # this helps restrict a bunch of random skill images that aren't actually the pve skill we want
-                # use ~ (LIKE) for name since there may be some casing errors
-                "query": f'+Name~"{name}" +ClassJobCategory.{JOB}=true',
-                "fields": "Name,Name@lang(ja),Icon,ClassJobCategory,ClassJobLevel",
-            },
-        )
-        r.raise_for_status()
-        body = json.loads(r.text)
-        if len(body["results"]) == 0:
-            raise ValueError(f"xivapi returned no data for {name}, check the buff name and try again")
-        blob = body["results"][0]
-        icon_id = blob["fields"]["Icon"]["id"]
-        icon_path = blob["fields"]["Icon"]["path_hr1"]
-        ja_name = blob["fields"]["Name@lang(ja)"]
-    cache_status_csv_writer.writerow([name, icon_id, icon_path, ja_name])
-    for i in range(info.max_stacks):
-        local_img_path = f"public/assets/Buffs/{JOB}/{name.replace(':', '')}"
-        if i + 1 > 1:
-            local_img_path += str(i + 1)
-        local_img_path += ".png"
-        iconset = icon_id // 1000 * 1000
-        icon_path = f"ui/icon/{iconset}/{icon_id + i}_hr1.tex"
-        if os.path.exists(local_img_path):
-            print("skipping already-downloaded icon for " + name)
-        else:
-            with open(local_img_path, "wb") as f:
-                print("downloading image for " + name)
-                img_r = requests.get(
-                    XIVAPI_BASE + "asset/" + icon_path,
-                    params={"format": "png"},
-                )
-                img_r.raise_for_status()
-                f.write(img_r.content)
-
-
 def data_decl_from_info(info: Info) -> str:
     fields = {}
     if info.max_stacks > 1:
@@ -586,26 +603,6 @@ def data_decl_from_info(info: Info) -> str:
     )
 
 
-GAUGES_DECL_BLOCK = textwrap.indent("\n".join(map(data_decl_from_info, GAUGES)), "\t")
-STATUSES_DECL_BLOCK = textwrap.indent(
-    "\n".join(map(data_decl_from_info, STATUSES)), "\t"
-)
-TRACKERS_DECL_BLOCK = textwrap.indent(
-    "\n".join(map(data_decl_from_info, TRACKERS)), "\t"
-)
-
-# Traits are scraped from the EN job guide page. We don't care about translations.
-TRAITS_DECL_BLOCK = textwrap.indent(
-    "\n".join(
-        (
-            f'{proper_case_to_allcaps_name(name)}: {{ name: "{name}", level: {level} }},'
-            for name, level in trait_names_and_levels
-        ),
-    ),
-    "\t",
-)
-
-
 # Used in GameState file
 def state_decl_from_info(info: Info) -> str:
     return (
@@ -615,30 +612,104 @@ def state_decl_from_info(info: Info) -> str:
     )
 
 
-resource_decl_lines = []
-resource_decl_lines.append("// Gauge resources")
-resource_decl_lines.extend(map(state_decl_from_info, GAUGES))
-resource_decl_lines.append("\n// Statuses")
-resource_decl_lines.extend(map(state_decl_from_info, STATUSES))
-resource_decl_lines.append("\n// Trackers")
-resource_decl_lines.extend(map(state_decl_from_info, TRACKERS))
+def codegen(scraped: dict, resolved: dict, delays: dict) -> dict[str, str]:
+    """Generate the contents of the data file and the job state file."""
+    skill_api_infos = [SkillAPIInfo(*info) for info in resolved["actions"]]
+    zh_skill_names = scraped["zh_skill_names"]
+    tooltips = scraped["tooltips"]
+    normalized_application_delay_map = ApplicationDelayDict(delays)
+
+    # Used in Data folder
+    ACTIONS_DATA_DECL_BLOCK = textwrap.indent(
+        ",\n".join(
+            (
+                proper_case_to_allcaps_name(s.name) + ": {\n"
+                "\tid: " + str(s.action_id) + ",\n"
+                '\tname: "' + s.name + '",\n'
+                "\tlabel: {\n"
+                f'\t\tzh: "{zh_skill_names[i]}",\n'
+                f'\t\tja: "{s.ja_name}",\n'
+                "\t},\n"
+                "}"
+            )
+            for i, s in enumerate(skill_api_infos)
+        ),
+        "\t",
+    )
+
+    replace_group_mapping = defaultdict(list)
+    for maybe_replaces, info in zip(tooltips["replace_group"], skill_api_infos):
+        if maybe_replaces:
+            replace_group_mapping[maybe_replaces].append(info.name)
 
-RESOURCE_DECL_BLOCK = "\n".join(resource_decl_lines)
+    # Used in GameState file
+    ACTIONS_DECL_BLOCK = "\n\n".join(
+        generate_action_makefn(
+            arg, tooltips, replace_group_mapping, normalized_application_delay_map
+        )
+        for arg in enumerate(skill_api_infos)
+    )
 
-replace_group_lines = []
-for skill, replaced_by_list in replace_group_mapping.items():
-    replace_group_lines.append(f"const {proper_case_to_allcaps_name(skill)}_REPLACEMENTS: ConditionalSkillReplace<{JOB}State>[] = [")
-    for replaced_by in [skill] + replaced_by_list:
-        replace_group_lines.append("\t{")
-        replace_group_lines.append(f'\t\tnewSkill: "{proper_case_to_allcaps_name(replaced_by)}",')
-        replace_group_lines.append("\t\tcondition: (state) => false, // TODO")
-        replace_group_lines.append("\t},")
-    replace_group_lines.append("];")
+    # Create a cooldown for every ability that doesn't share a CD with another ability.
+    COOLDOWNS_DECL_BLOCK = textwrap.indent(
+        "\n".join(
+            f'cd_{proper_case_to_allcaps_name(name)}: {{ name: "cd_{normalize_cd_label(name)}" }},'
+            # Combine ability keys with explicit cooldown keys
+            for name in {
+                **{
+                    info.name: None
+                    for info in skill_api_infos
+                    if info.category == "Ability"
+                },
+                **COOLDOWNS,
+            }
+            if name not in shared_cd_mapping
+        ),
+        "\t",
+    )
 
-REPLACE_GROUP_DECL_BLOCK = "\n".join(replace_group_lines)
+    GAUGES_DECL_BLOCK = textwrap.indent("\n".join(map(data_decl_from_info, GAUGES)), "\t")
+    STATUSES_DECL_BLOCK = textwrap.indent(
+        "\n".join(map(data_decl_from_info, STATUSES)), "\t"
+    )
+    TRACKERS_DECL_BLOCK = textwrap.indent(
+        "\n".join(map(data_decl_from_info, TRACKERS)), "\t"
+    )
 
+    # Traits are scraped from the EN job guide page. We don't care about translations.
+    TRAITS_DECL_BLOCK = textwrap.indent(
+        "\n".join(
+            (
+                f'{proper_case_to_allcaps_name(name)}: {{ name: "{name}", level: {level} }},'
+                for name, level in scraped["trait_names_and_levels"]
+            ),
+        ),
+        "\t",
+    )
 
-STATE_FILE_CONTENT = f"""
+    resource_decl_lines = []
+    resource_decl_lines.append("// Gauge resources")
+    resource_decl_lines.extend(map(state_decl_from_info, GAUGES))
+    resource_decl_lines.append("\n// Statuses")
+    resource_decl_lines.extend(map(state_decl_from_info, STATUSES))
+    resource_decl_lines.append("\n// Trackers")
+    resource_decl_lines.extend(map(state_decl_from_info, TRACKERS))
+
+    RESOURCE_DECL_BLOCK = "\n".join(resource_decl_lines)
+
+    replace_group_lines = []
+    for skill, replaced_by_list in replace_group_mapping.items():
+        replace_group_lines.append(f"const {proper_case_to_allcaps_name(skill)}_REPLACEMENTS: ConditionalSkillReplace<{JOB}State>[] = [")
+        for replaced_by in [skill] + replaced_by_list:
+            replace_group_lines.append("\t{")
+            replace_group_lines.append(f'\t\tnewSkill: "{proper_case_to_allcaps_name(replaced_by)}",')
+            replace_group_lines.append("\t\tcondition: (state) => false, // TODO")
+            replace_group_lines.append("\t},")
+        replace_group_lines.append("];")
+
+    REPLACE_GROUP_DECL_BLOCK = "\n".join(replace_group_lines)
+
+    STATE_FILE_CONTENT = f"""
 // Skill and state declarations for {JOB}.
 
 // AUTO-GENERATED FROM generate_job_data.py, MAY OR MAY NOT COMPILE
@@ -745,8 +816,7 @@ const make{JOB}ResourceAbility = (
 {ACTIONS_DECL_BLOCK}
 """
 
-
-DATA_FILE_CONTENT = f"""
+    DATA_FILE_CONTENT = f"""
 import {{ ensureRecord }} from "../../../utilities";
 import {{ ActionData, CooldownData, ResourceData, TraitData }} from "../types";
 
@@ -801,20 +871,168 @@ export type {JOB}Traits = typeof {JOB}_TRAITS;
 export type {JOB}TraitKey = keyof {JOB}Traits;
 """
 
+    return {"data": DATA_FILE_CONTENT, "state": STATE_FILE_CONTENT}
+
+
+# === Pipeline ===
+@dataclass
+class Stage:
+    name: str
+    run: Callable
+    # names of the earlier stages whose outputs are passed to `run`
+    deps: tuple[str, ...]
+    # config values and file hashes the stage reads, as JSON-serializable values
+    inputs: Callable[[], list]
+    # functions (by source) and constants (by repr) that make up the stage's code version with `run`
+    code: tuple = ()
+    # whether a memoized output can still be used
+    valid: Callable[[object], bool] = lambda output: True
+
+
+STAGES = [
+    Stage(
+        "scrape",
+        scrape,
+        (),
+        lambda: [
+            file_sha256(EN_JOB_GUIDE_HTML),
+            file_sha256(ZH_JOB_GUIDE_HTML),
+            EXCLUDE_ACTIONS,
+            LAST_PVE_ACTION,
+            FIRST_TRAIT,
+            LAST_TRAIT,
+            sorted(status_names),
+        ],
+        (
+            parse_tooltips,
+            job_guide.CACHE_VERSION,
+            zh_learned_by_quest,
+            base_potency_re,
+            heal_potency_re,
+            aoe_falloff_re,
+            aoe_no_falloff_re,
+            requirement_re,
+            hotbar_assignable_re,
+            replace_group_re,
+        ),
+    ),
+    Stage(
+        "resolve",
+        resolve,
+        ("scrape",),
+        lambda: [JOB, XIVAPI_GAME_VERSION, [info.en for info in STATUSES]],
+        (resolve_names, action_fields, status_fields),
+    ),
+    Stage(
+        "assets",
+        assets,
+        ("resolve",),
+        lambda: [JOB, [(info.en, info.max_stacks) for info in STATUSES]],
+        (download_icon,),
+        # icons deleted since the last run are downloaded again
+        valid=lambda paths: all(map(os.path.exists, paths)),
+    ),
+    Stage(
+        "application-delay",
+        application_delays,
+        (),
+        lambda: [file_sha256(APPLICATION_DELAY_CSV_PATH)],
+        (normalize_application_delay_name, ApplicationDelayDict),
+    ),
+    Stage(
+        "codegen",
+        codegen,
+        ("scrape", "resolve", "application-delay"),
+        lambda: [JOB, COOLDOWNS, [asdict(info) for info in GAUGES + STATUSES + TRACKERS]],
+        (
+            SkillAPIInfo,
+            ApplicationDelayDict,
+            proper_case_to_allcaps_name,
+            normalize_cd_label,
+            generate_action_makefn,
+            data_decl_from_info,
+            state_decl_from_info,
+        ),
+    ),
+]
+
+
+def _code_repr(obj) -> str:
+    if inspect.isfunction(obj) or inspect.isclass(obj) or hasattr(obj, "__wrapped__"):
+        return inspect.getsource(inspect.unwrap(obj))
+    if isinstance(obj, (set, frozenset)):
+        return repr(sorted(obj))
+    return repr(obj)
+
+
+def _sha256_json(value) -> str:
+    serialized = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def stage_key(stage: Stage, dep_hashes: list[str]) -> str:
+    """Hash of a stage's code version, its inputs and the outputs of the stages it depends on."""
+    return _sha256_json(
+        [[_code_repr(obj) for obj in (stage.run, *stage.code)], stage.inputs(), dep_hashes]
+    )
+
+
+def run_pipeline(from_stage: str | None = None) -> dict[str, str]:
+    """
+    Run the stages in order and return the output of the last one. A stage whose key (see
+    stage_key) is the same as in its last run reuses that run's output, memoized in MEMO_DIR,
+    unless it is `from_stage` or comes after it.
+    """
+    os.makedirs(MEMO_DIR, exist_ok=True)
+    outputs = {}
+    output_hashes = {}
+    forced = False
+    for stage in STAGES:
+        forced = forced or stage.name == from_stage
+        key = stage_key(stage, [output_hashes[dep] for dep in stage.deps])
+        memo_path = os.path.join(MEMO_DIR, f"{JOB}.{stage.name}.json")
+        memo = None
+        if not forced and os.path.exists(memo_path):
+            with open(memo_path, encoding="utf-8") as f:
+                memo = json.load(f)
+        if memo is not None and memo["key"] == key and stage.valid(memo["output"]):
+            output = memo["output"]
+            print(f"[{stage.name}] reusing memoized output")
+        else:
+            start = time.perf_counter()
+            output = stage.run(*(outputs[dep] for dep in stage.deps))
+            # round-trip through JSON so that a fresh output looks exactly like a memoized one
+            serialized = json.dumps({"key": key, "output": output}, ensure_ascii=False)
+            output = json.loads(serialized)["output"]
+            with open(memo_path + ".part", "w", encoding="utf-8") as f:
+                f.write(serialized)
+            os.replace(memo_path + ".part", memo_path)
+            print(f"[{stage.name}] ran in {time.perf_counter() - start:.2f}s")
+        outputs[stage.name] = output
+        output_hashes[stage.name] = _sha256_json(output)
+    return outputs[STAGES[-1].name]
+
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--write", "-w", action="store_true")
+    ap.add_argument(
+        "--from",
+        dest="from_stage",
+        choices=[stage.name for stage in STAGES],
+        help="re-run this stage and all later ones instead of reusing their memoized outputs",
+    )
     args = ap.parse_args()
+    contents = run_pipeline(args.from_stage)
     if args.write:
         print(f"Writing data file {DATA_FILE_PATH}...")
         with open(DATA_FILE_PATH, "w") as f:
-            f.write(DATA_FILE_CONTENT)
+            f.write(contents["data"])
         print("Writing job state file...")
         with open(STATE_FILE_PATH, "w") as f:
-            f.write(STATE_FILE_CONTENT)
+            f.write(contents["state"])
         print("Done.")
     else:
-        print(DATA_FILE_CONTENT)
+        print(contents["data"])
         print()
-        print(STATE_FILE_CONTENT)
+        print(contents["state"])
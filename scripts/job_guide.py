@@ -0,0 +1,98 @@
+"""
+Extraction of the tables generate_job_data.py reads from saved job guide pages.
+
+A saved job guide is a large page, and only a few of its elements are used (SELECTORS). Rather than
+building a tree of the whole page, the parser is given a SoupStrainer (STRAINERS) that only keeps
+the elements holding those tables and their children, and the lxml parser is used when it is
+installed (`pip install lxml`), falling back to Python's html.parser otherwise.
+
+The extracted tables are cached as JSON in DEFAULT_CACHE_DIR, keyed by the SHA-256 of the page and
+CACHE_VERSION, so a guide is only parsed again when the file (or the extraction) changes. See
+bench_job_guide.py for parse times.
+
+Requires beautifulsoup (`pip install bs4`).
+"""
+
+import hashlib
+import json
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+# bs4 only registers its lxml tree builder if lxml.etree can be imported
+PARSER = "lxml" if builder_registry.lookup("lxml") is not None else "html.parser"
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".job_data_cache", "guides"
+)
+# bump when the extracted tables change, so that cached extractions are not reused
+CACHE_VERSION = 1
+
+
+def _first_string(tag) -> str:
+    return str(tag.contents[0])
+
+
+def _strings(tag) -> str:
+    # tooltips are split into several strings by <br> and other tags
+    return "\n".join(filter(lambda s: isinstance(s, str), tag.contents))
+
+
+# The EN job guide has a tbody with class "job__tbody", with each action declared in a tr.
+# The name is then found in a child div with class "skill__wrapper", which then contains a
+# <p><strong> with the actual name of the skill.
+# The CN job guide has a div with class "job_tbody", which eventually has a child <p> with
+# class "skill_txt", containing a <strong> with the Chinese name.
+# {language: {table: (CSS selector, text of a match)}}
+SELECTORS = {
+    "en": {
+        "skill_names": ("div.skill__wrapper > p > strong", _first_string),
+        "tooltips": ("tbody.job__tbody > tr > td.content", _strings),
+        "levels": ("div.jobclass__wrapper > p", _first_string),
+    },
+    "zh": {
+        "skill_names": ("p.skill_txt > strong", _first_string),
+    },
+}
+# Elements that contain every match of the selectors of a language. Everything outside of them is
+# skipped while parsing.
+STRAINERS = {
+    "en": SoupStrainer(class_=["job__tbody", "skill__wrapper", "jobclass__wrapper"]),
+    "zh": SoupStrainer("p", class_="skill_txt"),
+}
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(os.path.expanduser(path), "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def parse_tables(path: str, lang: str, parser=PARSER, targeted=True) -> dict[str, list[str]]:
+    """
+    Parse a saved job guide and return {table: [text of every match of its selector]}. With
+    `targeted` false, the whole page is parsed (for comparison in bench_job_guide.py).
+    """
+    with open(os.path.expanduser(path), encoding="utf-8") as f:
+        soup = BeautifulSoup(f, parser, parse_only=STRAINERS[lang] if targeted else None)
+    return {
+        table: [text(tag) for tag in soup.select(selector)]
+        for table, (selector, text) in SELECTORS[lang].items()
+    }
+
+
+def load_tables(path: str, lang: str, cache_dir=DEFAULT_CACHE_DIR) -> dict[str, list[str]]:
+    """Like `parse_tables`, but reuses the tables extracted from an identical file."""
+    cache_path = os.path.join(cache_dir, f"{lang}-v{CACHE_VERSION}-{file_sha256(path)}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    tables = parse_tables(path, lang)
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + ".part", "w", encoding="utf-8") as f:
+        json.dump(tables, f, ensure_ascii=False)
+    os.replace(cache_path + ".part", cache_path)
+    return tables
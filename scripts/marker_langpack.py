@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Combine translated variants of a marker preset (e.g. m10s.txt and m10s_zh.txt) into a single
+language pack, and regenerate any single-language file from it.
+
+A language pack holds one timing skeleton (track, time, duration, markerType, color, showText of
+every marker) plus one description table per language:
+
+    {
+        "fileType": "MarkerLanguagePack",
+        "languages": ["en", "zh"],
+        "tracks": [{"track": 0, "markers": [{"time": ..., "duration": ..., ...}, ...]}, ...],
+        "descriptions": {"en": [...], "zh": [...]},
+        "overrides": {"zh": {"12": {"time": 88.42}, "30": {"color": "#ffd535"}, ...}}
+    }
+
+Each description table has one entry per skeleton marker, in track order. An entry is null if
+that language's file has no corresponding marker. When a language's marker differs from the
+skeleton marker it was matched to in any skeleton field (usually a slightly different time, or a
+different color), its own values are kept in that language's "overrides", keyed by the index of
+the skeleton marker, so that unpacking regenerates every file exactly.
+
+Markers are aligned per track by time and duration. The first language is the base: its timings
+and colors go into the skeleton. Translated files are often re-exported with times rounded to
+0.1s, so a marker matches a base marker on the same track with the same duration if their times
+differ by at most --tolerance seconds. Unmatched markers are reported, along with the number of
+overridden fields of each language.
+
+    python scripts/marker_langpack.py pack m10s.pack.json en=public/presets/markers/m10s.txt \
+        zh=public/presets/markers/m10s_zh.txt
+    python scripts/marker_langpack.py unpack m10s.pack.json zh public/presets/markers/m10s_zh.txt
+"""
+
+import argparse
+from collections import Counter
+import json
+import os
+
+from markers import MarkerTracks, load_markers
+
+DEFAULT_TOLERANCE = 0.1
+SKELETON_FIELDS = ("time", "markerType", "duration", "color", "showText")
+
+
+def align_track(base, other, tolerance):
+    """
+    Greedily match two lists of (time, marker) pairs sorted by time, returning a list of
+    (base index, other index) pairs where either index may be None.
+    """
+    pairs = []
+    i = j = 0
+    while i < len(base) and j < len(other):
+        bt, bm = base[i]
+        ot, om = other[j]
+        if abs(bt - ot) <= tolerance and abs(bm["duration"] - om["duration"]) < 1e-6:
+            pairs.append((i, j))
+            i += 1
+            j += 1
+        elif bt <= ot:
+            pairs.append((i, None))
+            i += 1
+        else:
+            pairs.append((None, j))
+            j += 1
+    pairs.extend((k, None) for k in range(i, len(base)))
+    pairs.extend((None, k) for k in range(j, len(other)))
+    return pairs
+
+
+def sorted_track_markers(tracks: MarkerTracks):
+    result = {}
+    for track_id, marker in tracks.iter_markers():
+        result.setdefault(track_id, []).append((marker["time"], marker))
+    for markers in result.values():
+        markers.sort(key=lambda p: p[0])
+    return result
+
+
+def pack(lang_paths: dict[str, str], tolerance=DEFAULT_TOLERANCE):
+    languages = list(lang_paths)
+    base_lang = languages[0]
+    by_lang = {lang: sorted_track_markers(load_markers(path)) for lang, path in lang_paths.items()}
+    track_ids = sorted(set().union(*(t.keys() for t in by_lang.values())))
+    out_tracks = []
+    descriptions = {lang: [] for lang in languages}
+    overrides = {lang: {} for lang in languages}
+    problems = []
+    for track_id in track_ids:
+        # One row per skeleton marker, mapping language -> that language's marker. Every other
+        # language is aligned against the base; markers with no base counterpart get their own row.
+        base = by_lang[base_lang].get(track_id, [])
+        rows = [{base_lang: m} for _, m in base]
+        extra_rows = []
+        for lang in languages[1:]:
+            other = by_lang[lang].get(track_id, [])
+            for bi, oi in align_track(base, other, tolerance):
+                if oi is None:
+                    continue
+                if bi is None:
+                    extra_rows.append({lang: other[oi][1]})
+                else:
+                    rows[bi][lang] = other[oi][1]
+        rows.extend(extra_rows)
+        rows.sort(key=lambda row: next(iter(row.values()))["time"])
+        markers = []
+        for row in rows:
+            ref_lang = next(lang for lang in languages if lang in row)
+            ref = row[ref_lang]
+            missing = [lang for lang in languages if lang not in row]
+            if missing:
+                problems.append(
+                    f"track {track_id} t={ref['time']}: {ref['description']!r} ({ref_lang}) "
+                    f"has no match in {', '.join(missing)}"
+                )
+            # index of this marker in the skeleton (and in every description table)
+            index = str(len(descriptions[base_lang]))
+            for lang, m in row.items():
+                differing = {k: m.get(k) for k in SKELETON_FIELDS if m.get(k) != ref.get(k)}
+                if differing:
+                    overrides[lang][index] = differing
+            markers.append({k: ref[k] for k in SKELETON_FIELDS if k in ref})
+            for lang in languages:
+                descriptions[lang].append(row[lang]["description"] if lang in row else None)
+        out_tracks.append({"track": track_id, "markers": markers})
+    return {
+        "fileType": "MarkerLanguagePack",
+        "languages": languages,
+        "tracks": out_tracks,
+        "descriptions": descriptions,
+        "overrides": {lang: fields for lang, fields in overrides.items() if fields},
+    }, problems
+
+
+def unpack(pack_obj, lang) -> MarkerTracks:
+    assert pack_obj["fileType"] == "MarkerLanguagePack", f"bad fileType {pack_obj['fileType']}"
+    table = pack_obj["descriptions"][lang]
+    overrides = pack_obj.get("overrides", {}).get(lang, {})
+    tracks = MarkerTracks()
+    i = 0
+    for track in pack_obj["tracks"]:
+        tracks.track(track["track"])
+        for marker in track["markers"]:
+            description = table[i]
+            override = overrides.get(str(i), {})
+            i += 1
+            if description is not None:
+                tracks.add_marker(
+                    track["track"], {**marker, **override, "description": description}
+                )
+    return tracks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="marker_langpack",
+        description="Share marker timings across translated marker presets",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="combine LANG=FILE presets into a pack")
+    pack_parser.add_argument("output_pack")
+    pack_parser.add_argument("inputs", nargs="+", metavar="LANG=FILE")
+    pack_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    unpack_parser = subparsers.add_parser("unpack", help="regenerate one language's preset")
+    unpack_parser.add_argument("pack")
+    unpack_parser.add_argument("lang")
+    unpack_parser.add_argument("output_json")
+    args = parser.parse_args()
+    if args.command == "pack":
+        lang_paths = dict(arg.split("=", 1) for arg in args.inputs)
+        pack_obj, problems = pack(lang_paths, args.tolerance)
+        for problem in problems:
+            print("warning:", problem)
+        for lang, lang_overrides in pack_obj["overrides"].items():
+            counts = Counter(field for fields in lang_overrides.values() for field in fields)
+            summary = ", ".join(f"{field}: {n}" for field, n in sorted(counts.items()))
+            print(f"{lang}: {len(lang_overrides)} marker(s) differ from the skeleton ({summary})")
+        with open(args.output_pack, "w") as f:
+            json.dump(pack_obj, f, ensure_ascii=False)
+        in_size = sum(os.path.getsize(p) for p in lang_paths.values())
+        out_size = os.path.getsize(args.output_pack)
+        print(f"wrote {args.output_pack} ({in_size} bytes -> {out_size} bytes)")
+    else:
+        with open(args.pack) as f:
+            unpack(json.load(f), args.lang).dump(args.output_json)
+        print(f"wrote {args.output_json}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Stitch per-phase marker presets into one MarkerTracksCombined file, check presets for
+overlapping or out-of-order markers, and query which markers are active at a given time.
+
+Phases are given as FILE@OFFSET, where OFFSET is in seconds or [H:]MM:SS.mmm form. A
+MarkerTrackSet file (like dmu_en_full.txt) may be given instead, in which case its phases and
+default offsets are used. With --cutoff, markers of a phase that start after the next phase's
+offset are dropped, the same as the app's "Load all phases" button with custom offsets.
+
+    python scripts/marker_stitch.py stitch out.txt dmu_p1.txt@0 dmu_p2.txt@3:28.182 ...
+    python scripts/marker_stitch.py stitch out.txt public/presets/markers/dmu_en_full.txt --cutoff
+    python scripts/marker_stitch.py check public/presets/markers/m10s.txt
+    python scripts/marker_stitch.py query public/presets/markers/m10s.txt 2:05.5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from markers import MarkerTracks, load_markers, parse_time
+
+
+def expand_phases(inputs):
+    """Convert FILE@OFFSET and MarkerTrackSet arguments into a list of (path, offset) pairs."""
+    phases = []
+    for arg in inputs:
+        path, sep, offset_str = arg.rpartition("@")
+        if not sep:
+            path, offset_str = arg, ""
+        with open(path) as f:
+            obj = json.load(f)
+        if obj["fileType"] == "MarkerTrackSet":
+            directory = os.path.dirname(path)
+            for phase in obj["phasedTracks"]:
+                phases.append((os.path.join(directory, phase["fileName"]), phase["offset"]))
+        else:
+            phases.append((path, parse_time(offset_str) if offset_str else 0))
+    return phases
+
+
+def describe(tracks: MarkerTracks, track_id: int, i: int) -> str:
+    t = tracks.tracks[track_id]
+    return f"{tracks.strings[t.description_id[i]]!r} @ {t.time[i]:.3f}s (+{t.duration[i]:.3f}s)"
+
+
+def check(tracks: MarkerTracks, label: str) -> int:
+    """Print out-of-order and overlapping markers per track, returning the number of problems."""
+    problems = 0
+    for track_id, index in sorted(tracks.interval_index().items()):
+        for i in index.out_of_order():
+            problems += 1
+            print(f"{label}: track {track_id}: {describe(tracks, track_id, i)} is out of order")
+        for i, j in index.overlaps():
+            problems += 1
+            print(
+                f"{label}: track {track_id}: {describe(tracks, track_id, j)} overlaps "
+                f"{describe(tracks, track_id, i)}"
+            )
+    return problems
+
+
+def stitch(phases, cutoff=False) -> tuple[MarkerTracks, int]:
+    """
+    Concatenate `phases`, returning the stitched tracks and the number of problems found: phase
+    offsets out of order, markers starting after the next phase begins (without `cutoff`), and
+    markers of the stitched tracks that are out of order or overlap, including across phases.
+    """
+    result = MarkerTracks()
+    problems = 0
+    for k, (path, offset) in enumerate(phases):
+        phase = load_markers(path)
+        next_offset = phases[k + 1][1] if k + 1 < len(phases) else None
+        if next_offset is not None and next_offset < offset:
+            problems += 1
+            print(f"{path}: phase offset {offset} is after the next phase's offset {next_offset}")
+        if next_offset is not None and not cutoff:
+            late = [
+                (track_id, m)
+                for track_id, m in phase.iter_markers()
+                if m["time"] + offset > next_offset
+            ]
+            for track_id, m in late:
+                problems += 1
+                print(
+                    f"{path}: track {track_id}: {m['description']!r} @ {m['time'] + offset:.3f}s "
+                    f"starts after the next phase begins at {next_offset:.3f}s"
+                )
+        result.extend(phase, offset, next_offset if cutoff else None)
+    problems += check(result, "stitched")
+    return result, problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="marker_stitch",
+        description="Stitch, check, and query marker presets",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stitch_parser = subparsers.add_parser("stitch", help="concatenate phases with offsets")
+    stitch_parser.add_argument("output_json")
+    stitch_parser.add_argument("phases", nargs="+", metavar="FILE[@OFFSET]")
+    stitch_parser.add_argument(
+        "--cutoff",
+        action="store_true",
+        help="drop markers of a phase that start after the next phase begins",
+    )
+    check_parser = subparsers.add_parser("check", help="report overlapping/out-of-order markers")
+    check_parser.add_argument("files", nargs="+")
+    query_parser = subparsers.add_parser("query", help="list markers active at a time")
+    query_parser.add_argument("file")
+    query_parser.add_argument("time")
+    query_parser.add_argument("--track", type=int, default=None)
+    args = parser.parse_args()
+    if args.command == "stitch":
+        tracks, problems = stitch(expand_phases(args.phases), args.cutoff)
+        tracks.dump(args.output_json)
+        print(f"wrote {args.output_json} ({len(tracks)} markers, {problems} problem(s))")
+    elif args.command == "check":
+        problems = sum(check(load_markers(path), path) for path in args.files)
+        print(f"{problems} problem(s)")
+        sys.exit(1 if problems else 0)
+    else:
+        tracks = load_markers(args.file)
+        t = parse_time(args.time)
+        for track_id, index in sorted(tracks.interval_index().items()):
+            if args.track is not None and track_id != args.track:
+                continue
+            for i in index.active_at(t):
+                print(f"track {track_id}: {describe(tracks, track_id, i)}")
@@ -0,0 +1,428 @@
+"""
+Compact in-memory model for marker track files, shared by csv2track.py, track2csv.py, and the
+other marker tooling.
+
+A MarkerTracksCombined file is represented as a `MarkerTracks` object holding one `MarkerTrack`
+per track. Each track stores its markers as parallel arrays instead of one dict per marker:
+- time, duration: float64 `array`s
+- color_id, description_id: indices into string tables interned across the whole file
+- flags: one byte per marker; the low two bits hold the marker type (see MARKER_TYPES), and
+  SHOW_TEXT_BIT holds showText
+
+Files can also be saved to a binary sidecar format, which loads straight into these arrays with
+`array.frombytes` on slices of a `memoryview` without creating an object per marker. Use
+`load_markers(path, sidecar_dir=...)` to transparently cache parsed JSON files as sidecars;
+a sidecar is only used while the size and mtime of its source file are unchanged.
+
+    python scripts/markers.py pack public/presets/markers
+"""
+
+import argparse
+from array import array
+import bisect
+import glob
+import hashlib
+import json
+import os
+import struct
+import sys
+
+# https://github.com/miyehn/ffxiv-blm-rotation/blob/ac26a23c6f620a9c549ccf814e86b65ca7b210bf/src/Controller/Timeline.ts
+# Older presets omit markerType; the app treats those markers as "Info".
+MARKER_TYPES = ("Info", "Untargetable", "Buff", None)
+MARKER_TYPE_IDS = {t: i for i, t in enumerate(MARKER_TYPES)}
+MARKER_TYPE_MASK = 0b011
+SHOW_TEXT_BIT = 0b100
+
+# https://github.com/miyehn/ffxiv-blm-rotation/blob/ac26a23c6f620a9c549ccf814e86b65ca7b210bf/src/Components/ColorTheme.tsx#L11
+COLOR_MAP = {
+    "red": "#f64141",
+    "orange": "#e89b5f",
+    "yellow": "#ffd535",
+    "green": "#50c53d",
+    "cyan": "#53e5e5",
+    "blue": "#217ff5",
+    "purple": "#9755ef",
+    "pink": "#ee79ee",
+    "grey": "#6f6f6f",
+}
+
+DEFAULT_SIDECAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".marker_cache")
+SIDECAR_EXT = ".mkb"
+SIDECAR_MAGIC = b"XITSMKB1"
+# magic, source size, source mtime (ns), # strings, # tracks, # markers
+SIDECAR_HEADER = struct.Struct("<8sQQIII")
+
+# typecodes of the per-marker columns, in sidecar order
+COLUMN_TYPECODES = {
+    "time": "d",
+    "duration": "d",
+    "color_id": "I",
+    "description_id": "I",
+    "flags": "B",
+}
+
+
+class FileTypeError(ValueError):
+    """Raised when a file (or track) is not of the expected fileType."""
+
+    def __init__(self, file_type, message):
+        super().__init__(message)
+        self.file_type = file_type
+
+
+class MarkerTrack:
+    __slots__ = ("track", *COLUMN_TYPECODES)
+
+    def __init__(self, track: int):
+        self.track = track
+        for column, typecode in COLUMN_TYPECODES.items():
+            setattr(self, column, array(typecode))
+
+    def __len__(self):
+        return len(self.time)
+
+    def marker_type(self, i: int) -> str | None:
+        return MARKER_TYPES[self.flags[i] & MARKER_TYPE_MASK]
+
+    def show_text(self, i: int) -> bool:
+        return bool(self.flags[i] & SHOW_TEXT_BIT)
+
+
+class IntervalIndex:
+    """
+    Markers of one track as [time, time + duration] intervals, sorted by start time.
+
+    `active_at` binary-searches the sorted starts and then walks back only while the running
+    maximum of end times still reaches `t`, so queries cost O(log n + k) when markers on a track
+    rarely nest, which is the case for well-formed presets.
+    """
+
+    __slots__ = ("track", "order", "starts", "ends", "max_ends")
+
+    def __init__(self, track: MarkerTrack):
+        self.track = track
+        # map sorted position -> marker index within the track
+        self.order = array("I", sorted(range(len(track)), key=track.time.__getitem__))
+        self.starts = array("d", (track.time[i] for i in self.order))
+        self.ends = array("d", (track.time[i] + track.duration[i] for i in self.order))
+        self.max_ends = array("d")
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def active_at(self, t: float) -> list[int]:
+        """Return the indices (within the track) of markers active at time t, in time order."""
+        result = []
+        j = bisect.bisect_right(self.starts, t) - 1
+        while j >= 0 and self.max_ends[j] >= t:
+            if self.ends[j] >= t:
+                result.append(self.order[j])
+            j -= 1
+        result.reverse()
+        return result
+
+    def overlaps(self) -> list[tuple[int, int]]:
+        """
+        Return (earlier, later) marker index pairs where the later marker starts strictly before
+        some earlier marker ends.
+        """
+        result = []
+        latest = None
+        for j in range(len(self.starts)):
+            if latest is not None and self.starts[j] < self.ends[latest]:
+                result.append((self.order[latest], self.order[j]))
+            if latest is None or self.ends[j] > self.ends[latest]:
+                latest = j
+        return result
+
+    def out_of_order(self) -> list[int]:
+        """Return the indices of markers that start earlier than the marker listed before them."""
+        times = self.track.time
+        return [i for i in range(1, len(times)) if times[i] < times[i - 1]]
+
+
+class MarkerTracks:
+    """The contents of a MarkerTracksCombined file."""
+
+    __slots__ = ("tracks", "strings", "_string_ids")
+
+    def __init__(self):
+        # map track id to MarkerTrack
+        self.tracks: dict[int, MarkerTrack] = {}
+        # interned color and description strings
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+    def __len__(self):
+        return sum(len(t) for t in self.tracks.values())
+
+    def intern(self, s: str) -> int:
+        i = self._string_ids.get(s)
+        if i is None:
+            i = len(self.strings)
+            self.strings.append(s)
+            self._string_ids[s] = i
+        return i
+
+    def track(self, track_id: int) -> MarkerTrack:
+        t = self.tracks.get(track_id)
+        if t is None:
+            t = MarkerTrack(track_id)
+            self.tracks[track_id] = t
+        return t
+
+    def add(
+        self,
+        track_id: int,
+        time: float,
+        marker_type: str | None,
+        duration: float,
+        description: str,
+        color: str,
+        show_text: bool,
+    ):
+        t = self.track(track_id)
+        t.time.append(time)
+        t.duration.append(duration)
+        t.color_id.append(self.intern(color))
+        t.description_id.append(self.intern(description))
+        t.flags.append(MARKER_TYPE_IDS[marker_type] | (SHOW_TEXT_BIT if show_text else 0))
+
+    def add_marker(self, track_id: int, marker: dict):
+        """Add a marker in its serialized (JSON) form."""
+        self.add(
+            track_id,
+            marker["time"],
+            marker.get("markerType"),
+            marker["duration"],
+            marker["description"],
+            marker["color"],
+            marker.get("showText", False),
+        )
+
+    def marker(self, track: MarkerTrack, i: int) -> dict:
+        """Return the serialized (JSON) form of the ith marker of `track`."""
+        m = {"time": track.time[i]}
+        marker_type = track.marker_type(i)
+        if marker_type is not None:
+            m["markerType"] = marker_type
+        duration = track.duration[i]
+        m["duration"] = duration if duration != 0 else 0
+        m["description"] = self.strings[track.description_id[i]]
+        m["color"] = self.strings[track.color_id[i]]
+        m["showText"] = track.show_text(i)
+        return m
+
+    def interval_index(self) -> dict[int, IntervalIndex]:
+        return {track_id: IntervalIndex(t) for track_id, t in self.tracks.items()}
+
+    def extend(self, other: "MarkerTracks", offset: float = 0, cutoff: float | None = None):
+        """
+        Append every marker of `other` shifted by `offset` seconds, dropping markers that start
+        after `cutoff` (matching how the app loads each phase of a MarkerTrackSet).
+        """
+        for track_id, marker in other.iter_markers():
+            marker["time"] += offset
+            if cutoff is None or marker["time"] <= cutoff:
+                self.add_marker(track_id, marker)
+
+    def iter_markers(self):
+        """Yield a (track id, marker dict) pair for every marker, in track order."""
+        for track_id, t in sorted(self.tracks.items()):
+            for i in range(len(t)):
+                yield track_id, self.marker(t, i)
+
+    @classmethod
+    def from_json(cls, obj: dict) -> "MarkerTracks":
+        if obj.get("fileType") != "MarkerTracksCombined":
+            raise FileTypeError(obj.get("fileType"), f"bad fileType {obj.get('fileType')}")
+        tracks = cls()
+        for track in obj["tracks"]:
+            track_id = int(track["track"])
+            if track.get("fileType") != "MarkerTrackIndividual":
+                raise FileTypeError(
+                    track.get("fileType"),
+                    f"track {track_id} had bad fileType {track.get('fileType')}",
+                )
+            tracks.track(track_id)
+            for marker in track["markers"]:
+                tracks.add_marker(track_id, marker)
+        return tracks
+
+    def to_json(self) -> dict:
+        return {
+            "fileType": "MarkerTracksCombined",
+            "tracks": [
+                {
+                    "fileType": "MarkerTrackIndividual",
+                    "track": track_id,
+                    "markers": [self.marker(t, i) for i in range(len(t))],
+                }
+                for track_id, t in sorted(self.tracks.items())
+            ],
+        }
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+
+    def to_bytes(self, source_size: int = 0, source_mtime_ns: int = 0) -> bytes:
+        """
+        Serialize to the binary sidecar format (all integers little-endian):
+        - header: SIDECAR_HEADER
+        - string table: uint32 end offsets into a UTF-8 blob, then the blob itself
+        - track table: int32 track ids, then uint32 marker counts
+        - marker columns, concatenated across tracks in track order: float64 time,
+          float64 duration, uint32 color id, uint32 description id, uint8 flags
+        """
+        encoded = [s.encode() for s in self.strings]
+        ends = array("I")
+        total = 0
+        for b in encoded:
+            total += len(b)
+            ends.append(total)
+        ordered = [t for _, t in sorted(self.tracks.items())]
+        sections = [
+            ends,
+            b"".join(encoded),
+            array("i", (t.track for t in ordered)),
+            array("I", (len(t) for t in ordered)),
+        ]
+        for column, typecode in COLUMN_TYPECODES.items():
+            joined = array(typecode)
+            for t in ordered:
+                joined.extend(getattr(t, column))
+            sections.append(joined)
+        if sys.byteorder != "little":
+            for s in sections:
+                if isinstance(s, array):
+                    s.byteswap()
+        header = SIDECAR_HEADER.pack(
+            SIDECAR_MAGIC,
+            source_size,
+            source_mtime_ns,
+            len(self.strings),
+            len(ordered),
+            len(self),
+        )
+        return header + b"".join(bytes(s) for s in sections)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MarkerTracks":
+        view = memoryview(data)
+        magic, _, _, n_strings, n_tracks, n_markers = SIDECAR_HEADER.unpack_from(view)
+        if magic != SIDECAR_MAGIC:
+            raise ValueError("not a marker sidecar file")
+        pos = SIDECAR_HEADER.size
+
+        def take(typecode, count):
+            nonlocal pos
+            a = array(typecode)
+            end = pos + a.itemsize * count
+            a.frombytes(view[pos:end])
+            if sys.byteorder != "little":
+                a.byteswap()
+            pos = end
+            return a
+
+        ends = take("I", n_strings)
+        blob_start = pos
+        pos += ends[-1] if n_strings else 0
+        tracks = cls()
+        start = 0
+        for end in ends:
+            tracks.intern(str(view[blob_start + start : blob_start + end], "utf-8"))
+            start = end
+        track_ids = take("i", n_tracks)
+        counts = take("I", n_tracks)
+        columns = {
+            column: take(typecode, n_markers) for column, typecode in COLUMN_TYPECODES.items()
+        }
+        offset = 0
+        for track_id, count in zip(track_ids, counts):
+            t = tracks.track(track_id)
+            for column, values in columns.items():
+                setattr(t, column, values[offset : offset + count])
+            offset += count
+        return tracks
+
+
+def parse_time(time_str: str) -> float:
+    """
+    Parse a time in seconds, or in [H:]MM:SS.mmm form, into seconds. As in fflogs_csv.py, only the
+    leading component is signed: "-1:55.000" is -5 seconds.
+    """
+    head, *rest = time_str.strip().split(":")
+    total = float(head)
+    for tok in rest:
+        total = total * 60 + float(tok)
+    return total
+
+
+def sidecar_path(json_path: str, sidecar_dir: str = DEFAULT_SIDECAR_DIR) -> str:
+    # files with the same name in different directories get different sidecars
+    path_hash = hashlib.sha256(os.path.abspath(json_path).encode()).hexdigest()[:16]
+    return os.path.join(sidecar_dir, f"{os.path.basename(json_path)}.{path_hash}{SIDECAR_EXT}")
+
+
+def write_sidecar(tracks: MarkerTracks, json_path: str, sidecar_dir: str = DEFAULT_SIDECAR_DIR):
+    st = os.stat(json_path)
+    os.makedirs(sidecar_dir, exist_ok=True)
+    with open(sidecar_path(json_path, sidecar_dir), "wb") as f:
+        f.write(tracks.to_bytes(st.st_size, st.st_mtime_ns))
+
+
+def load_markers(path: str, sidecar_dir: str | None = None) -> MarkerTracks:
+    """
+    Load a MarkerTracksCombined JSON file.
+
+    If `sidecar_dir` is specified, a fresh sidecar in that directory is loaded instead of
+    parsing the JSON, and a stale or missing sidecar is (re)written after parsing.
+    """
+    if sidecar_dir is not None:
+        st = os.stat(path)
+        try:
+            with open(sidecar_path(path, sidecar_dir), "rb") as f:
+                data = f.read()
+            _, size, mtime_ns, _, _, _ = SIDECAR_HEADER.unpack_from(data)
+            if (size, mtime_ns) == (st.st_size, st.st_mtime_ns):
+                return MarkerTracks.from_bytes(data)
+        except (OSError, struct.error, ValueError):
+            pass
+    with open(path) as f:
+        tracks = MarkerTracks.from_json(json.load(f))
+    if sidecar_dir is not None:
+        write_sidecar(tracks, path, sidecar_dir)
+    return tracks
+
+
+def load_marker_dir(
+    directory: str, sidecar_dir: str | None = DEFAULT_SIDECAR_DIR
+) -> dict[str, MarkerTracks]:
+    """Load every MarkerTracksCombined file in `directory`, skipping MarkerTrackSet files."""
+    result = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        try:
+            result[path] = load_markers(path, sidecar_dir)
+        except FileTypeError as e:
+            # MarkerTrackSet files only point to other presets
+            if e.file_type != "MarkerTrackSet":
+                raise
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="markers",
+        description="Build binary sidecars for marker track files",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="write sidecars for every preset in a directory")
+    pack_parser.add_argument("directory")
+    pack_parser.add_argument("--sidecar-dir", default=DEFAULT_SIDECAR_DIR)
+    args = parser.parse_args()
+    if args.command == "pack":
+        loaded = load_marker_dir(args.directory, args.sidecar_dir)
+        print(f"wrote sidecars for {len(loaded)} file(s) to {args.sidecar_dir}")
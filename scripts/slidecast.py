@@ -0,0 +1,267 @@
+"""
+Streaming slidecast window statistics for FFLogs cast timeline CSV exports.
+
+A cast is a "Begin Cast" row followed by a "Cast" row of the same source and ability, where the
+ability has a cast time. Its slidecast window is the cast time minus the time elapsed between the
+two rows, i.e. how early the cast's result was sent before the cast bar finished. Rows are matched
+per source (see `match_casts`), so exports of a whole party work as well as single-player ones.
+
+Logs are read lazily in chunks with fflogs_csv.iter_cast_chunks. For every spell, a `SpellStats`
+keeps the number of casts, a running mean and variance (Welford's algorithm, merged between
+chunks with Chan et al.'s pairwise update), the min and max, and a histogram of windows at
+millisecond resolution. Log timestamps have millisecond resolution, so the histogram is an exact
+quantile sketch: it merges by adding counts, and its size is bounded by the spread of the
+windows rather than the number of casts.
+
+Statistics are kept per player. `SlidecastStats` objects from different players and logs merge
+the same way, so a directory of logs can be processed in a process pool and reduced at the end
+with `analyze_logs`, then regrouped by player or job with `group_stats`.
+
+Requires numpy (`pip install numpy`).
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import glob
+import math
+import os
+
+import numpy as np
+
+from fflogs_csv import DEFAULT_CHUNK_ROWS, EVENT_BEGIN_CAST, EVENT_CAST, iter_cast_chunks
+
+QUANTILES = (0.05, 0.5, 0.95)
+CSV_HEADER = (
+    "spellName,castTime,avgSlidecastWindow,numCasts,stdDev,min,p5,p50,p95,max,"
+    "numInterrupted,numCancelled"
+)
+
+
+@dataclass
+class SpellStats:
+    # cast time of the most recently seen cast
+    cast_time: float = 0.0
+    count: int = 0
+    mean: float = 0.0
+    # sum of squared differences from the mean
+    m2: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    # window in ms -> number of casts
+    histogram: Counter = field(default_factory=Counter)
+    # begin casts that never completed (see match_casts)
+    interrupted: int = 0
+    cancelled: int = 0
+
+    def merge(self, other: "SpellStats"):
+        """Combine the casts of `other` into this object. `other` is treated as the later one."""
+        self.interrupted += other.interrupted
+        self.cancelled += other.cancelled
+        if other.count == 0:
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram.update(other.histogram)
+        self.cast_time = other.cast_time
+
+    @classmethod
+    def from_windows(cls, windows_ms: np.ndarray, cast_time: float) -> "SpellStats":
+        windows = windows_ms / 1000
+        mean = float(windows.mean())
+        values, counts = np.unique(windows_ms, return_counts=True)
+        return cls(
+            cast_time=cast_time,
+            count=len(windows),
+            mean=mean,
+            m2=float(((windows - mean) ** 2).sum()),
+            min=float(windows.min()),
+            max=float(windows.max()),
+            histogram=Counter(dict(zip(values.tolist(), counts.tolist()))),
+        )
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> float:
+        """The nearest-rank q-quantile of the windows, in seconds."""
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for window_ms in sorted(self.histogram):
+            seen += self.histogram[window_ms]
+            if seen >= rank:
+                return window_ms / 1000
+        return math.nan
+
+
+@dataclass
+class SlidecastStats:
+    # spell name -> stats, in order of each spell's first cast
+    spells: dict[str, SpellStats] = field(default_factory=dict)
+
+    def merge(self, other: "SlidecastStats"):
+        for name, stats in other.spells.items():
+            self.spells.setdefault(name, SpellStats()).merge(stats)
+
+    def add_windows(self, name: str, windows_ms: list[int], cast_time: float):
+        if windows_ms:
+            batch = SpellStats.from_windows(np.asarray(windows_ms, dtype=np.int64), cast_time)
+            self.spells.setdefault(name, SpellStats()).merge(batch)
+
+    def spell(self, name: str) -> SpellStats:
+        return self.spells.setdefault(name, SpellStats())
+
+    def csv_lines(self, group=None):
+        """Yield CSV lines (without a header), prefixed by a `group` column if one is given."""
+        prefix = "" if group is None else f"{group},"
+        for name, s in self.spells.items():
+            if s.count == 0:
+                stats = ",".join(["", str(s.count)] + [""] * (4 + len(QUANTILES)))
+            else:
+                quantiles = ",".join(str(s.quantile(q)) for q in QUANTILES)
+                stats = f"{s.mean},{s.count},{s.stddev},{s.min},{quantiles},{s.max}"
+            yield f"{prefix}{name},{s.cast_time},{stats},{s.interrupted},{s.cancelled}"
+
+
+def source_name(source_target: str) -> str:
+    """The source of a "Source → Target" cell."""
+    return source_target.partition("→")[0].strip()
+
+
+def match_casts(rows):
+    """
+    Pair "Begin Cast" and "Cast" rows from (source, event type, ability, time ms, cast time) tuples.
+
+    Pending begin casts are held in a dict keyed by source, so that the casts of a whole party can
+    be interleaved; a begin cast only completes with a "Cast" row of the same source and ability.
+    Yields one of
+    - ("cast", source, ability, cast time, window ms) for a completed cast
+    - ("interrupted", source, ability, cast time, None) for a begin cast followed by another begin
+      cast of the same source, or not followed by anything before the end of the log
+    - ("cancelled", source, ability, cast time, None) for a begin cast followed by a cast of a
+      different ability (e.g. the cast was cancelled by moving and an instant spell was used)
+    """
+    # source -> (ability, begin time ms, cast time)
+    pending = {}
+    for source, event_type, ability, time_ms, cast_time in rows:
+        if event_type == EVENT_BEGIN_CAST:
+            prev = pending.get(source)
+            if prev is not None:
+                yield "interrupted", source, prev[0], prev[2], None
+            pending[source] = (ability, time_ms, cast_time)
+        elif event_type == EVENT_CAST:
+            prev = pending.pop(source, None)
+            if prev is None:
+                continue
+            if prev[0] != ability:
+                yield "cancelled", source, prev[0], prev[2], None
+            elif not math.isnan(cast_time):
+                yield "cast", source, ability, cast_time, round(cast_time * 1000) - (
+                    time_ms - prev[1]
+                )
+    for source, (ability, _, cast_time) in pending.items():
+        yield "interrupted", source, ability, cast_time, None
+
+
+def _iter_rows(src, chunk_rows):
+    for chunk in iter_cast_chunks(
+        src, columns=("Source → Target",), chunk_rows=chunk_rows, split_plus=True
+    ):
+        sources = [source_name(s) for s in chunk.columns["Source → Target"].tolist()]
+        # timestamps have millisecond resolution; work in integer ms to avoid float noise
+        time_ms = np.round(chunk.time * 1000).astype(np.int64).tolist()
+        yield from zip(
+            sources,
+            chunk.event_type.tolist(),
+            chunk.ability_names().tolist(),
+            time_ms,
+            chunk.cast_duration.tolist(),
+        )
+
+
+def analyze_log(src, chunk_rows=DEFAULT_CHUNK_ROWS) -> dict[str, SlidecastStats]:
+    """
+    Compute slidecast statistics per player for the CSV at `src`, reading it `chunk_rows` rows at
+    a time.
+    """
+    result = {}
+    # (player, spell) -> windows not yet merged into `result`
+    windows = {}
+    for outcome, source, ability, cast_time, window_ms in match_casts(_iter_rows(src, chunk_rows)):
+        stats = result.setdefault(source, SlidecastStats())
+        spell = stats.spell(ability)
+        if outcome == "cast":
+            batch = windows.setdefault((source, ability), [])
+            batch.append(window_ms)
+            spell.cast_time = cast_time
+            if len(batch) == chunk_rows:
+                stats.add_windows(ability, batch, cast_time)
+                batch.clear()
+        elif outcome == "interrupted":
+            spell.interrupted += 1
+        else:
+            spell.cancelled += 1
+    for (source, ability), batch in windows.items():
+        result[source].add_windows(ability, batch, result[source].spells[ability].cast_time)
+    return result
+
+
+def log_paths(inputs) -> list[str]:
+    """Expand directories and glob patterns in `inputs` into a list of CSV paths."""
+    paths = []
+    for arg in inputs:
+        if os.path.isdir(arg):
+            paths.extend(sorted(glob.glob(os.path.join(arg, "*.csv"))))
+        elif glob.has_magic(arg):
+            paths.extend(sorted(glob.glob(arg)))
+        else:
+            paths.append(arg)
+    return paths
+
+
+def merge_players(into: dict[str, SlidecastStats], other: dict[str, SlidecastStats]):
+    for player, stats in other.items():
+        into.setdefault(player, SlidecastStats()).merge(stats)
+
+
+def analyze_logs(paths, jobs=None) -> dict[str, SlidecastStats]:
+    """
+    Analyze every log in `paths` in a process pool and merge the per-player results in input
+    order.
+    """
+    result = {}
+    if len(paths) == 1 or jobs == 1:
+        for path in paths:
+            merge_players(result, analyze_log(path))
+        return result
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for partial in pool.map(analyze_log, paths):
+            merge_players(result, partial)
+    return result
+
+
+def group_stats(per_player: dict[str, SlidecastStats], by="all", player_jobs=None):
+    """
+    Regroup per-player statistics. `by` is "player", "job" (looked up in the `player_jobs` dict,
+    "unknown" if missing), or "all" (a single group named None).
+    """
+    groups = {}
+    for player, stats in per_player.items():
+        if by == "player":
+            key = player
+        elif by == "job":
+            key = (player_jobs or {}).get(player, "unknown")
+        else:
+            key = None
+        groups.setdefault(key, SlidecastStats()).merge(stats)
+    return groups
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite store of slidecast statistics, so that statistics over many logs don't require
+re-reading every log.
+
+Each ingested log is keyed by the SHA-256 of its contents; re-ingesting an unchanged file is a
+no-op, and re-ingesting a modified file replaces what was stored for its path. Only new logs are
+parsed (with slidecast.analyze_log), and their per-player, per-spell aggregates (count, mean, sum
+of squared deviations, min, max, interrupted/cancelled counts, and the millisecond window
+histogram) are stored. Queries read just those aggregates and merge them
+with SpellStats.merge, so the result is the same as running slidecast-window.py over the selected
+logs at once.
+
+A log's date is taken from --date (YYYY-MM-DD) if given, and from the file's mtime otherwise.
+
+    python scripts/slidecast_db.py ingest logs/*.csv
+    python scripts/slidecast_db.py ingest pull.csv --date 2025-01-14
+    python scripts/slidecast_db.py query --spell "Fire IV" --cast-time 2.32 --since 2025-01-01 --group player
+"""
+
+import argparse
+from datetime import date, datetime, timezone
+import hashlib
+import os
+import sqlite3
+import sys
+
+from slidecast import CSV_HEADER, SlidecastStats, SpellStats, analyze_log, group_stats, log_paths
+
+DEFAULT_DB = "slidecast.sqlite"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    log_date TEXT NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_by_date ON logs (log_date);
+CREATE INDEX IF NOT EXISTS logs_by_path ON logs (path);
+CREATE TABLE IF NOT EXISTS spell_stats (
+    log_id INTEGER NOT NULL REFERENCES logs (id) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    spell TEXT NOT NULL,
+    -- order of the spell's first appearance in the log
+    seq INTEGER NOT NULL,
+    cast_time REAL NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    min REAL,
+    max REAL,
+    interrupted INTEGER NOT NULL,
+    cancelled INTEGER NOT NULL,
+    PRIMARY KEY (log_id, player, spell)
+);
+CREATE INDEX IF NOT EXISTS spell_stats_by_spell ON spell_stats (spell, cast_time);
+CREATE TABLE IF NOT EXISTS windows (
+    log_id INTEGER NOT NULL REFERENCES logs (id) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    spell TEXT NOT NULL,
+    window_ms INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (log_id, player, spell, window_ms)
+);
+"""
+
+
+def connect(path=DEFAULT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        raise RuntimeError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}")
+    conn.executescript(SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def ingest(conn, path, log_date=None) -> bool:
+    """
+    Add the log at `path` unless a log with the same contents is present, replacing any log
+    previously ingested from the same path. Returns True if added.
+    """
+    path = os.path.abspath(path)
+    digest = file_sha256(path)
+    if conn.execute("SELECT 1 FROM logs WHERE sha256 = ?", (digest,)).fetchone():
+        return False
+    if log_date is None:
+        log_date = date.fromtimestamp(os.path.getmtime(path)).isoformat()
+    per_player = analyze_log(path)
+    with conn:
+        # the file changed since it was ingested; its old statistics are deleted by cascade
+        conn.execute("DELETE FROM logs WHERE path = ?", (path,))
+        log_id = conn.execute(
+            "INSERT INTO logs (sha256, path, log_date, ingested_at) VALUES (?, ?, ?, ?)",
+            (digest, path, log_date, datetime.now(timezone.utc).isoformat(timespec="seconds")),
+        ).lastrowid
+        for player, stats in per_player.items():
+            for seq, (spell, s) in enumerate(stats.spells.items()):
+                conn.execute(
+                    "INSERT INTO spell_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        log_id,
+                        player,
+                        spell,
+                        seq,
+                        s.cast_time,
+                        s.count,
+                        s.mean,
+                        s.m2,
+                        s.min if s.count else None,
+                        s.max if s.count else None,
+                        s.interrupted,
+                        s.cancelled,
+                    ),
+                )
+                conn.executemany(
+                    "INSERT INTO windows VALUES (?, ?, ?, ?, ?)",
+                    [(log_id, player, spell, w, n) for w, n in s.histogram.items()],
+                )
+    return True
+
+
+def query(conn, spells=(), cast_time=None, since=None, until=None) -> dict[str, SlidecastStats]:
+    """
+    Merge the stored statistics of every log matching the filters, in log date order, returning
+    per-player SlidecastStats. `since` and `until` are inclusive YYYY-MM-DD dates.
+    """
+    where = []
+    params = []
+    if spells:
+        where.append(f"s.spell IN ({','.join('?' * len(spells))})")
+        params.extend(spells)
+    if cast_time is not None:
+        # cast times are exported with two decimals
+        where.append("ABS(s.cast_time - ?) < 0.005")
+        params.append(cast_time)
+    if since is not None:
+        where.append("l.log_date >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("l.log_date <= ?")
+        params.append(until)
+    condition = f"WHERE {' AND '.join(where)}" if where else ""
+    histograms = {}
+    for log_id, player, spell, window_ms, count in conn.execute(
+        f"""SELECT w.log_id, w.player, w.spell, w.window_ms, w.count
+        FROM windows w
+        JOIN spell_stats s USING (log_id, player, spell)
+        JOIN logs l ON l.id = w.log_id
+        {condition}""",
+        params,
+    ):
+        histograms.setdefault((log_id, player, spell), {})[window_ms] = count
+    result = {}
+    for row in conn.execute(
+        f"""SELECT s.log_id, s.player, s.spell, s.cast_time, s.count, s.mean, s.m2, s.min, s.max,
+            s.interrupted, s.cancelled
+        FROM spell_stats s
+        JOIN logs l ON l.id = s.log_id
+        {condition}
+        ORDER BY l.log_date, l.id, s.seq""",
+        params,
+    ):
+        log_id, player, spell, cast_time_, count, mean, m2, min_, max_, interrupted, cancelled = row
+        stats = SpellStats(
+            cast_time=cast_time_,
+            count=count,
+            mean=mean,
+            m2=m2,
+            interrupted=interrupted,
+            cancelled=cancelled,
+        )
+        if count:
+            stats.min, stats.max = min_, max_
+            stats.histogram.update(histograms.get((log_id, player, spell), {}))
+        result.setdefault(player, SlidecastStats()).spell(spell).merge(stats)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="slidecast_db",
+        description="Store and query slidecast statistics across many logs",
+    )
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="add logs to the database")
+    ingest_parser.add_argument("logs", nargs="+", help="cast log .csv files, directories, or globs")
+    ingest_parser.add_argument("--date", default=None, help="date of the logs (YYYY-MM-DD)")
+    query_parser = subparsers.add_parser("query", help="print merged statistics")
+    query_parser.add_argument("--spell", action="append", default=[])
+    query_parser.add_argument("--cast-time", type=float, default=None)
+    query_parser.add_argument("--since", default=None, help="first date (YYYY-MM-DD)")
+    query_parser.add_argument("--until", default=None, help="last date (YYYY-MM-DD)")
+    query_parser.add_argument("--group", choices=("all", "player", "job"), default="all")
+    query_parser.add_argument("--job", action="append", default=[], metavar="PLAYER=JOB")
+    args = parser.parse_args()
+    conn = connect(args.db)
+    if args.command == "ingest":
+        if args.date is not None:
+            date.fromisoformat(args.date)
+        for path in log_paths(args.logs):
+            added = ingest(conn, path, args.date)
+            print(f"{'added' if added else 'skipped (already ingested)'}: {path}")
+    else:
+        per_player = query(conn, args.spell, args.cast_time, args.since, args.until)
+        if not per_player:
+            print("no matching logs", file=sys.stderr)
+        player_jobs = dict(arg.split("=", 1) for arg in args.job)
+        groups = group_stats(per_player, args.group, player_jobs)
+        print(CSV_HEADER if args.group == "all" else f"{args.group},{CSV_HEADER}")
+        for group, stats in groups.items():
+            for line in stats.csv_lines(group):
+                print(line)
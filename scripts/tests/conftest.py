@@ -0,0 +1,7 @@
+# Tests for the scripts in the parent directory, which import each other as top-level modules.
+# Run from the repository root with `python -m pytest scripts/tests`.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
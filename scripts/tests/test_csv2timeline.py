@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from csv2timeline import DEFAULT_CONFIG_FIELDS, build_name_index, convert
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_LOG = os.path.join(SCRIPTS_DIR, "test-logs.csv")
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_name_index()
+
+
+def test_config_has_fields_the_loader_does_not_default(index):
+    record, _ = convert(TEST_LOG, index)
+    config = record["config"]
+    for field, value in DEFAULT_CONFIG_FIELDS.items():
+        assert config[field] == value
+    assert config["job"] == "BLM"
+    assert config["level"] == 100
+
+
+def test_config_overrides_defaults(index):
+    record, _ = convert(TEST_LOG, index, config={"spellSpeed": 1200, "fps": 30})
+    config = record["config"]
+    assert config["spellSpeed"] == 1200
+    assert config["fps"] == 30
+    assert config["randomSeed"] == DEFAULT_CONFIG_FIELDS["randomSeed"]
@@ -0,0 +1,147 @@
+import csv
+import json
+import os
+import random
+import re
+
+import pytest
+
+from csv2track import MANIFEST_NAME, assign_tracks, parse_batch, parse_csv
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_LOG = os.path.join(SCRIPTS_DIR, "test-logs.csv")
+HEADER = [
+    "Track",
+    "Color",
+    "Override Description",
+    "Hide Text",
+    "No Adjust",
+    "Time",
+    "Type",
+    "Ability",
+]
+
+
+def write_csv(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        w.writerows(rows)
+
+
+def test_streaming_output_matches_in_memory_output(tmp_path):
+    rows = [["-1", "", "", "", "", "00:00.000", "Cast", "10 sec"]]
+    with open(TEST_LOG, encoding="utf-8") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            # spread the casts of test-logs.csv over a few tracks, leaving some rows out
+            track = "" if i % 5 == 4 else str(i % 3)
+            color = ["red", "blue", "green"][i % 3]
+            description = "Renamed" if i % 7 == 0 else ""
+            hide = "y" if i % 11 == 0 else ""
+            rows.append(
+                [track, color, description, hide, "", row["Time"], row["Type"], row["Ability"]]
+            )
+    src = tmp_path / "in.csv"
+    write_csv(src, rows)
+    outputs = []
+    for stream in (False, True):
+        dst = tmp_path / f"stream-{stream}.txt"
+        parse_csv(str(src), str(dst), 2.5, stream=stream)
+        outputs.append(dst.read_bytes())
+    assert outputs[0] == outputs[1]
+    tracks = json.loads(outputs[0])["tracks"]
+    assert [t["track"] for t in tracks] == [-1, 0, 1, 2]
+    assert sum(len(t["markers"]) for t in tracks) == sum(row[0] != "" for row in rows)
+
+
+def test_batch_keys_by_relative_path(tmp_path):
+    for fight, time in (("dmu", "00:01.000"), ("fru", "00:02.000")):
+        write_csv(tmp_path / "in" / fight / "p1.csv", [["0", "red", "", "", "", time, "Cast", "A"]])
+    out = tmp_path / "out"
+    parse_batch(str(tmp_path / "in" / "*" / "p1.csv"), str(out), 0)
+    with open(out / MANIFEST_NAME) as f:
+        manifest = json.load(f)
+    assert sorted(manifest) == ["dmu/p1", "fru/p1"]
+    with open(out / "dmu" / "p1.txt") as f:
+        assert json.load(f)["tracks"][0]["markers"][0]["time"] == 1
+    with open(out / "fru" / "p1.txt") as f:
+        assert json.load(f)["tracks"][0]["markers"][0]["time"] == 2
+
+
+def test_batch_records_successes_when_a_file_fails(tmp_path):
+    write_csv(tmp_path / "in" / "good.csv", [["0", "red", "", "", "", "00:01.000", "Cast", "A"]])
+    bad = tmp_path / "in" / "bad.csv"
+    write_csv(bad, [["x", "red", "", "", "", "00:01.000", "Cast", "A"]])
+    out = tmp_path / "out"
+    with pytest.raises(ValueError, match=rf"{re.escape(str(bad))}: bad track 'x' in row 2"):
+        parse_batch(str(tmp_path / "in"), str(out), 0)
+    with open(out / MANIFEST_NAME) as f:
+        assert list(json.load(f)) == ["good"]
+    assert (out / "good.txt").exists()
+
+
+def auto_marker(time, duration=0):
+    return None, {"time": time, "duration": duration}
+
+
+def lanes_overlap(markers):
+    by_lane = {}
+    for track_id, m in markers:
+        by_lane.setdefault(track_id, []).append((m["time"], m["time"] + m["duration"]))
+    for intervals in by_lane.values():
+        intervals.sort()
+        if any(b[0] < a[1] for a, b in zip(intervals, intervals[1:])):
+            return True
+    return False
+
+
+def test_auto_tracks_keep_pinned_and_untargetable_tracks(tmp_path):
+    src = tmp_path / "in.csv"
+    write_csv(
+        src,
+        [
+            ["-1", "", "", "", "", "00:00.000", "Cast", "10 sec"],
+            ["3", "red", "", "", "", "00:01.000", "Begin Cast", "Pinned 2.00 sec"],
+            ["", "blue", "", "", "", "00:01.000", "Begin Cast", "Auto 2.00 sec"],
+            ["", "", "", "", "", "00:01.000", "Cast", "Uncolored"],
+        ],
+    )
+    dst = tmp_path / "out.txt"
+    parse_csv(str(src), str(dst), 0, auto_tracks=True)
+    with open(dst) as f:
+        tracks = {t["track"]: t["markers"] for t in json.load(f)["tracks"]}
+    assert sorted(tracks) == [-1, 3, 4]
+    assert tracks[-1][0]["duration"] == 10
+    assert [m["description"] for m in tracks[3]] == ["Pinned"]
+    assert [m["description"] for m in tracks[4]] == ["Auto"]
+
+
+def test_auto_tracks_split_overlapping_casts():
+    # the second cast starts before the first one's 2.3s (2s + 0.3s adjustment) end
+    markers, n_lanes = assign_tracks([auto_marker(0, 2.3), auto_marker(2.2, 2.3), auto_marker(4.6)])
+    assert n_lanes == 2
+    assert [track_id for track_id, _ in markers] == [0, 1, 0]
+
+
+def test_auto_tracks_use_the_fewest_lanes():
+    rng = random.Random(0)
+    for _ in range(50):
+        markers = [
+            auto_marker(round(rng.uniform(0, 60), 1), rng.choice([0.5, 2.3, 3.0, 8.0]))
+            for _ in range(40)
+        ]
+        assigned, n_lanes = assign_tracks(markers)
+        # the fewest lanes possible is the largest number of markers active at once
+        starts = [m["time"] for _, m in markers]
+        most_active = max(
+            sum(m["time"] <= t < m["time"] + m["duration"] for _, m in markers) for t in starts
+        )
+        assert n_lanes == most_active
+        assert not lanes_overlap(assigned)
+
+
+def test_lane_padding_is_opt_in():
+    markers = [auto_marker(0), auto_marker(0.5), auto_marker(1)]
+    assert assign_tracks(markers)[1] == 1
+    assert assign_tracks(markers, lane_padding=1)[1] == 2
@@ -0,0 +1,68 @@
+import io
+import json
+
+from fflogs2track import MASTER_ABILITIES_PATH, convert
+from fflogs_events import FIGHTS_PATH, stream_json
+from markers import load_markers
+
+RESPONSE = {
+    "data": {
+        "reportData": {
+            "report": {
+                "events": {
+                    "data": [
+                        {
+                            "timestamp": 1500,
+                            "type": "begincast",
+                            "sourceID": 12,
+                            "abilityGameID": 40118,
+                            "duration": 4700,
+                        },
+                        {"timestamp": 6200, "type": "cast", "sourceID": 12, "abilityGameID": 40118},
+                        {"timestamp": 8000, "type": "cast", "sourceID": 12, "abilityGameID": 40129},
+                    ],
+                    "nextPageTimestamp": None,
+                },
+                "fights": [{"id": 1, "startTime": 1000, "endTime": 9000}],
+                "masterData": {
+                    "abilities": [
+                        {"gameID": 40118, "name": "Cyclonic Break"},
+                        {"gameID": 40129, "name": "Sinbound Fire III"},
+                    ]
+                },
+            }
+        }
+    }
+}
+
+
+def test_stream_json_captures_nested_paths():
+    captured = {}
+    f = io.StringIO(json.dumps(RESPONSE))
+    captures = (FIGHTS_PATH, MASTER_ABILITIES_PATH)
+    events = list(stream_json(f, captures=captures, captured=captured, chunk_size=7))
+    assert len(events) == 3
+    assert captured[FIGHTS_PATH][0]["startTime"] == 1000
+    assert [a["name"] for a in captured[MASTER_ABILITIES_PATH]] == [
+        "Cyclonic Break",
+        "Sinbound Fire III",
+    ]
+
+
+def test_descriptions_come_from_master_data(tmp_path):
+    src = tmp_path / "response.json"
+    rules = tmp_path / "rules.json"
+    dst = tmp_path / "out.txt"
+    with open(src, "w") as f:
+        json.dump(RESPONSE, f)
+    with open(rules, "w") as f:
+        json.dump({"default": {"track": 0, "color": "red"}}, f)
+    assert convert(str(src), str(rules), str(dst)) == 2
+    tracks = load_markers(str(dst))
+    track = tracks.tracks[0]
+    assert [tracks.strings[i] for i in track.description_id] == [
+        "Cyclonic Break",
+        "Sinbound Fire III",
+    ]
+    assert list(track.time) == [0.5, 7]
+    assert list(track.duration) == [5, 0]
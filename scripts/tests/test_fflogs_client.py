@@ -0,0 +1,53 @@
+import glob
+import json
+import os
+import threading
+
+import pytest
+
+from fflogs_client import fetch, make_server
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FIXTURE_DIR = os.path.join(REPO_DIR, "src", "__test__", "Asset", "fflogs_responses")
+
+
+@pytest.fixture(scope="module")
+def api_url():
+    # small pages, so that every slice takes a few of them
+    server = make_server(FIXTURE_DIR, page_size=100)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def recorded_events(report_code):
+    with open(os.path.join(FIXTURE_DIR, f"{report_code}.json")) as f:
+        return json.load(f)["data"]["reportData"]["report"]["events"]["data"]
+
+
+def fetched_events(out_dir, report_code):
+    events = []
+    paths = glob.glob(os.path.join(out_dir, report_code, "fight*", "*.json"))
+    for path in sorted(paths, key=lambda path: int(os.path.basename(path)[: -len(".json")])):
+        with open(path) as f:
+            events.extend(json.load(f)["data"]["reportData"]["report"]["events"]["data"])
+    return events
+
+
+@pytest.mark.parametrize(
+    "report_code, count",
+    [("shanzhe_pct_fru_response", 1697), ("shanzhe_pct_m1s_response", 790)],
+)
+@pytest.mark.parametrize("splits", [1, 3])
+def test_fetch_downloads_every_event_once(api_url, tmp_path, report_code, count, splits):
+    pages, events = fetch(report_code, str(tmp_path), api_url, jobs=4, splits=splits)
+    assert events == count
+    assert pages >= count // 100
+    assert fetched_events(str(tmp_path), report_code) == recorded_events(report_code)
+
+
+def test_unknown_report_is_an_error(api_url, tmp_path):
+    with pytest.raises(RuntimeError, match="unknown report"):
+        fetch("ABCDEFGH", str(tmp_path), api_url)
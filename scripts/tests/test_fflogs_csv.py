@@ -0,0 +1,31 @@
+import numpy as np
+
+from fflogs_csv import load_casts, parse_timestamps
+
+
+def test_parse_timestamps():
+    np.testing.assert_allclose(
+        parse_timestamps(["00:00.626", "75:02.100", "1:15:02.100", " 02:03.500 "]),
+        [0.626, 4502.1, 4502.1, 123.5],
+    )
+
+
+def test_parse_negative_timestamps():
+    # minutes are signed, seconds are a positive offset from them
+    np.testing.assert_allclose(
+        parse_timestamps(["-1:55.000", "-1:59.956", "-2:30.000"]), [-5, -0.044, -90]
+    )
+
+
+def test_blank_lines_are_skipped(tmp_path):
+    src = tmp_path / "log.csv"
+    src.write_text(
+        '"Time","Type","Ability"\n'
+        '"00:00.626","Begin Cast","Thunder III 2.44 sec"\n'
+        "\n"
+        '"00:02.544","Cast","Thunder III 2.44 sec"\n'
+        "\n"
+    )
+    table = load_casts(str(src))
+    np.testing.assert_allclose(table.time, [0.626, 2.544])
+    assert table.ability_names().tolist() == ["Thunder III", "Thunder III"]
@@ -0,0 +1,19 @@
+import json
+import os
+
+import pytest
+
+from fflogs_fixture import default_player, import_summary, shrink
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FIXTURE_DIR = os.path.join(REPO_DIR, "src", "__test__", "Asset", "fflogs_responses")
+
+
+@pytest.mark.parametrize("name", ["shanzhe_pct_fru_response.json", "shanzhe_pct_m1s_response.json"])
+def test_fixtures_are_shrunk_and_keep_cast_times(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        response = json.load(f)
+    player_id = default_player(response["data"]["reportData"]["report"])
+    assert shrink(response, player_id) == response
+    casts = import_summary(response, player_id)["fflogs2trackCasts"]
+    assert any(cast_time > 0 for _, _, cast_time in casts)
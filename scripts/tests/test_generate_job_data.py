@@ -0,0 +1,105 @@
+import sys
+
+import pytest
+
+if sys.version_info < (3, 12):
+    pytest.skip("generate_job_data.py requires Python 3.12", allow_module_level=True)
+
+import generate_job_data  # noqa: E402
+from generate_job_data import Stage, run_pipeline  # noqa: E402
+
+
+def double(x):
+    return x * 2
+
+
+def double_v2(x):
+    # same result as double, but different code
+    return x + x
+
+
+class ToyPipeline:
+    """
+    a -> b -> d <- c, where a and c read an input each, and every run of a stage is recorded.
+    """
+
+    def __init__(self, monkeypatch, tmp_path):
+        self.monkeypatch = monkeypatch
+        self.tmp_path = tmp_path
+        self.inputs = {"a": 1, "c": 10}
+        self.code = {name: double for name in "abcd"}
+        self.valid = {name: True for name in "abcd"}
+        self.ran = []
+
+    def stages(self):
+        def stage(name, deps, run):
+            def record(*args):
+                self.ran.append(name)
+                return run(*args)
+
+            return Stage(
+                name,
+                record,
+                deps,
+                lambda: [self.inputs.get(name)],
+                (self.code[name],),
+                valid=lambda output: self.valid[name],
+            )
+
+        return [
+            stage("a", (), lambda: self.code["a"](self.inputs["a"])),
+            stage("b", ("a",), lambda a: self.code["b"](a)),
+            stage("c", (), lambda: self.code["c"](self.inputs["c"])),
+            stage("d", ("b", "c"), lambda b, c: {"sum": self.code["d"](b + c)}),
+        ]
+
+    def run(self, from_stage=None):
+        self.ran = []
+        self.monkeypatch.setattr(generate_job_data, "STAGES", self.stages())
+        self.monkeypatch.setattr(generate_job_data, "MEMO_DIR", str(self.tmp_path))
+        return run_pipeline(from_stage)
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    toy = ToyPipeline(monkeypatch, tmp_path)
+    assert toy.run() == {"sum": 2 * (2 * 2 * 1 + 2 * 10)}
+    assert toy.ran == ["a", "b", "c", "d"]
+    return toy
+
+
+def test_unchanged_run_reuses_every_stage(pipeline):
+    assert pipeline.run() == {"sum": 48}
+    assert pipeline.ran == []
+
+
+def test_changed_input_reruns_the_stage_and_its_dependents(pipeline):
+    pipeline.inputs["a"] = 2
+    assert pipeline.run() == {"sum": 56}
+    assert pipeline.ran == ["a", "b", "d"]
+    pipeline.inputs["c"] = 11
+    assert pipeline.run() == {"sum": 60}
+    assert pipeline.ran == ["c", "d"]
+
+
+def test_changed_code_reruns_the_stage_and_its_dependents(pipeline):
+    pipeline.code["c"] = lambda x: x * 3
+    assert pipeline.run() == {"sum": 68}
+    assert pipeline.ran == ["c", "d"]
+
+
+def test_dependents_reuse_memos_if_the_output_is_unchanged(pipeline):
+    pipeline.code["a"] = double_v2
+    assert pipeline.run() == {"sum": 48}
+    assert pipeline.ran == ["a"]
+
+
+def test_from_reruns_the_stage_and_every_later_one(pipeline):
+    assert pipeline.run("b") == {"sum": 48}
+    assert pipeline.ran == ["b", "c", "d"]
+
+
+def test_invalid_memo_is_rerun(pipeline):
+    pipeline.valid["c"] = False
+    assert pipeline.run() == {"sum": 48}
+    assert pipeline.ran == ["c"]
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+from bs4.builder import builder_registry
+
+import job_guide
+from job_guide import load_tables, parse_tables
+
+PARSERS = [
+    "html.parser",
+    pytest.param(
+        "lxml",
+        marks=pytest.mark.skipif(
+            builder_registry.lookup("lxml") is None, reason="lxml is not installed"
+        ),
+    ),
+]
+
+EN_GUIDE = """<!DOCTYPE html>
+<html>
+<head><title>Scholar</title></head>
+<body>
+<div class="header"><p><strong>Not a skill</strong></p></div>
+<table>
+<tbody class="job__tbody">
+<tr>
+<td class="skill"><div class="skill__wrapper"><p><strong>Ruin</strong></p></div></td>
+<td class="jobclass"><div class="jobclass__wrapper"><p>Lv. 1</p></div></td>
+<td class="content">Deals unaspected damage.<br>Potency: 150</td>
+</tr>
+<tr>
+<td class="skill"><div class="skill__wrapper"><p><strong>Energy Drain</strong></p></div></td>
+<td class="jobclass"><div class="jobclass__wrapper"><p>Lv. 45</p></div></td>
+<td class="content">Deals unaspected damage.<br>Additional Effect: <span>Absorbs</span> MP</td>
+</tr>
+</tbody>
+</table>
+<div class="footer"><p class="skill_txt"><strong>Not a skill either</strong></p></div>
+</body>
+</html>
+"""
+
+ZH_GUIDE = """<!DOCTYPE html>
+<html>
+<body>
+<div class="job_tbody">
+<div><p class="skill_txt"><strong>毁灭</strong></p></div>
+<div><p class="skill_txt"><strong>能量吸收</strong></p></div>
+</div>
+<p class="other"><strong>不是技能</strong></p>
+</body>
+</html>
+"""
+
+
+@pytest.fixture
+def guides(tmp_path):
+    paths = {"en": tmp_path / "en.html", "zh": tmp_path / "zh.html"}
+    paths["en"].write_text(EN_GUIDE, encoding="utf-8")
+    paths["zh"].write_text(ZH_GUIDE, encoding="utf-8")
+    return {lang: str(path) for lang, path in paths.items()}
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_targeted_parse_matches_full_parse(guides, parser):
+    en = parse_tables(guides["en"], "en", parser)
+    assert en == {
+        "skill_names": ["Ruin", "Energy Drain"],
+        "tooltips": [
+            "Deals unaspected damage.\nPotency: 150",
+            "Deals unaspected damage.\nAdditional Effect: \n MP",
+        ],
+        "levels": ["Lv. 1", "Lv. 45"],
+    }
+    assert en == parse_tables(guides["en"], "en", parser, targeted=False)
+    zh = parse_tables(guides["zh"], "zh", parser)
+    assert zh == {"skill_names": ["毁灭", "能量吸收"]}
+    assert zh == parse_tables(guides["zh"], "zh", parser, targeted=False)
+
+
+def test_load_tables_caches_by_content(guides, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    parsed = []
+
+    def parse(path, lang):
+        parsed.append(lang)
+        return parse_tables(path, lang)
+
+    monkeypatch.setattr(job_guide, "parse_tables", parse)
+    tables = load_tables(guides["en"], "en", cache_dir)
+    assert parsed == ["en"]
+    assert load_tables(guides["en"], "en", cache_dir) == tables
+    assert parsed == ["en"]
+    assert len(os.listdir(cache_dir)) == 1
+
+    # an edited page misses the cache
+    with open(guides["en"], "a", encoding="utf-8") as f:
+        f.write("<!-- saved again -->\n")
+    assert load_tables(guides["en"], "en", cache_dir) == tables
+    assert parsed == ["en", "en"]
+    # and so does another language, or another extraction version
+    load_tables(guides["zh"], "zh", cache_dir)
+    monkeypatch.setattr(job_guide, "CACHE_VERSION", job_guide.CACHE_VERSION + 1)
+    load_tables(guides["en"], "en", cache_dir)
+    assert parsed == ["en", "en", "zh", "en"]
+    assert len(os.listdir(cache_dir)) == 4
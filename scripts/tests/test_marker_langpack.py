@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from marker_langpack import pack, unpack
+from markers import load_markers
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PRESET_DIR = os.path.join(REPO_DIR, "public", "presets", "markers")
+
+
+def track_markers(tracks):
+    """{track: markers sorted by time}, leaving out empty tracks."""
+    result = {}
+    for track_id, marker in tracks.iter_markers():
+        result.setdefault(track_id, []).append(marker)
+    return {
+        track_id: sorted(markers, key=lambda m: (m["time"], m["description"]))
+        for track_id, markers in result.items()
+    }
+
+
+# presets with a translation named <name>_zh.txt
+TRANSLATED = sorted(
+    name[: -len("_zh.txt")]
+    for name in os.listdir(PRESET_DIR)
+    if name.endswith("_zh.txt") and os.path.exists(os.path.join(PRESET_DIR, name[:-7] + ".txt"))
+)
+
+
+def test_translated_fields_are_kept():
+    pack_obj, _ = pack(
+        {"en": os.path.join(PRESET_DIR, "m10s.txt"), "zh": os.path.join(PRESET_DIR, "m10s_zh.txt")}
+    )
+    # the translated preset was re-exported with times that differ slightly from the original
+    assert pack_obj["overrides"]["zh"]["0"] == {"time": 88.4}
+
+
+@pytest.mark.parametrize("name", TRANSLATED)
+def test_unpack_regenerates_every_language(name):
+    lang_paths = {
+        "en": os.path.join(PRESET_DIR, name + ".txt"),
+        "zh": os.path.join(PRESET_DIR, name + "_zh.txt"),
+    }
+    pack_obj, _ = pack(lang_paths)
+    # go through JSON, like the pack command does
+    pack_obj = json.loads(json.dumps(pack_obj, ensure_ascii=False))
+    for lang, path in lang_paths.items():
+        assert track_markers(unpack(pack_obj, lang)) == track_markers(load_markers(path))
@@ -0,0 +1,35 @@
+import json
+
+from marker_stitch import check, stitch
+from markers import load_markers
+
+
+def write_phase(path, time, duration):
+    marker = {
+        "time": time,
+        "markerType": "Info",
+        "duration": duration,
+        "description": path.stem,
+        "color": "#f64141",
+        "showText": True,
+    }
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "fileType": "MarkerTracksCombined",
+                "tracks": [{"fileType": "MarkerTrackIndividual", "track": 0, "markers": [marker]}],
+            },
+            f,
+        )
+    return str(path)
+
+
+def test_stitch_reports_overlaps_across_phases(tmp_path):
+    # A's marker lasts from 5 to 15, and B's from 10 + 1 to 10 + 3
+    a = write_phase(tmp_path / "a.txt", 5, 10)
+    b = write_phase(tmp_path / "b.txt", 1, 2)
+    assert check(load_markers(a), a) == 0
+    assert check(load_markers(b), b) == 0
+    tracks, problems = stitch([(a, 0), (b, 10)])
+    assert problems == 1
+    assert check(tracks, "stitched") == 1
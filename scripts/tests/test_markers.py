@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from markers import (
+    FileTypeError,
+    MarkerTracks,
+    load_marker_dir,
+    load_markers,
+    parse_time,
+    sidecar_path,
+)
+
+
+def combined(time):
+    return {
+        "fileType": "MarkerTracksCombined",
+        "tracks": [
+            {
+                "fileType": "MarkerTrackIndividual",
+                "track": 0,
+                "markers": [
+                    {
+                        "time": time,
+                        "markerType": "Info",
+                        "duration": 0,
+                        "description": "Cast",
+                        "color": "#f64141",
+                        "showText": True,
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def write_json(path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(obj, f)
+
+
+def test_sidecars_of_same_named_files_do_not_collide(tmp_path):
+    a = tmp_path / "en" / "p1.txt"
+    b = tmp_path / "zh" / "p1.txt"
+    write_json(a, combined(1))
+    write_json(b, combined(2))
+    sidecar_dir = str(tmp_path / "sidecars")
+    assert sidecar_path(str(a), sidecar_dir) != sidecar_path(str(b), sidecar_dir)
+    for _ in range(2):  # the second round loads the sidecars
+        assert load_markers(str(a), sidecar_dir).tracks[0].time[0] == 1
+        assert load_markers(str(b), sidecar_dir).tracks[0].time[0] == 2
+
+
+def test_load_marker_dir_skips_marker_track_sets(tmp_path):
+    write_json(tmp_path / "p1.txt", combined(1))
+    write_json(tmp_path / "full.txt", {"fileType": "MarkerTrackSet", "phasedTracks": []})
+    loaded = load_marker_dir(str(tmp_path), sidecar_dir=None)
+    assert list(loaded) == [str(tmp_path / "p1.txt")]
+
+
+def test_load_marker_dir_rejects_other_file_types(tmp_path):
+    write_json(tmp_path / "record.txt", {"fileType": "Record"})
+    with pytest.raises(FileTypeError, match="bad fileType Record"):
+        load_marker_dir(str(tmp_path), sidecar_dir=None)
+
+
+def test_from_json_rejects_bad_track_file_type():
+    obj = combined(1)
+    obj["tracks"][0]["fileType"] = "MarkerTracksCombined"
+    with pytest.raises(FileTypeError, match="track 0 had bad fileType"):
+        MarkerTracks.from_json(obj)
+
+
+def test_parse_time():
+    assert parse_time("12.5") == 12.5
+    assert parse_time("2:05.500") == 125.5
+    assert parse_time("1:15:02.100") == pytest.approx(4502.1)
+    assert parse_time("-3.5") == -3.5
+    # only the leading component is signed, like fflogs_csv.parse_timestamps
+    assert parse_time("-1:55.000") == -5
+    assert parse_time("-1:59.956") == pytest.approx(-0.044)
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pytest
+
+from slidecast import SpellStats, analyze_log, analyze_logs
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_LOG = os.path.join(SCRIPTS_DIR, "test-logs.csv")
+
+
+def assert_same_stats(actual, expected):
+    assert actual.keys() == expected.keys()
+    for player in expected:
+        assert list(actual[player].spells) == list(expected[player].spells)
+        for name, e in expected[player].spells.items():
+            a = actual[player].spells[name]
+            assert (a.count, a.min, a.max, a.histogram) == (e.count, e.min, e.max, e.histogram)
+            assert (a.interrupted, a.cancelled, a.cast_time) == (
+                e.interrupted,
+                e.cancelled,
+                e.cast_time,
+            )
+            assert a.mean == pytest.approx(e.mean)
+            assert a.variance == pytest.approx(e.variance)
+
+
+def write_log(path, rows):
+    """Write (time, type, ability, source) rows as an FFLogs cast timeline export."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('"Time","Type","Ability","Source → Target",""\n')
+        for time, event_type, ability, source in rows:
+            f.write(f'"{time}","{event_type}","{ability}","{source} → Boss",""\n')
+
+
+def test_merged_halves_equal_a_single_pass(tmp_path):
+    with open(TEST_LOG, encoding="utf-8") as f:
+        header, *lines = f.readlines()
+    # split before a begin cast, so that no cast spans the two halves
+    split = next(i for i in range(len(lines) // 2, len(lines)) if '"Begin Cast"' in lines[i])
+    paths = [str(tmp_path / "first.csv"), str(tmp_path / "second.csv")]
+    for path, part in zip(paths, (lines[:split], lines[split:])):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines([header, *part])
+
+    single_pass = analyze_log(TEST_LOG)
+    assert_same_stats(analyze_logs(paths, jobs=1), single_pass)
+    # and the same for the chunks of a single log
+    assert_same_stats(analyze_log(TEST_LOG, chunk_rows=7), single_pass)
+
+
+def test_merge_matches_from_windows():
+    rng = np.random.default_rng(0)
+    windows_ms = rng.integers(-200, 800, size=500)
+    merged = SpellStats()
+    for part in np.array_split(windows_ms, [1, 120, 121, 400]):
+        merged.merge(SpellStats.from_windows(part, 2.5))
+    whole = SpellStats.from_windows(windows_ms, 2.5)
+    assert (merged.count, merged.min, merged.max) == (whole.count, whole.min, whole.max)
+    assert merged.histogram == whole.histogram
+    assert merged.mean == pytest.approx(whole.mean)
+    assert merged.variance == pytest.approx(np.var(windows_ms / 1000, ddof=1))
+
+
+def test_quantiles_match_numpy(tmp_path):
+    rng = np.random.default_rng(1)
+    windows_ms = rng.integers(0, 600, size=101)
+    rows = []
+    time_ms = 10_000
+    for window_ms in windows_ms:
+        # a 2.50 s cast whose result was sent `window_ms` before the cast bar finished
+        rows.append((time_ms, "Begin Cast"))
+        rows.append((time_ms + 2500 - window_ms, "Cast"))
+        time_ms += 3000
+    path = str(tmp_path / "log.csv")
+    write_log(
+        path,
+        (
+            (f"{t // 60000:02}:{t % 60000 / 1000:06.3f}", event_type, "Fire IV 2.50 sec", "Player")
+            for t, event_type in rows
+        ),
+    )
+
+    spell = analyze_log(path, chunk_rows=16)["Player"].spells["Fire IV"]
+    assert spell.count == len(windows_ms)
+    for q in (0.05, 0.5, 0.95):
+        # nearest-rank quantiles
+        assert spell.quantile(q) == pytest.approx(
+            np.quantile(windows_ms / 1000, q, method="inverted_cdf")
+        )
+
+
+def test_casts_are_matched_per_source(tmp_path):
+    path = str(tmp_path / "log.csv")
+    write_log(
+        path,
+        [
+            ("00:01.000", "Begin Cast", "Fire IV 2.50 sec", "Alice"),
+            ("00:01.200", "Begin Cast", "Stone 1.50 sec", "Bob"),
+            # interrupts Alice's first Fire IV, but not Bob's Stone
+            ("00:02.000", "Begin Cast", "Fire IV 2.50 sec", "Alice"),
+            ("00:02.500", "Cast", "Stone 1.50 sec", "Bob"),
+            ("00:04.300", "Cast", "Fire IV 2.50 sec", "Alice"),
+            ("00:05.000", "Begin Cast", "Glare 1.50 sec", "Bob"),
+            ("00:05.100", "Begin Cast", "Blizzard 2.50 sec", "Alice"),
+            # cancels Bob's Glare
+            ("00:05.500", "Cast", "Swiftcast", "Bob"),
+            ("00:07.450", "Cast", "Blizzard 2.50 sec", "Alice"),
+            # instant casts have no begin cast
+            ("00:07.900", "Cast", "Transpose", "Alice"),
+            # still casting when the log ends
+            ("00:08.000", "Begin Cast", "Glare 1.50 sec", "Bob"),
+        ],
+    )
+
+    def summary(stats):
+        return {
+            name: (s.count, sorted(s.histogram.elements()), s.interrupted, s.cancelled)
+            for name, s in stats.spells.items()
+            if s.count or s.interrupted or s.cancelled
+        }
+
+    result = analyze_log(path, chunk_rows=3)
+    assert summary(result["Alice"]) == {"Fire IV": (1, [200], 1, 0), "Blizzard": (1, [150], 0, 0)}
+    assert summary(result["Bob"]) == {"Stone": (1, [200], 0, 0), "Glare": (0, [], 1, 1)}
@@ -0,0 +1,62 @@
+import os
+import shutil
+
+import pytest
+
+from slidecast import analyze_log
+from slidecast_db import connect, ingest, query
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_LOG = os.path.join(SCRIPTS_DIR, "test-logs.csv")
+
+
+def counts(per_player):
+    return {
+        (player, name): (s.count, s.histogram)
+        for player, stats in per_player.items()
+        for name, s in stats.spells.items()
+    }
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "slidecast.sqlite"))
+    yield conn
+    conn.close()
+
+
+def test_reingesting_an_unchanged_log_is_a_no_op(conn, tmp_path):
+    path = str(tmp_path / "log.csv")
+    shutil.copy(TEST_LOG, path)
+    assert ingest(conn, path, "2025-01-14")
+    stored = counts(query(conn))
+    assert stored == counts(analyze_log(TEST_LOG))
+    assert not ingest(conn, path, "2025-01-14")
+    # the same contents under another name are the same log
+    copy = str(tmp_path / "copy.csv")
+    shutil.copy(TEST_LOG, copy)
+    assert not ingest(conn, copy)
+    assert counts(query(conn)) == stored
+    assert conn.execute("SELECT COUNT(*) FROM logs").fetchone() == (1,)
+
+
+def test_modified_log_replaces_its_old_contribution(conn, tmp_path):
+    with open(TEST_LOG, encoding="utf-8") as f:
+        header, *lines = f.readlines()
+    path = str(tmp_path / "log.csv")
+    # the log of a pull that was still being exported, then the whole pull
+    split = next(i for i in range(len(lines) // 2, len(lines)) if '"Begin Cast"' in lines[i])
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines([header, *lines[:split]])
+    other = str(tmp_path / "other.csv")
+    with open(other, "w", encoding="utf-8") as f:
+        f.writelines([header, *lines[split:]])
+    assert ingest(conn, path, "2025-01-14")
+    assert ingest(conn, other, "2025-01-15")
+
+    shutil.copy(TEST_LOG, path)
+    assert ingest(conn, path, "2025-01-14")
+    assert conn.execute("SELECT COUNT(*) FROM logs").fetchone() == (2,)
+    # nothing is left over from the partial log
+    assert counts(query(conn, until="2025-01-14")) == counts(analyze_log(TEST_LOG))
+    assert counts(query(conn, since="2025-01-15")) == counts(analyze_log(other))
@@ -0,0 +1,31 @@
+import os
+import sys
+
+SPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dawntrail-sps")
+sys.path.insert(0, SPS_DIR)
+
+import tiers  # noqa: E402
+
+
+def test_generate_reproduces_the_tier_files(tmp_path):
+    tiers.generate(str(tmp_path))
+    for base in tiers.BASE_CAST_TIMES:
+        with open(tiers.tier_path(base, str(tmp_path)), "rb") as f:
+            generated = f.read()
+        with open(tiers.tier_path(base), "rb") as f:
+            assert generated == f.read(), base
+
+
+def test_verify_accepts_the_tier_files():
+    assert tiers.verify() == 0
+
+
+def test_verify_reports_a_changed_cell(tmp_path, capsys):
+    tiers.generate(str(tmp_path))
+    path = tiers.tier_path(2.5, str(tmp_path))
+    rows = tiers.read_table(path)
+    rows[10][5] = "9.99"
+    with open(path, "w") as f:
+        f.write("\n".join(",".join(row) for row in rows))
+    assert tiers.verify(str(tmp_path)) == 1
+    assert f"{path} row 11" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+import csv
+import json
+
+import pytest
+
+from csv2track import parse_csv
+from markers import load_markers
+from track2csv import format_time, parse_track
+
+
+def test_format_time():
+    assert format_time(0) == "00:00.000"
+    assert format_time(75.5) == "01:15.500"
+    assert format_time(4502.1) == "75:02.100"
+    assert format_time(-5) == "-1:55.000"
+    assert format_time(-0.044) == "-1:59.956"
+    assert format_time(-90) == "-2:30.000"
+
+
+def test_round_trip_through_csv2track(tmp_path):
+    times = [-90, -5, -0.044, 0, 12.5, 75.25]
+    markers = [
+        {
+            "time": t,
+            "markerType": "Info",
+            "duration": 8.0 if i % 2 else 2.5,
+            "description": f"Cast {i}",
+            "color": "#f64141",
+            "showText": True,
+        }
+        for i, t in enumerate(times)
+    ]
+    src = tmp_path / "in.txt"
+    with open(src, "w") as f:
+        json.dump(
+            {
+                "fileType": "MarkerTracksCombined",
+                "tracks": [{"fileType": "MarkerTrackIndividual", "track": 0, "markers": markers}],
+            },
+            f,
+        )
+    csv_path = tmp_path / "out.csv"
+    parse_track(str(src), str(csv_path))
+    with open(csv_path, newline="") as f:
+        abilities = [row["Ability"] for row in csv.DictReader(f)]
+    assert abilities == ["2.5 sec", "8 sec"] * 3
+    dst = tmp_path / "round_trip.txt"
+    parse_csv(str(csv_path), str(dst), 0)
+    track = load_markers(str(dst)).tracks[0]
+    assert list(track.time) == pytest.approx(times)
+    assert list(track.duration) == [m["duration"] for m in markers]
@@ -0,0 +1,125 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+
+import pytest
+
+from xivapi import XIVAPIClient, match_names, normalize_name
+
+
+def row(row_id, name):
+    return {"row_id": row_id, "fields": {"Name": name}}
+
+
+ROWS = [
+    row(7, "Energy Drain"),
+    row(3, "Energy Drain"),
+    row(20, "Broil IV"),
+    row(21, "Broil"),
+    row(30, "Fey Illumination"),
+    row(31, "Summon Seraph"),
+    row(32, "Seraph’s Blessing"),
+]
+
+
+def test_normalize_name():
+    assert normalize_name("  Seraph’s   BLESSING ") == "seraph's blessing"
+
+
+def test_exact_match_beats_substring_match():
+    matched, ambiguous = match_names(ROWS, ["Broil", "Illumination"])
+    assert matched["Broil"]["row_id"] == 21
+    assert matched["Illumination"]["row_id"] == 30
+    assert ambiguous == {}
+
+
+def test_case_apostrophes_and_spacing_are_normalized():
+    matched, _ = match_names(ROWS, ["seraph's  blessing", "SUMMON SERAPH"])
+    assert matched["seraph's  blessing"]["row_id"] == 32
+    assert matched["SUMMON SERAPH"]["row_id"] == 31
+
+
+def test_ambiguous_names_resolve_to_the_lowest_row_id():
+    matched, ambiguous = match_names(ROWS, ["Energy Drain", "Seraph"])
+    assert matched["Energy Drain"]["row_id"] == 3
+    assert [r["row_id"] for r in ambiguous["Energy Drain"]] == [3, 7]
+    # substring matches can be ambiguous too
+    assert matched["Seraph"]["row_id"] == 31
+    assert [r["row_id"] for r in ambiguous["Seraph"]] == [31, 32]
+
+
+def test_unmatched_names_are_left_out():
+    matched, ambiguous = match_names(ROWS, ["Broil", "Adloquium"])
+    assert list(matched) == ["Broil"]
+    assert ambiguous == {}
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="generate_job_data.py requires 3.12")
+def test_resolve_names_raises_for_unmatched_names(monkeypatch, tmp_path):
+    import generate_job_data
+    from xivapi_cache import XIVAPICache
+
+    class FakeClient:
+        def search_all(self, sheet, query, fields):
+            return ROWS
+
+    monkeypatch.setattr(generate_job_data, "local_mirror", lambda: None)
+    monkeypatch.setattr(generate_job_data, "xivapi_client", FakeClient)
+    monkeypatch.setattr(
+        generate_job_data,
+        "XIVAPICache",
+        lambda game_version: XIVAPICache(str(tmp_path / "cache.sqlite"), game_version=game_version),
+    )
+
+    def extract(blob):
+        return blob["row_id"]
+
+    assert generate_job_data.resolve_names("Action", ["Broil"], "", "", extract) == [21]
+    with pytest.raises(ValueError, match="no Action data for Adloquium"):
+        generate_job_data.resolve_names("Action", ["Broil", "Adloquium"], "", "", extract)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 429 to the first `failures` requests, then a JSON body."""
+
+    failures = 0
+    requests = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests += 1
+        if cls.requests <= cls.failures:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"results": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_retries_go_through_the_rate_limiter():
+    handler = type("Handler", (FlakyHandler,), {"failures": 2})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = XIVAPIClient(base_url=f"http://127.0.0.1:{server.server_port}/", rate=1000)
+        waits = []
+        wait = client.limiter.wait
+        client.limiter.wait = lambda: (waits.append(1), wait())
+        assert client.search("Action", "", "Name") == []
+        assert handler.requests == 3
+        # the first attempt and both retries
+        assert len(waits) == 3
+    finally:
+        server.shutdown()
+        server.server_close()
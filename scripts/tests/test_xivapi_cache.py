@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+import xivapi_cache
+from xivapi_cache import XIVAPICache
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000_000.0]
+    monkeypatch.setattr(xivapi_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_entries_expire_after_max_age(db_path, clock):
+    cache = XIVAPICache(db_path, max_age=10 * DAY)
+    cache.put_many("Action", "SCH", {"Ruin": [1], "Broil": [2]})
+    clock[0] += 5 * DAY
+    cache.put_many("Action", "SCH", {"Broil": [3]})
+    assert cache.entries("Action", "SCH") == {"Ruin": [1], "Broil": [3]}
+    clock[0] += 6 * DAY
+    assert cache.entries("Action", "SCH") == {"Broil": [3]}
+    assert cache.prune() == 1
+    cache.max_age = None
+    assert cache.entries("Action", "SCH") == {"Broil": [3]}
+
+
+def test_game_versions_are_kept_apart(db_path):
+    latest = XIVAPICache(db_path)
+    latest.put_many("Action", "SCH", {"Ruin": [1]})
+    pinned = XIVAPICache(db_path, game_version="7.1")
+    assert pinned.entries("Action", "SCH") == {}
+    pinned.put_many("Action", "SCH", {"Ruin": [2]})
+    assert pinned.entries("Action", "SCH") == {"Ruin": [2]}
+    # pinning a version does not overwrite the entries of the latest one
+    assert latest.entries("Action", "SCH") == {"Ruin": [1]}
+
+
+def test_entries_are_per_sheet_job_and_language(db_path):
+    cache = XIVAPICache(db_path)
+    cache.put_many("Action", "SCH", {"Energy Drain": [1]})
+    cache.put_many("Action", "SMN", {"Energy Drain": [2]})
+    cache.put_many("Status", "SCH", {"Energy Drain": [3]})
+    cache.put_many("Action", "SCH", {"能量吸收": [1]}, language="zh")
+    assert cache.entries("Action", "SCH") == {"Energy Drain": [1]}
+    assert cache.entries("Action", "SMN") == {"Energy Drain": [2]}
+    assert cache.entries("Status", "SCH") == {"Energy Drain": [3]}
+    assert cache.entries("Action", "SCH", language="zh") == {"能量吸收": [1]}
+
+
+def test_evict_filters(db_path, clock):
+    cache = XIVAPICache(db_path)
+    cache.put_many("Action", "SCH", {"Ruin": [1], "Broil": [2]})
+    cache.put_many("Status", "SCH", {"Galvanize": [3]})
+    cache.put_many("Action", "WHM", {"Stone": [4]})
+    clock[0] += 2 * DAY
+    cache.put_many("Action", "AST", {"Malefic": [5]})
+    XIVAPICache(db_path, game_version="7.1").put_many("Action", "AST", {"Malefic": [6]})
+    assert cache.evict(sheet="Status") == 1
+    assert cache.evict(job="SCH", name="Ruin") == 1
+    assert cache.evict(older_than=DAY) == 2
+    assert cache.evict(game_version="7.1") == 1
+    assert cache.entries("Action", "AST") == {"Malefic": [5]}
+    assert [row[:4] for row in cache.stats()] == [("Action", "AST", "", 1)]
+    assert cache.evict() == 1
+
+
+def test_prune_keeps_other_versions_unless_asked(db_path, clock):
+    XIVAPICache(db_path).put_many("Action", "SCH", {"Ruin": [1]})
+    XIVAPICache(db_path, game_version="7.1").put_many("Action", "SCH", {"Ruin": [2]})
+    cache = XIVAPICache(db_path)
+    assert cache.prune() == 0
+    assert cache.prune(keep_version="7.1") == 1
+    assert XIVAPICache(db_path, game_version="7.1").entries("Action", "SCH") == {"Ruin": [2]}
+    assert cache.entries("Action", "SCH") == {}
+
+
+def test_rejects_other_schema_versions(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"PRAGMA user_version = {xivapi_cache.SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError, match="schema version"):
+        XIVAPICache(db_path)
@@ -0,0 +1,127 @@
+import sys
+
+import pytest
+
+from xivapi_mirror import XIVAPIMirror, sync
+
+
+def icon(icon_id):
+    return {"id": icon_id, "path_hr1": f"ui/icon/{icon_id:06}_hr1.tex"}
+
+
+def action(row_id, name, category, is_pvp=False):
+    return {
+        "row_id": row_id,
+        "fields": {
+            "Name": name,
+            "Name@lang(ja)": f"{name} (ja)",
+            "Icon": icon(row_id),
+            "ClassJobCategory": {"row_id": category},
+            "ActionCategory": {"fields": {"Name": "Ability"}},
+            "ClassJobLevel": 45,
+            "Recast100ms": 10,
+            "MaxCharges": 0,
+            "IsPvP": is_pvp,
+        },
+    }
+
+
+def status(row_id, name, category):
+    return {
+        "row_id": row_id,
+        "fields": {
+            "Name": name,
+            "Name@lang(ja)": f"{name} (ja)",
+            "Icon": icon(row_id),
+            "ClassJobCategory": {"row_id": category},
+        },
+    }
+
+
+SHEETS = {
+    "ClassJobCategory": [
+        {"row_id": 0, "fields": {"SCH": False, "SMN": False}},
+        {"row_id": 1, "fields": {"SCH": True, "SMN": True}},
+        {"row_id": 28, "fields": {"SCH": True, "SMN": False}},
+        {"row_id": 29, "fields": {"SCH": False, "SMN": True}},
+    ],
+    "Action": [
+        action(0, "", 0),
+        action(167, "Energy Drain", 28),
+        action(16508, "Energy Drain", 29),
+        action(29234, "Energy Drain", 28, is_pvp=True),
+        action(7436, "Chain Stratagem", 28),
+        action(7, "Attack", 1),
+    ],
+    "Status": [
+        status(1220, "Excogitation", 28),
+        status(317, "Fey Illumination", 28),
+    ],
+}
+
+
+class FakeClient:
+    version = "7.1"
+
+    def sheet_rows(self, sheet, fields=None):
+        yield from SHEETS[sheet]
+
+    def map(self, fn, items):
+        return [fn(item) for item in items]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    path = str(tmp_path / "mirror.sqlite")
+    counts = sync(FakeClient(), path)
+    assert counts == {"ClassJobCategory": 4, "Action": 6, "Status": 2}
+    mirror = XIVAPIMirror(path)
+    yield mirror
+    mirror.close()
+
+
+def row_ids(results):
+    return [result["row_id"] for result in results]
+
+
+def test_sync_records_the_game_version(mirror):
+    assert mirror.game_version == "7.1"
+
+
+def test_find_filters_by_job_category(mirror):
+    assert row_ids(mirror.find("Action", "Energy Drain", "SCH")) == [167]
+    assert row_ids(mirror.find("Action", "Energy Drain", "SMN")) == [16508]
+    # categories that include several jobs
+    assert row_ids(mirror.find("Action", "Attack", "SMN")) == [7]
+    assert mirror.find("Status", "Excogitation", "SMN") == []
+
+
+def test_find_excludes_pvp_actions_unless_asked(mirror):
+    assert row_ids(mirror.find("Action", "energy drain", "SCH", include_pvp=True)) == [167, 29234]
+
+
+def test_find_falls_back_to_substring_matches(mirror):
+    assert row_ids(mirror.find("Action", "chain strat", "SCH")) == [7436]
+    assert row_ids(mirror.find("Status", "Fey", "SCH")) == [317]
+    assert row_ids(mirror.find("Action", "Energy", "SCH")) == [167]
+    # an exact match hides the rows that merely contain the name
+    assert row_ids(mirror.find("Action", "Attack", "SCH")) == [7]
+    assert mirror.find("Action", "Whispering Dawn", "SCH") == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="generate_job_data.py requires 3.12")
+def test_results_have_the_shape_of_search_results(mirror):
+    from generate_job_data import action_fields, status_fields
+
+    [result] = mirror.find("Action", "Energy Drain", "SCH")
+    assert action_fields(result) == [
+        167,
+        "ui/icon/000167_hr1.tex",
+        45,
+        "Ability",
+        1,
+        0,
+        "Energy Drain (ja)",
+    ]
+    [result] = mirror.find("Status", "Excogitation", "SCH")
+    assert status_fields(result) == [1220, "ui/icon/001220_hr1.tex", "Excogitation (ja)"]
@@ -1,10 +1,16 @@
 # This script is the inverse of csv2track.py: it takes a MarkerTracksCombined file and converts it
 # to a CSV file. This is useful for aiding translation efforts.
 # See csv2track.py for column information.
+#
+# Use --tracks to export only some tracks, and --time-range to export only markers that start in a
+# window (e.g. a single phase of a large file).
 
+import argparse
+import bisect
 import csv
-import json
-import sys
+import heapq
+
+from markers import load_markers, parse_time
 
 COLOR_REVERSE_MAP = {
     "#f64141": "red",
@@ -19,44 +25,85 @@ COLOR_REVERSE_MAP = {
 }
 
 
-def parse_track(input_json_path, output_csv_path):
-    rows = []
-    header = ["Track", "Color", "Override Description", "Hide Text", "No Adjust", "Time", "Type", "Ability"]
-    with open(input_json_path) as f:
-        obj = json.load(f)
-    assert obj["fileType"] == "MarkerTracksCombined"
-    for track in obj["tracks"]:
-        track_num = int(track["track"])
-        assert track["fileType"] == "MarkerTrackIndividual", f"track {track_num} had bad fileType {track['fileType']}"
-        for marker in track["markers"]:
-            t = marker["time"]
-            ms = int(round((t - int(t)) * 1000))
-            s = int(t) % 60
-            m = int(t) // 60
-            rows.append(
-                [
-                    track_num,
-                    COLOR_REVERSE_MAP[marker["color"]],
-                    marker["description"],
-                    "" if marker["showText"] else "y",
-                    "x",  # Always set "No Adjust" for convenience.
-                    f"{m:02d}:{s:02d}.{ms:03d}",
-                    "Cast" if marker["duration"] == 0 else "Begin Cast",
-                    f"{marker['duration']} sec",
-                ]
-            )
-    rows.sort(key=lambda x: x[header.index("Track")])
-    rows.sort(key=lambda x: x[header.index("Time")])
+HEADER = ["Track", "Color", "Override Description", "Hide Text", "No Adjust", "Time", "Type", "Ability"]
+
+
+def format_time(t):
+    # Minutes are floored and seconds are a positive offset from them, as fflogs_csv.py parses
+    # them: -0.044 is written as "-1:59.956".
+    total_ms = int(round(t * 1000))
+    m, rem = divmod(total_ms, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{m:02d}:{s:02d}.{ms:03d}"
+
+
+def iter_track_rows(tracks, track_num, track, start=None, end=None):
+    """Yield (time, track, csv row) tuples for one track in time order, restricted to [start, end]."""
+    times = track.time
+    order = range(len(track))
+    if any(times[i] > times[i + 1] for i in range(len(track) - 1)):
+        order = sorted(order, key=times.__getitem__)
+    sorted_times = [times[i] for i in order]
+    lo = 0 if start is None else bisect.bisect_left(sorted_times, start)
+    hi = len(order) if end is None else bisect.bisect_right(sorted_times, end)
+    for i in order[lo:hi]:
+        t = times[i]
+        duration = track.duration[i]
+        yield t, track_num, [
+            track_num,
+            COLOR_REVERSE_MAP[tracks.strings[track.color_id[i]]],
+            tracks.strings[track.description_id[i]],
+            "" if track.show_text(i) else "y",
+            "x",  # Always set "No Adjust" for convenience.
+            format_time(t),
+            "Cast" if duration == 0 else "Begin Cast",
+            f"{int(duration) if duration.is_integer() else duration} sec",
+        ]
+
+
+def parse_track(input_json_path, output_csv_path, track_filter=None, start=None, end=None):
+    tracks = load_markers(input_json_path, sidecar_dir=None)
+    # Each track is (nearly) time-ordered already, so sort each one individually and k-way merge
+    # them by (time, track) straight into the writer instead of materializing and sorting all rows.
+    merged = heapq.merge(
+        *(
+            iter_track_rows(tracks, track_num, track, start, end)
+            for track_num, track in sorted(tracks.tracks.items())
+            if track_filter is None or track_num in track_filter
+        ),
+        key=lambda row: row[:2],
+    )
     with open(output_csv_path, "w") as outfile:
         w = csv.writer(outfile)
-        w.writerow(header)
-        for r in rows:
+        w.writerow(HEADER)
+        for _, _, r in merged:
             w.writerow(r)
     print("wrote " + output_csv_path)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(f"Usage: {sys.argv[0]} INPUT_JSON OUTPUT_CSV")
-        sys.exit(1)
-    parse_track(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(
+        prog="track2csv",
+        description="Convert a MarkerTracksCombined file back into a csv2track-style CSV",
+    )
+    parser.add_argument("input_json")
+    parser.add_argument("output_csv")
+    parser.add_argument(
+        "--tracks",
+        type=lambda s: {int(tok) for tok in s.split(",")},
+        default=None,
+        help="comma-separated track numbers to export, e.g. --tracks=-1,0,2",
+    )
+    parser.add_argument(
+        "--time-range",
+        default=None,
+        help="only export markers starting within START..END, e.g. --time-range 120..300 or "
+        "--time-range 2:00.000..5:00.000; either end may be omitted",
+    )
+    args = parser.parse_args()
+    start = end = None
+    if args.time_range is not None:
+        start_str, _, end_str = args.time_range.partition("..")
+        start = parse_time(start_str) if start_str else None
+        end = parse_time(end_str) if end_str else None
+    parse_track(args.input_json, args.output_csv, args.tracks, start, end)
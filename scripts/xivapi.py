@@ -0,0 +1,185 @@
+"""
+Concurrent client for the XIVAPI v2 API (https://v2.xivapi.com/api/docs), shared by
+generate_job_data.py.
+
+Every request goes through one pooled `requests.Session`, so connections (and their TLS
+handshakes) are reused. `XIVAPIClient.map` runs a function over a list of items on a bounded
+thread pool and returns the results in the order of the items, so output built from them does not
+depend on which request finishes first. Requests are spaced to at most `rate` per second across
+all threads, and 429s, server errors and connection failures are retried with exponential backoff
+(honoring Retry-After). Retries go through the same rate limit as first attempts, so a burst of
+429s does not make every worker retry at once. If `version` is set, every request asks for the
+data of that game version (e.g. "7.1") instead of the latest one.
+
+Rather than searching for names one at a time, `search_all` fetches every row matching a query
+(e.g. all PvE actions of a job) in a few paginated requests, and `match_names` matches names
+against them locally: an exact match (ignoring case, apostrophe style and spacing) wins, and
+otherwise a name matches the rows whose name contains it, like the API's `~` operator. Names that
+match more than one row are reported instead of silently taking whichever row comes first.
+
+Requires requests (`pip install requests`).
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+XIVAPI_BASE = "https://v2.xivapi.com/api/"
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 20.0
+SEARCH_PAGE_SIZE = 500
+
+
+class RateLimiter:
+    """Spaces calls to `wait` at least 1 / `rate` seconds apart, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RateLimitedRetry(Retry):
+    """A urllib3 `Retry` that also waits for `limiter` after backing off, before every retry."""
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def new(self, **kw):
+        # urllib3 replaces the Retry object after every attempt
+        retry = super().new(**kw)
+        retry.limiter = self.limiter
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.wait()
+
+
+class XIVAPIClient:
+    def __init__(
+        self, base_url=XIVAPI_BASE, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, version=""
+    ):
+        self.base_url = base_url
+        self.version = version
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.session = requests.Session()
+        retry = RateLimitedRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            limiter=self.limiter,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, path, params=None) -> requests.Response:
+        if self.version:
+            params = {**(params or {}), "version": self.version}
+        self.limiter.wait()
+        response = self.session.get(self.base_url + path, params=params)
+        response.raise_for_status()
+        return response
+
+    def search(self, sheet, query, fields) -> list[dict]:
+        """Return the first page of results of a sheet search."""
+        return self.get("search", {"sheets": sheet, "query": query, "fields": fields}).json()[
+            "results"
+        ]
+
+    def search_all(self, sheet, query, fields, page_size=SEARCH_PAGE_SIZE) -> list[dict]:
+        """Return every result of a sheet search, following its cursor across pages."""
+        params = {"sheets": sheet, "query": query, "fields": fields, "limit": page_size}
+        page = self.get("search", params).json()
+        results = page["results"]
+        while "next" in page:
+            page = self.get("search", {"cursor": page["next"], "limit": page_size}).json()
+            results += page["results"]
+        return results
+
+    def sheet_rows(self, sheet, fields=None, page_size=SEARCH_PAGE_SIZE):
+        """Yield every row of a sheet in row ID order, one page at a time."""
+        params = {"limit": page_size}
+        if fields is not None:
+            params["fields"] = fields
+        while True:
+            rows = self.get("sheet/" + sheet, params).json()["rows"]
+            if not rows:
+                return
+            yield from rows
+            params["after"] = rows[-1]["row_id"]
+
+    def download_icon(self, icon_path, local_path) -> bool:
+        """Download an icon as a PNG unless `local_path` exists. Returns whether it downloaded."""
+        if os.path.exists(local_path):
+            return False
+        content = self.get("asset/" + icon_path, {"format": "png"}).content
+        # write to a temporary file first so an interrupted run never leaves a truncated icon
+        tmp_path = local_path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, local_path)
+        return True
+
+    def map(self, fn, items) -> list:
+        """Call `fn` on every item on the thread pool, returning results in item order."""
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(fn, items))
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().replace("’", "'").split())
+
+
+def match_names(rows, names) -> tuple[dict[str, dict], dict[str, list[dict]]]:
+    """
+    Match `names` against the Name field of search result `rows`. Returns ({name: row}, {name:
+    candidate rows}) where the second dict holds the names that matched more than one row, which
+    resolve to the candidate with the lowest row ID. Names that match no row are left out.
+    """
+    index = defaultdict(list)
+    for row in rows:
+        index[normalize_name(row["fields"]["Name"])].append(row)
+
+    def find(name):
+        key = normalize_name(name)
+        return index.get(key) or [
+            row for row_name, rows in index.items() if key in row_name for row in rows
+        ]
+
+    return pick_candidates(names, find)
+
+
+def pick_candidates(names, find) -> tuple[dict[str, dict], dict[str, list[dict]]]:
+    """Like `match_names`, with the candidate rows of a name given by `find(name)`."""
+    matched = {}
+    ambiguous = {}
+    for name in names:
+        candidates = sorted(find(name), key=lambda row: row["row_id"])
+        if not candidates:
+            continue
+        if len(candidates) > 1:
+            ambiguous[name] = candidates
+        matched[name] = candidates[0]
+    return matched, ambiguous
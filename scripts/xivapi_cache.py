@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of XIVAPI lookups for generate_job_data.py, shared by all jobs.
+
+Entries live in one SQLite database (DEFAULT_DB), one row per (sheet, job, name, language, game
+version) key: the sheet searched ("Action", "Status"), the job whose ClassJobCategory the search
+was restricted to (the same name can be a different action for different jobs, like SCH and SMN's
+Energy Drain), the name searched for, the language of that name, and the game version it was
+fetched for (see XIVAPIClient.version; "" is the latest version). The value is the JSON-encoded
+list of fields the generator extracted from the result. Writing a key again replaces its row, so
+the database never accumulates duplicates, and entries of different game versions coexist.
+
+Only entries fetched for the requested game version are returned, and an entry older than the
+cache's max age is stale: it is not returned and is deleted by `prune`. `prune --game-version V`
+also deletes the entries of every version other than V. Lookups for a job load all of its fresh
+entries of a sheet with one indexed query, so a warm run does no network I/O and looks names up in
+a dict.
+
+The schema version is stored in the database's user_version; a database written by an
+incompatible version of this script is rejected rather than misread.
+
+    python scripts/xivapi_cache.py stats
+    python scripts/xivapi_cache.py evict --job SCH --sheet Status
+    python scripts/xivapi_cache.py evict --older-than 30
+    python scripts/xivapi_cache.py prune
+    python scripts/xivapi_cache.py prune --game-version ""
+    python scripts/xivapi_cache.py import-csv SCH
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xivapi_cache.sqlite")
+SCHEMA_VERSION = 2
+# IDs and icons rarely change outside of patches, so entries are kept for a while by default
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    sheet TEXT NOT NULL,
+    job TEXT NOT NULL,
+    name TEXT NOT NULL,
+    language TEXT NOT NULL,
+    game_version TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (sheet, job, name, language, game_version)
+);
+CREATE INDEX IF NOT EXISTS entries_by_age ON entries (fetched_at);
+"""
+
+
+class XIVAPICache:
+    def __init__(self, path=DEFAULT_DB, max_age=DEFAULT_MAX_AGE, game_version=""):
+        self.path = path
+        self.max_age = max_age
+        self.game_version = game_version
+        self.conn = sqlite3.connect(path)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(
+                f"{path} has schema version {version}, expected {SCHEMA_VERSION}; delete it to "
+                "start a new cache"
+            )
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _oldest_fresh(self) -> float:
+        return time.time() - self.max_age if self.max_age is not None else float("-inf")
+
+    def entries(self, sheet, job, language="en") -> dict[str, list]:
+        """Return {name: value} for every fresh entry of `sheet` for `job`."""
+        rows = self.conn.execute(
+            "SELECT name, value FROM entries WHERE sheet = ? AND job = ? AND language = ? "
+            "AND game_version = ? AND fetched_at >= ?",
+            (sheet, job, language, self.game_version, self._oldest_fresh()),
+        )
+        return {name: json.loads(value) for name, value in rows}
+
+    def put_many(self, sheet, job, values: dict[str, list], language="en"):
+        """Store (or replace) one entry per name in `values`."""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (sheet, job, name, language, self.game_version, now, json.dumps(value))
+                    for name, value in values.items()
+                ),
+            )
+
+    def evict(self, sheet=None, job=None, name=None, older_than=None, game_version=None) -> int:
+        """Delete the entries matching every given filter. Returns the number deleted."""
+        clauses, params = [], []
+        for column, value in (
+            ("sheet", sheet),
+            ("job", job),
+            ("name", name),
+            ("game_version", game_version),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if older_than is not None:
+            clauses.append("fetched_at < ?")
+            params.append(time.time() - older_than)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self.conn:
+            return self.conn.execute("DELETE FROM entries" + where, params).rowcount
+
+    def prune(self, keep_version=None) -> int:
+        """
+        Delete stale entries, and if `keep_version` is given, the entries of every other game
+        version. Returns the number deleted.
+        """
+        with self.conn:
+            return self.conn.execute(
+                "DELETE FROM entries WHERE fetched_at < ? OR (? IS NOT NULL AND game_version != ?)",
+                (self._oldest_fresh(), keep_version, keep_version),
+            ).rowcount
+
+    def stats(self):
+        return self.conn.execute(
+            "SELECT sheet, job, game_version, COUNT(*), MIN(fetched_at), MAX(fetched_at) "
+            "FROM entries GROUP BY sheet, job, game_version ORDER BY sheet, job, game_version"
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def import_legacy_csv(cache, job, scripts_dir=os.path.dirname(os.path.abspath(__file__))) -> int:
+    """
+    Import the per-job CSV caches written by earlier versions of generate_job_data.py. Later rows
+    win, like they did when the CSVs were loaded. Returns the number of entries imported.
+    """
+    count = 0
+    for sheet, file_name in (
+        ("Action", f"{job}_actions_xivapi_cache.csv"),
+        ("Status", f"{job}_status_xivapi_cache.csv"),
+    ):
+        path = os.path.join(scripts_dir, file_name)
+        if not os.path.exists(path):
+            continue
+        values = {}
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if row:
+                    values[row[0]] = _legacy_value(sheet, row[1:])
+        cache.put_many(sheet, job, values)
+        count += len(values)
+    return count
+
+
+def _legacy_value(sheet, fields):
+    if sheet == "Status":
+        icon_id, icon_path, ja_name = fields
+        return [int(icon_id), icon_path, ja_name]
+    action_id, icon_path, unlock_level, category, cooldown, max_charges, ja_name = fields
+    return [
+        int(action_id),
+        icon_path,
+        int(unlock_level),
+        category,
+        int(cooldown),
+        int(max_charges),
+        ja_name,
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="xivapi_cache",
+        description="Inspect and maintain the XIVAPI lookup cache of generate_job_data.py",
+    )
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="show the number of entries per sheet and job")
+    evict_parser = subparsers.add_parser("evict", help="delete matching entries")
+    evict_parser.add_argument("--sheet")
+    evict_parser.add_argument("--job")
+    evict_parser.add_argument("--name")
+    evict_parser.add_argument("--older-than", type=float, metavar="DAYS")
+    evict_parser.add_argument("--game-version", help='game version ("" is the latest)')
+    prune_parser = subparsers.add_parser("prune", help="delete stale entries")
+    prune_parser.add_argument("--max-age", type=float, metavar="DAYS")
+    prune_parser.add_argument(
+        "--game-version",
+        help='also delete the entries of every other game version ("" is the latest)',
+    )
+    import_parser = subparsers.add_parser("import-csv", help="import a job's legacy CSV caches")
+    import_parser.add_argument("job")
+    args = parser.parse_args()
+
+    cache = XIVAPICache(args.db)
+    if args.command == "stats":
+        for sheet, job, game_version, count, oldest, newest in cache.stats():
+            print(
+                f"{sheet:8} {job:5} {game_version or 'latest':7} {count:5} entries, fetched "
+                f"{time.strftime('%Y-%m-%d', time.localtime(oldest))} to "
+                f"{time.strftime('%Y-%m-%d', time.localtime(newest))}"
+            )
+    elif args.command == "evict":
+        older_than = args.older_than * 24 * 3600 if args.older_than is not None else None
+        evicted = cache.evict(args.sheet, args.job, args.name, older_than, args.game_version)
+        print(f"evicted {evicted} entries")
+    elif args.command == "prune":
+        if args.max_age is not None:
+            cache.max_age = args.max_age * 24 * 3600
+        print(f"pruned {cache.prune(args.game_version)} entries")
+    else:
+        print(f"imported {import_legacy_csv(cache, args.job)} entries")
+    cache.close()
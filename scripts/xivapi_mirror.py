@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Local mirror of the XIVAPI Action and Status sheets, so that generate_job_data.py can resolve
+action and status names without network access.
+
+`sync` downloads the columns generate_job_data.py reads (MIRRORED_FIELDS) of every named row of
+both sheets, along with the ClassJobCategory sheet, into a SQLite database (DEFAULT_DB). The new
+database is written next to the old one and only replaces it once complete. Rows are indexed by
+normalized name (see xivapi.normalize_name), row ID and ClassJobCategory, and which categories
+include which job is stored once, so finding a job's rows with a name is a couple of index
+lookups instead of a search request.
+
+When the mirror exists and was synced for the game version generate_job_data.py asks for
+(XIVAPI_GAME_VERSION), the generator resolves names against it instead of XIVAPI. Icons that
+have not been downloaded yet are still fetched from XIVAPI.
+
+The schema version is stored in the database's user_version; a mirror written by an incompatible
+version of this script must be synced again.
+
+    python scripts/xivapi_mirror.py sync
+    python scripts/xivapi_mirror.py sync --version 7.1
+    python scripts/xivapi_mirror.py find Action "Energy Drain" --job SCH
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from xivapi import XIVAPIClient, normalize_name
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "xivapi_mirror.sqlite")
+SCHEMA_VERSION = 1
+MIRRORED_FIELDS = {
+    "Action": "Name,Name@lang(ja),Icon,ClassJobCategory.Name,ActionCategory.Name,ClassJobLevel,"
+    "Recast100ms,MaxCharges,IsPvP",
+    "Status": "Name,Name@lang(ja),Icon,ClassJobCategory.Name",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_categories (
+    job TEXT NOT NULL,
+    category INTEGER NOT NULL,
+    PRIMARY KEY (job, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sheet_rows (
+    sheet TEXT NOT NULL,
+    row_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    name_ja TEXT NOT NULL,
+    icon_id INTEGER NOT NULL,
+    icon_path TEXT NOT NULL,
+    -- ClassJobCategory row ID
+    category INTEGER NOT NULL,
+    -- Action only
+    action_category TEXT,
+    level INTEGER,
+    recast_100ms INTEGER,
+    max_charges INTEGER,
+    is_pvp INTEGER,
+    PRIMARY KEY (sheet, row_id)
+);
+CREATE INDEX IF NOT EXISTS sheet_rows_by_name ON sheet_rows (sheet, normalized_name);
+CREATE INDEX IF NOT EXISTS sheet_rows_by_category ON sheet_rows (sheet, category);
+"""
+
+ROW_COLUMNS = (
+    "row_id, name, name_ja, icon_id, icon_path, action_category, level, recast_100ms, max_charges"
+)
+
+
+def connect(path=DEFAULT_DB) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        raise RuntimeError(
+            f"{path} has schema version {version}, expected {SCHEMA_VERSION}; run sync again"
+        )
+    conn.executescript(SCHEMA)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def _link_id(field) -> int:
+    return field.get("row_id", 0) if isinstance(field, dict) else 0
+
+
+def _sheet_row(sheet, row):
+    fields = row["fields"]
+    name = fields["Name"]
+    values = (
+        sheet,
+        row["row_id"],
+        name,
+        normalize_name(name),
+        fields["Name@lang(ja)"],
+        fields["Icon"]["id"],
+        fields["Icon"]["path_hr1"],
+        _link_id(fields["ClassJobCategory"]),
+    )
+    if sheet == "Action":
+        return values + (
+            fields["ActionCategory"]["fields"]["Name"],
+            fields["ClassJobLevel"],
+            fields["Recast100ms"],
+            fields["MaxCharges"],
+            int(fields["IsPvP"]),
+        )
+    return values + (None,) * 5
+
+
+def sync(client: XIVAPIClient, path=DEFAULT_DB):
+    """Download the mirrored sheets through `client` and replace the mirror at `path`."""
+    sheets = ["ClassJobCategory", *MIRRORED_FIELDS]
+
+    def fetch(sheet):
+        return list(client.sheet_rows(sheet, MIRRORED_FIELDS.get(sheet)))
+
+    # the sheets are paged through concurrently; the pages of one sheet depend on each other
+    rows = dict(zip(sheets, client.map(fetch, sheets)))
+    tmp_path = path + ".part"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = connect(tmp_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO job_categories VALUES (?, ?)",
+            (
+                (job, row["row_id"])
+                for row in rows["ClassJobCategory"]
+                for job, value in row["fields"].items()
+                if value is True
+            ),
+        )
+        for sheet in MIRRORED_FIELDS:
+            conn.executemany(
+                "INSERT INTO sheet_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_sheet_row(sheet, row) for row in rows[sheet] if row["fields"]["Name"]),
+            )
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            (("game_version", client.version), ("synced_at", str(time.time()))),
+        )
+    conn.close()
+    os.replace(tmp_path, path)
+    return {sheet: len(sheet_rows) for sheet, sheet_rows in rows.items()}
+
+
+class XIVAPIMirror:
+    def __init__(self, path=DEFAULT_DB):
+        self.conn = connect(path)
+        self.game_version = dict(self.conn.execute("SELECT key, value FROM meta")).get(
+            "game_version"
+        )
+
+    def find(self, sheet, name, job, include_pvp=False) -> list[dict]:
+        """
+        Return the rows of `sheet` for `job` whose name is `name` (ignoring case, apostrophe style
+        and spacing), or else the rows whose name contains it, in the shape of XIVAPI search
+        results.
+        """
+        query = (
+            f"SELECT {ROW_COLUMNS} FROM sheet_rows WHERE sheet = ? AND {{}} "
+            "AND category IN (SELECT category FROM job_categories WHERE job = ?) "
+            "AND (? OR NOT COALESCE(is_pvp, 0)) ORDER BY row_id"
+        )
+        params = (sheet, normalize_name(name), job, include_pvp)
+        rows = self.conn.execute(query.format("normalized_name = ?"), params).fetchall()
+        if not rows:
+            rows = self.conn.execute(query.format("instr(normalized_name, ?)"), params).fetchall()
+        return [_search_result(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def _search_result(row) -> dict:
+    row_id, name, name_ja, icon_id, icon_path, action_category, level, recast, charges = row
+    fields = {
+        "Name": name,
+        "Name@lang(ja)": name_ja,
+        "Icon": {"id": icon_id, "path_hr1": icon_path},
+    }
+    if action_category is not None:
+        fields["ActionCategory"] = {"fields": {"Name": action_category}}
+        fields["ClassJobLevel"] = level
+        fields["Recast100ms"] = recast
+        fields["MaxCharges"] = charges
+    return {"row_id": row_id, "fields": fields}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="xivapi_mirror",
+        description="Mirror the XIVAPI Action and Status sheets for offline job data generation",
+    )
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser("sync", help="download the sheets")
+    sync_parser.add_argument("--version", default="", help="game version (default: latest)")
+    find_parser = subparsers.add_parser("find", help="look up a name in the mirror")
+    find_parser.add_argument("sheet", choices=list(MIRRORED_FIELDS))
+    find_parser.add_argument("name")
+    find_parser.add_argument("--job", required=True)
+    find_parser.add_argument("--pvp", action="store_true", help="include PvP actions")
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        start = time.perf_counter()
+        counts = sync(XIVAPIClient(version=args.version), args.db)
+        summary = ", ".join(f"{count} {sheet}" for sheet, count in counts.items())
+        print(f"synced {summary} rows to {args.db} in {time.perf_counter() - start:.1f}s")
+    else:
+        mirror = XIVAPIMirror(args.db)
+        for result in mirror.find(args.sheet, args.name, args.job, args.pvp):
+            print(json.dumps(result, ensure_ascii=False))
+        mirror.close()
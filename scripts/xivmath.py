@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Vectorized Python reference implementation of src/Game/XIVMath.ts, and a generator for the golden
+tables that src/__test__/xivmathGolden.test.ts checks XIVMath against.
+
+Every function mirrors its TS counterpart operation for operation on float64 NumPy arrays, so
+results are bit-identical to the JS implementation. Arguments broadcast against each other, so a
+whole grid of stats can be evaluated at once.
+
+`golden` evaluates each function over a grid of levels x stats (x base recast x haste, for GCDs
+and cast times) and writes the results to one gzipped binary file. The file starts with a JSON
+header line describing each table:
+- name: the XIVMath function
+- axes: a list of [argument name, values]. Values are row-major with the last axis fastest.
+  A stat axis ("speed", "crit", ...) holds offsets from the level's substat base (main stat base
+  for "det" and "pie").
+- args: extra constant arguments
+- scale: results are stored as floor(result * scale + 0.5)
+and is followed by each table's values as little-endian int32 deltas from the previous value.
+Results change slowly along the stat axis, so the deltas compress to a few bits each.
+
+Requires numpy (`pip install numpy`).
+
+    python scripts/xivmath.py golden
+"""
+
+import argparse
+import gzip
+import json
+import os
+
+import numpy as np
+
+MAINSTAT_BASE = {70: 292, 80: 340, 90: 390, 100: 440}
+SUBSTAT_BASE = {70: 364, 80: 380, 90: 400, 100: 420}
+STAT_DIV = {70: 900, 80: 1300, 90: 1900, 100: 2780}
+LEVELS = tuple(STAT_DIV)
+
+DEFAULT_GOLDEN_PATH = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "../src/__test__/Asset/xivmath_golden.bin.gz",
+    )
+)
+
+
+def _lookup(table, level):
+    return np.vectorize(table.__getitem__, otypes=[float])(level)
+
+
+def get_mainstat_base(level):
+    return _lookup(MAINSTAT_BASE, level)
+
+
+def get_substat_base(level):
+    return _lookup(SUBSTAT_BASE, level)
+
+
+def get_stat_div(level):
+    return _lookup(STAT_DIV, level)
+
+
+def flp(x, digits):
+    mult = 10.0**digits
+    return np.floor(x * mult) / mult
+
+
+def critical_hit_rate(level, crit):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    return (np.floor((200 * (crit - sub)) / div) + 50) * 0.001
+
+
+def critical_hit_strength(level, crit):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    return (np.floor((200 * (crit - sub)) / div) + 1400) * 0.001
+
+
+def direct_hit_rate(level, dh):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    return np.floor((550 * (dh - sub)) / div) * 0.001
+
+
+def auto_dh_bonus(level, dh):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    return np.floor((140 * (dh - sub)) / div) * 0.001
+
+
+def det_mult(level, det):
+    base, div = get_mainstat_base(level), get_stat_div(level)
+    return np.floor(1000 + (140 * (det - base)) / div) * 0.001
+
+
+def calculate_damage(level, crit, dh, det, damage_factor, crit_bonus, dh_bonus):
+    level, crit, dh, det, damage_factor, crit_bonus, dh_bonus = np.broadcast_arrays(
+        level, crit, dh, det, damage_factor, crit_bonus, dh_bonus
+    )
+    crit_rate = np.where(
+        crit_bonus >= 1,
+        crit_bonus,
+        np.where(crit_bonus < 0, 0, critical_hit_rate(level, crit) + crit_bonus),
+    )
+    dh_rate = np.where(
+        dh_bonus >= 1,
+        dh_bonus,
+        np.where(dh_bonus < 0, 0, direct_hit_rate(level, dh) + dh_bonus),
+    )
+    crit_damage_mult = critical_hit_strength(level, crit)
+    dh_mult = 1.25
+    auto_cdh = (crit_rate >= 1) & (dh_rate >= 1)
+    crit_mod = np.where(crit_rate > 1, flp(1 + (crit_damage_mult - 1) * (crit_bonus - 1), 3), 1)
+    dh_mod = np.where(dh_rate > 1, flp(1 + (dh_mult - 1) * (dh_bonus - 1), 3), 1)
+    clamped_crit_rate = np.where(crit_rate > 1, 1, crit_rate)
+    clamped_dh_rate = np.where(dh_rate > 1, 1, dh_rate)
+    modifier = damage_factor * np.where(
+        auto_cdh,
+        flp(det_mult(level, det) + auto_dh_bonus(level, dh), 3),
+        det_mult(level, det),
+    )
+    crit_damage = modifier * crit_mod * crit_damage_mult
+    dh_damage = modifier * dh_mod * dh_mult
+    crit_dh_damage = crit_damage * dh_mod * dh_mult
+    crit_dh_rate = clamped_crit_rate * clamped_dh_rate
+    normal_rate = 1 - clamped_crit_rate - clamped_dh_rate + crit_dh_rate
+    result = (
+        modifier * normal_rate
+        + crit_damage * (clamped_crit_rate - crit_dh_rate)
+        + dh_damage * (clamped_dh_rate - crit_dh_rate)
+        + crit_dh_damage * crit_dh_rate
+    )
+    # abilities that can't crit or direct hit skip the determination multiplier entirely
+    return np.where((crit_rate == 0) & (dh_rate == 0), damage_factor, result)
+
+
+def overtime_potency(level, speed, base_potency):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    effect_strength = (1000 + np.floor(((speed - sub) * 130) / div)) * 0.001
+    return base_potency * effect_strength
+
+
+def mp_tick(level, pie):
+    main, div = get_mainstat_base(level), get_stat_div(level)
+    return 200 + np.floor((150 * (pie - main)) / div)
+
+
+def pre_tax_gcd(level, speed, base_gcd, speed_modifier=0):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    ceil = np.ceil(((sub - speed) * 130) / div)
+    pts = np.floor(base_gcd * (1000 + ceil))
+    return np.floor(((100 - speed_modifier) * pts) / 1000) / 100
+
+
+def _legacy_rounding(level, speed, base, speed_modifier, divisor, result_div):
+    sub, div = get_substat_base(level), get_stat_div(level)
+    return (
+        np.floor(
+            (
+                np.floor(
+                    (
+                        np.floor(((100 - speed_modifier) * 100) / 100)
+                        * np.floor(
+                            ((2000 - np.floor((130 * (speed - sub)) / div + 1000)) * (1000 * base))
+                            / divisor
+                        )
+                    )
+                    / 100
+                )
+                * 100
+            )
+            / 100
+        )
+        / result_div
+    )
+
+
+def pre_tax_gcd_legacy(level, speed, base_gcd, speed_modifier=0):
+    return _legacy_rounding(level, speed, base_gcd, speed_modifier, 10000, 100)
+
+
+def pre_tax_cast_time(level, speed, base_cast_time, speed_modifier=0):
+    return _legacy_rounding(level, speed, base_cast_time, speed_modifier, 1000, 1000)
+
+
+def after_fps_tax(fps, base_duration):
+    return np.floor(base_duration * fps + 1) / fps
+
+
+# golden table grids
+GOLDEN_BASE_RECASTS = (1.5, 2.0, 2.5, 2.8, 3.0, 3.5, 4.0, 5.0)
+GOLDEN_SPEED_MODIFIERS = (0, 1, 2, 3, 4, 8, 10, 12, 13, 15, 16, 20)
+GOLDEN_STAT_RANGE = 4000
+# [damageFactor, critBonus, dhBonus]: unbuffed, crit/dh buffs, auto-crit/dh, buffed auto-crit/dh
+GOLDEN_DAMAGE_BONUSES = ((1, 0, 0), (1.05, 0.1, 0.2), (1, 1, 1), (1, 1.2, 1.2))
+GOLDEN_DAMAGE_STEP = 250
+
+
+def _stat_values(level, axis, offsets):
+    base = get_mainstat_base(level) if axis in ("det", "pie") else get_substat_base(level)
+    return base + offsets
+
+
+def golden_tables():
+    """Yield (header, values) for every golden table."""
+    levels = np.array(LEVELS, dtype=float)
+    speed_offsets = np.arange(GOLDEN_STAT_RANGE, dtype=float)
+    for name, fn, scale in (
+        ("preTaxGcd", pre_tax_gcd, 100),
+        ("preTaxGcdLegacy", pre_tax_gcd_legacy, 100),
+        ("preTaxCastTime", pre_tax_cast_time, 1000),
+    ):
+        lv = levels[:, None, None, None]
+        base = np.array(GOLDEN_BASE_RECASTS)[None, :, None, None]
+        modifier = np.array(GOLDEN_SPEED_MODIFIERS, dtype=float)[None, None, :, None]
+        speed = _stat_values(lv, "speed", speed_offsets[None, None, None, :])
+        header = {
+            "name": name,
+            "axes": [
+                ["level", list(LEVELS)],
+                ["base", list(GOLDEN_BASE_RECASTS)],
+                ["speedModifier", list(GOLDEN_SPEED_MODIFIERS)],
+                ["speed", [0, GOLDEN_STAT_RANGE]],
+            ],
+            "scale": scale,
+        }
+        yield header, fn(lv, speed, base, modifier) * scale
+    lv = levels[:, None]
+    for name, fn, axis, args, scale in (
+        ("criticalHitRate", critical_hit_rate, "crit", [], 1000),
+        ("overtimePotency", overtime_potency, "speed", [1000], 1000),
+        ("mpTick", mp_tick, "pie", [], 1),
+    ):
+        stat = _stat_values(lv, axis, speed_offsets[None, :])
+        header = {
+            "name": name,
+            "axes": [["level", list(LEVELS)], [axis, [0, GOLDEN_STAT_RANGE]]],
+            "args": args,
+            "scale": scale,
+        }
+        yield header, fn(lv, stat, *args) * scale
+    offsets = np.arange(0, GOLDEN_STAT_RANGE, GOLDEN_DAMAGE_STEP, dtype=float)
+    lv = levels[:, None, None, None, None]
+    bonuses = np.array(GOLDEN_DAMAGE_BONUSES)[None, :, None, None, None]
+    crit = _stat_values(lv, "crit", offsets[None, None, :, None, None])
+    dh = _stat_values(lv, "dh", offsets[None, None, None, :, None])
+    det = _stat_values(lv, "det", offsets[None, None, None, None, :])
+    header = {
+        "name": "calculateDamage",
+        "axes": [
+            ["level", list(LEVELS)],
+            ["bonuses", [list(b) for b in GOLDEN_DAMAGE_BONUSES]],
+            ["crit", [0, GOLDEN_STAT_RANGE, GOLDEN_DAMAGE_STEP]],
+            ["dh", [0, GOLDEN_STAT_RANGE, GOLDEN_DAMAGE_STEP]],
+            ["det", [0, GOLDEN_STAT_RANGE, GOLDEN_DAMAGE_STEP]],
+        ],
+        "scale": 1e6,
+    }
+    damage = calculate_damage(lv, crit, dh, det, bonuses[..., 0], bonuses[..., 1], bonuses[..., 2])
+    yield header, damage * 1e6
+
+
+def write_golden(path=DEFAULT_GOLDEN_PATH):
+    headers = []
+    blobs = []
+    for header, scaled in golden_tables():
+        ints = np.floor(scaled + 0.5).astype(np.int64).ravel()
+        assert np.abs(ints).max() < 2**31
+        header["length"] = len(ints)
+        headers.append(header)
+        blobs.append(np.diff(ints, prepend=0).astype("<i4").tobytes())
+    # mtime=0 keeps the output reproducible
+    with gzip.GzipFile(path, "wb", compresslevel=9, mtime=0) as f:
+        f.write(json.dumps({"version": 1, "tables": headers}).encode() + b"\n")
+        for blob in blobs:
+            f.write(blob)
+    total = sum(h["length"] for h in headers)
+    print(f"wrote {path} ({total} values, {os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        prog="xivmath",
+        description="Reference implementation of XIVMath and golden table generator",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    golden_parser = subparsers.add_parser("golden", help="write the golden tables")
+    golden_parser.add_argument("--out", default=DEFAULT_GOLDEN_PATH)
+    args = parser.parse_args()
+    write_golden(args.out)
@@ -40,6 +40,9 @@ export const enum MarkerType {
 export type MarkerTrackIndividual = {
 	fileType: FileType.MarkerTrackIndividual;
 	track: number;
+	// Compact presets (see scripts/build_marker_presets.py) factor fields shared by most markers
+	// into per-track defaults, which individual markers may omit.
+	defaults?: Partial<SerializedMarker>;
 	markers: SerializedMarker[];
 };
 
@@ -307,7 +310,8 @@ export class Timeline {
 		offset: number,
 		cutoff?: number,
 	) {
-		let newMarkers = preset.markers.map((m: SerializedMarker): MarkerElem => {
+		let newMarkers = preset.markers.map((serialized: SerializedMarker): MarkerElem => {
+			const m: SerializedMarker = { ...preset.defaults, ...serialized };
 			return {
 				time: m.time + offset,
 				duration: m.duration,
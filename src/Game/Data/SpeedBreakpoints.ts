@@ -0,0 +1,93 @@
+// Generated by scripts/dawntrail-sps/breakpoints.py. Do not edit by hand.
+// Maps "<base GCD>/<speed modifier>" to "<GCD at 0 speed bonus (centiseconds)>:<deltas>", where
+// each base-36 digit of <deltas> is the increase in speed bonus from one 0.01s drop in GCD to the
+// next. See XIVMath.minSpeedForGcd.
+
+export const SPEED_BREAKPOINT_MAX_BONUS = 250;
+
+export const SPEED_BREAKPOINTS: Record<string, string> = {
+	"1.50/0": "150:16776776776776776776776776776776776776",
+	"1.50/1": "148:4767767767777677677686776776777767767",
+	"1.50/2": "147:1677686776867768677686776867768677686",
+	"1.50/3": "145:476867777686777777686777768677777767",
+	"1.50/4": "144:167777777777776868677777777777768686",
+	"1.50/8": "138:16877877778778777787787777877877778",
+	"1.50/10": "135:1778778778877877878787787788778778",
+	"1.50/12": "132:177887878878788778878788787887788",
+	"1.50/13": "130:487888787888787888787888787888787",
+	"1.50/15": "127:48887888888887888788888888788878",
+	"1.50/16": "126:17888888888788888888888888888888",
+	"1.50/20": "120:188898988898988898988898988898",
+	"2.00/0": "200:15555555555555555555555555555555555555555555555555",
+	"2.00/1": "198:15555555555555555555655555555555555555556555555555",
+	"2.00/2": "196:1555555555655555555565555555556555555555655555555",
+	"2.00/3": "194:1555555655555655555565555565555556555556555555655",
+	"2.00/4": "192:155556555565555655556555655556555565555655556555",
+	"2.00/8": "184:1556565655656565565656565565656556565655656565",
+	"2.00/10": "180:156565656656565656656565656656565656656565656",
+	"2.00/12": "176:15665665665665665665666566566566566566566566",
+	"2.00/13": "174:15665666566656665666566656665666566656665666",
+	"2.00/15": "170:1566666665666666665666666656666666656666666",
+	"2.00/16": "168:156666666666666666666656666666666666666666",
+	"2.00/20": "160:1666766676667666766676667666766676667666",
+	"2.50/0": "250:144444444444444444444444444444444444444444444444444444444444444",
+	"2.50/1": "247:34444444444444444444444444444454444444444444444445444444444444",
+	"2.50/2": "245:14444444444444454444444445444444444444445444444445444444444444",
+	"2.50/3": "242:3444444444544444544444444454444454444444445444445444444444544",
+	"2.50/4": "240:144444445444544444445444544444445444544444445444544444445444",
+	"2.50/8": "230:1444545444545445445445454445454445454454454454544454544454",
+	"2.50/10": "225:144545445544545445544545445544545445544545445544545445544",
+	"2.50/12": "220:1445545454554455454545544554545455445545454554455454545",
+	"2.50/13": "217:345545454554554545455455454545545545454554554455455454",
+	"2.50/15": "212:34554555545545545545545555455455455455455554554554554",
+	"2.50/16": "210:14554555545545555455554554555545545555455554554555545",
+	"2.50/20": "200:14646464646464646464646464646464646464646464646464",
+	"2.80/0": "280:1343434434343443434344343434434343443434344343434434343443434344343434",
+	"2.80/1": "277:1434434343443443434344434343443443434344434343443443434344344343443434",
+	"2.80/2": "274:243434434344434434344344344344343443443443434434443434434344434344343",
+	"2.80/3": "271:33443443443444344344343443444344434434344344344434434434434434434443",
+	"2.80/4": "268:3443444344434443443444344344434434434443443444344434443444344344434",
+	"2.80/8": "257:3443444444443444444434444444344444434444444344444444344444444344",
+	"2.80/10": "252:134444444444444444444444434544344444444444444444444444444443444",
+	"2.80/12": "246:24444445345444444444444444544444444444444445435444444444444543",
+	"2.80/13": "243:3444444544444444454444444535444444454444444445444444453544444",
+	"2.80/15": "238:135444544445444454444544453544454444544445444454445444454444",
+	"2.80/16": "235:15444454445445444454454445444454454444544544454444544544445",
+	"2.80/20": "224:14454545454454545454545454545445454545445454545454545454",
+	"3.00/0": "300:133433433433433433433433433433433433433433433433433433433433433433433433433",
+	"3.00/1": "297:133433433434334334334343343343433433433434334334334343343343433433433434334",
+	"3.00/2": "294:13343433434334343343433434334343343433434334343343433434334343343433434334",
+	"3.00/3": "291:1334343433434343343434343343434334343434334343433434343433434343343434334",
+	"3.00/4": "288:133434343434343434334343434343434343433434343434343434334343434343434343",
+	"3.00/8": "276:134344343443443434434434344344343443443434434434344344343443443434434",
+	"3.00/10": "270:13443443444344344344434434443443443444344344344434434443443443444344",
+	"3.00/12": "264:134443444434444344434444344443444434443444434444344434444344443444",
+	"3.00/13": "261:134444344444344444344444344444344444344444344444344444344444344444",
+	"3.00/15": "255:1344444444444344444444444434444444444443444444444444344444444444",
+	"3.00/16": "252:134444444444444444444444444444443444444444444444444444444444444",
+	"3.00/20": "240:144444544444544444544444544444544444544444544444544444544444",
+	"3.50/0": "350:1233333323333332333333233333323333332333333233333323333332333333233333323333332333333233",
+	"3.50/1": "346:233323333333323333333323333332423333332333333332333333332333333332333333332333333332333",
+	"3.50/2": "343:12333333333323333333333233333333332423333333333233333333332423333333333233333333332333",
+	"3.50/3": "339:2333333323333333333333333242333333333333333324233333333333333332333333333333333324233",
+	"3.50/4": "336:123333333333333333333333333333333333332424233333333333333333333333333333333333324242",
+	"3.50/8": "322:124333333334333333334333333334333333334243333333343333333343333333343333333342433",
+	"3.50/10": "315:1333333433334333334333334333343333334333343333433333343333433334333333433334333",
+	"3.50/12": "308:13333433343334333433343334333433343334333343343333433433334334333343343333433",
+	"3.50/13": "304:2343343334333433433433343334334334333433343343334333433433433343334334334333",
+	"3.50/15": "297:23433434334343343343343343343433433434334334334334334343343433433433433433",
+	"3.50/16": "294:13343343434334334343433433434343343343434334334343433433434343343343434334",
+	"3.50/20": "280:1343434344343443434343443434434343434434344343434344343443434343443434",
+	"4.00/0": "400:1232323232323232323232323232323232323232323232323232323232323232323232323232323232323232323232323232",
+	"4.00/1": "396:123232323232323232323323232323232323232332323232323232323232332323232323232323233232323232323232323",
+	"4.00/2": "392:12323232323323232323323232323233232323233232323233232323232332323232332323232323323232323323232323",
+	"4.00/3": "388:1232323323232332323233232332323233232323323232332323323232332323233232323323233232323323232332323",
+	"4.00/4": "384:123233232332323323233232332323323233232332323323323233232332323323233232332323323233232332323323",
+	"4.00/8": "368:12332333233233323323332332333233233323323332333233233323323332332333233233323323332332333233",
+	"4.00/10": "360:123332333323332333323332333323332333323332333323332333323332333323332333323332333323332333",
+	"4.00/12": "352:1233333233333233333233333323333323333323333332333332333332333332333333233333233333233333",
+	"4.00/13": "348:123333332333333323333333233333332333333323333333233333332333333323333333233333332333333",
+	"4.00/15": "340:1233333333333333332333333333333333323333333333333333233333333333333332333333333333333",
+	"4.00/16": "336:123333333333333333333333333333333333333333323333333333333333333333333333333333333333",
+	"4.00/20": "320:13333333433333334333333343333333433333334333333343333333433333334333333343333333",
+};
@@ -1,4 +1,5 @@
 import { LevelSync } from "./Common";
+import { SPEED_BREAKPOINT_MAX_BONUS, SPEED_BREAKPOINTS } from "./Data/SpeedBreakpoints";
 
 // Floor a number to a given precision.
 // This is implemented differently from the corresponding xivgear function
@@ -9,7 +10,16 @@ export function flp(x: number, digits: number): number {
 	return Math.floor(x * mult) / mult;
 }
 
+// A decoded entry of SPEED_BREAKPOINTS: the GCD at a speed bonus of 0 (in centiseconds), and the
+// sorted speed bonuses at which the GCD drops by 0.01s.
+interface SpeedBreakpointTable {
+	gcd0: number;
+	bonuses: number[];
+}
+
 export class XIVMath {
+	static #speedBreakpointCache = new Map<string, SpeedBreakpointTable>();
+
 	static getMainstatBase(level: LevelSync) {
 		switch (level) {
 			case LevelSync.lvl70:
@@ -230,6 +240,108 @@ export class XIVMath {
 		);
 	}
 
+	/**
+	 * The per-mille reduction in GCD and cast time granted by a speed stat. preTaxGcd and
+	 * preTaxCastTime only depend on the speed stat through this value.
+	 */
+	static speedBonus(level: LevelSync, speed: number) {
+		const subStat = this.getSubstatBase(level);
+		const div = this.getStatDiv(level);
+		return -Math.ceil(((subStat - speed) * 130) / div);
+	}
+
+	// The lowest speed stat at which speedBonus(level, speed) >= bonus.
+	static minSpeedForBonus(level: LevelSync, bonus: number) {
+		const subStat = this.getSubstatBase(level);
+		const div = this.getStatDiv(level);
+		return subStat + Math.ceil((bonus * div) / 130);
+	}
+
+	static #speedBreakpoints(baseGCD: number, speedModifier: number): SpeedBreakpointTable {
+		const key = `${baseGCD.toFixed(2)}/${speedModifier}`;
+		let table = this.#speedBreakpointCache.get(key);
+		if (table === undefined) {
+			const encoded = SPEED_BREAKPOINTS[key];
+			if (encoded !== undefined) {
+				const [gcd0, deltas] = encoded.split(":");
+				let bonus = 0;
+				table = {
+					gcd0: parseInt(gcd0),
+					bonuses: Array.from(deltas, (digit) => (bonus += parseInt(digit, 36))),
+				};
+			} else {
+				// Not a precomputed base GCD/modifier: search the step function directly.
+				const gcdAt = (bonus: number) =>
+					Math.floor(
+						((100 - speedModifier) * Math.floor(baseGCD * (1000 - bonus))) / 1000,
+					);
+				table = { gcd0: gcdAt(0), bonuses: [] };
+				for (let bonus = 1; bonus <= SPEED_BREAKPOINT_MAX_BONUS; bonus++) {
+					for (let i = gcdAt(bonus); i < gcdAt(bonus - 1); i++) {
+						table.bonuses.push(bonus);
+					}
+				}
+			}
+			this.#speedBreakpointCache.set(key, table);
+		}
+		return table;
+	}
+
+	/**
+	 * The lowest speed stat at which preTaxGcd(level, speed, baseGCD, speedModifier) is at most
+	 * targetGcd, using the tables in Data/SpeedBreakpoints.ts.
+	 * @returns The speed, or undefined if targetGcd is out of the table's range
+	 */
+	static minSpeedForGcd(
+		level: LevelSync,
+		baseGCD: number,
+		targetGcd: number,
+		speedModifier?: number,
+	): number | undefined {
+		const table = this.#speedBreakpoints(baseGCD, speedModifier ?? 0);
+		const steps = table.gcd0 - Math.round(targetGcd * 100);
+		if (steps <= 0) {
+			return this.getSubstatBase(level);
+		}
+		if (steps > table.bonuses.length) {
+			return undefined;
+		}
+		return this.minSpeedForBonus(level, table.bonuses[steps - 1]);
+	}
+
+	/**
+	 * The next GCD tier above a speed stat.
+	 * @returns The lowest speed stat greater than `speed` with a shorter pre-tax GCD and that GCD,
+	 * or undefined if it is out of the table's range
+	 */
+	static nextGcdTier(
+		level: LevelSync,
+		speed: number,
+		baseGCD: number,
+		speedModifier?: number,
+	): { speed: number; gcd: number } | undefined {
+		const table = this.#speedBreakpoints(baseGCD, speedModifier ?? 0);
+		const bonus = this.speedBonus(level, speed);
+		// binary search for the first breakpoint above the current bonus
+		let lo = 0;
+		let hi = table.bonuses.length;
+		while (lo < hi) {
+			const mid = (lo + hi) >> 1;
+			if (table.bonuses[mid] <= bonus) {
+				lo = mid + 1;
+			} else {
+				hi = mid;
+			}
+		}
+		if (lo === table.bonuses.length) {
+			return undefined;
+		}
+		return {
+			speed: this.minSpeedForBonus(level, table.bonuses[lo]),
+			gcd: (table.gcd0 - lo - 1) / 100,
+		};
+	}
+
 	static afterFpsTax(fps: number, baseDuration: number) {
 		return Math.floor(baseDuration * fps + 1) / fps;
 	}
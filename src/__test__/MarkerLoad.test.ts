@@ -66,3 +66,32 @@ it("loads fru p1 with enrage cutoff", () => {
 	doPresetTrackLoad(loadTrackToJSON("fru_p1.txt"), () => {}, { cutoff: 150 });
 	checkMissingMarker(FRU_P1_ENRAGE);
 });
+
+it("loads compact tracks with per-track defaults", () => {
+	const content = loadTrackToJSON("fru_p1.txt");
+	// Factor the first marker's color/type/text flag into each track's defaults, as
+	// scripts/build_marker_presets.py --compact would.
+	content.tracks.forEach((track) => {
+		const { markerType, color, showText } = track.markers[0];
+		track.defaults = { markerType, color, showText };
+		track.markers = track.markers.map((m) => {
+			const compacted: Partial<typeof m> = { ...m };
+			if (m.markerType === markerType) delete compacted.markerType;
+			if (m.color === color) delete compacted.color;
+			if (m.showText === showText) delete compacted.showText;
+			return compacted as typeof m;
+		});
+	});
+	doPresetTrackLoad(content, () => {});
+	expect(
+		hasMarker({
+			time: 81.152,
+			markerType: MarkerType.Info,
+			duration: 4.7,
+			track: 0,
+			description: "Burnished Glory",
+		}),
+	).toBe(true);
+	const markers = controller.timeline.getAllMarkers();
+	expect(markers.every((m) => m.color !== undefined && m.markerType !== undefined)).toBe(true);
+});
@@ -0,0 +1,69 @@
+import fs from "node:fs";
+import { LevelSync } from "../Game/Common";
+import { XIVMath } from "../Game/XIVMath";
+
+// Golden tests for the speed breakpoint table (src/Game/Data/SpeedBreakpoints.ts, generated by
+// scripts/dawntrail-sps/breakpoints.py) against the level 100 spell speed tier tables.
+// Each tiers-<base>.csv lists every speed at which a <base>s cast becomes 0.01s shorter; the
+// first row is a header with the base cast times from the 4th column on.
+
+const TIERS_DIR = "scripts/dawntrail-sps/";
+const BASE_CAST_TIMES = [1.5, 2.0, 2.5, 2.8, 3.0, 3.5, 4.0];
+const LEVELS = [LevelSync.lvl70, LevelSync.lvl80, LevelSync.lvl90, LevelSync.lvl100];
+const SPEED_MODIFIERS = [0, 4, 13, 15, 20];
+
+function readTiers(base: number): number[][] {
+	const content = fs.readFileSync(TIERS_DIR + `tiers-${base.toFixed(1)}.csv`, "utf8");
+	return content
+		.trim()
+		.split("\n")
+		.map((row) => row.split(",").map((x) => parseFloat(x)));
+}
+
+BASE_CAST_TIMES.forEach((base) => {
+	it(`finds every ${base}s tier in tiers-${base.toFixed(1)}.csv`, () => {
+		const [header, ...rows] = readTiers(base);
+		const column = header.indexOf(base, 3);
+		expect(column).toBeGreaterThan(0);
+		let prevSpeed = 420;
+		rows.forEach((row) => {
+			const speed = row[0];
+			expect(XIVMath.minSpeedForGcd(LevelSync.lvl100, base, row[column])).toBe(speed);
+			expect(XIVMath.nextGcdTier(LevelSync.lvl100, prevSpeed, base)).toEqual({
+				speed,
+				gcd: row[column],
+			});
+			// every other base cast time in the row is consistent with the table too
+			header.slice(3).forEach((otherBase, i) => {
+				const gcd = row[3 + i];
+				const minSpeed = XIVMath.minSpeedForGcd(LevelSync.lvl100, otherBase, gcd)!;
+				expect(minSpeed).toBeLessThanOrEqual(speed);
+				expect(XIVMath.preTaxGcd(LevelSync.lvl100, minSpeed, otherBase)).toBe(gcd);
+			});
+			prevSpeed = speed;
+		});
+	});
+});
+
+it("matches preTaxGcd at every breakpoint with haste", () => {
+	for (const level of LEVELS) {
+		for (const base of BASE_CAST_TIMES) {
+			for (const mod of SPEED_MODIFIERS) {
+				const gcdAt = (speed: number) => XIVMath.preTaxGcd(level, speed, base, mod);
+				let tier = XIVMath.nextGcdTier(level, XIVMath.getSubstatBase(level), base, mod);
+				while (tier !== undefined) {
+					expect(gcdAt(tier.speed)).toBe(tier.gcd);
+					expect(gcdAt(tier.speed - 1)).toBeGreaterThan(tier.gcd);
+					expect(XIVMath.minSpeedForGcd(level, base, tier.gcd, mod)).toBe(tier.speed);
+					tier = XIVMath.nextGcdTier(level, tier.speed, base, mod);
+				}
+			}
+		}
+	}
+});
+
+it("falls back to the formula for base GCDs without a table", () => {
+	const speed = XIVMath.minSpeedForGcd(LevelSync.lvl100, 5, 4.2, 15)!;
+	expect(XIVMath.preTaxGcd(LevelSync.lvl100, speed, 5, 15)).toBeLessThanOrEqual(4.2);
+	expect(XIVMath.preTaxGcd(LevelSync.lvl100, speed - 1, 5, 15)).toBeGreaterThan(4.2);
+});
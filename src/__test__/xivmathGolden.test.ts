@@ -0,0 +1,153 @@
+import fs from "node:fs";
+import zlib from "node:zlib";
+import { LevelSync } from "../Game/Common";
+import { XIVMath } from "../Game/XIVMath";
+
+// Compares XIVMath against golden tables generated by the Python reference implementation in
+// scripts/xivmath.py (`python scripts/xivmath.py golden`), covering every level x stat value
+// (x base recast x haste modifier for GCDs and cast times). See that script for the file format.
+// The file is streamed through gunzip rather than decompressed at once.
+
+const GOLDEN_PATH = "src/__test__/Asset/xivmath_golden.bin.gz";
+const MAX_REPORTED_MISMATCHES = 10;
+
+interface GoldenTable {
+	name: string;
+	axes: [string, unknown[]][];
+	args?: number[];
+	scale: number;
+	length: number;
+}
+
+// Stat axes hold [start, end, step?] offsets from the level's base value for that stat.
+const STAT_BASES: Record<string, (level: LevelSync) => number> = {
+	speed: (level) => XIVMath.getSubstatBase(level),
+	crit: (level) => XIVMath.getSubstatBase(level),
+	dh: (level) => XIVMath.getSubstatBase(level),
+	det: (level) => XIVMath.getMainstatBase(level),
+	pie: (level) => XIVMath.getMainstatBase(level),
+};
+
+function axisValues([name, values]: [string, unknown[]]): unknown[] {
+	if (!(name in STAT_BASES)) {
+		return values;
+	}
+	const [start, end, step] = values as number[];
+	const offsets = [];
+	for (let x = start; x < end; x += step ?? 1) {
+		offsets.push(x);
+	}
+	return offsets;
+}
+
+function evaluate(table: GoldenTable, point: Record<string, any>): number {
+	const level = point.level as LevelSync;
+	const stat = (name: string) => STAT_BASES[name](level) + point[name];
+	switch (table.name) {
+		case "preTaxGcd":
+			return XIVMath.preTaxGcd(level, stat("speed"), point.base, point.speedModifier);
+		case "preTaxGcdLegacy":
+			return XIVMath.preTaxGcdLegacy(level, stat("speed"), point.base, point.speedModifier);
+		case "preTaxCastTime":
+			return XIVMath.preTaxCastTime(level, stat("speed"), point.base, point.speedModifier);
+		case "criticalHitRate":
+			return XIVMath.criticalHitRate(level, stat("crit"));
+		case "overtimePotency":
+			return XIVMath.overtimePotency(level, stat("speed"), table.args![0]);
+		case "mpTick":
+			return XIVMath.mpTick(level, stat("pie"));
+		case "calculateDamage": {
+			const [damageFactor, critBonus, dhBonus] = point.bonuses as number[];
+			return XIVMath.calculateDamage(
+				level,
+				stat("crit"),
+				stat("dh"),
+				stat("det"),
+				damageFactor,
+				critBonus,
+				dhBonus,
+			);
+		}
+	}
+	throw new Error("unknown golden table " + table.name);
+}
+
+// Checks the values of one table as they arrive, in row-major order of its axes.
+class TableChecker {
+	table: GoldenTable;
+	values: unknown[][];
+	index = 0;
+	previous = 0;
+	mismatches: string[] = [];
+	mismatchCount = 0;
+
+	constructor(table: GoldenTable) {
+		this.table = table;
+		this.values = table.axes.map(axisValues);
+		const size = this.values.reduce((n, values) => n * values.length, 1);
+		if (size !== table.length) {
+			throw new Error(`${table.name}: axes have ${size} points, table has ${table.length}`);
+		}
+	}
+
+	done() {
+		return this.index === this.table.length;
+	}
+
+	check(delta: number) {
+		const expected = this.previous + delta;
+		this.previous = expected;
+		const point: Record<string, unknown> = {};
+		let rest = this.index;
+		for (let i = this.values.length - 1; i >= 0; i--) {
+			const values = this.values[i];
+			point[this.table.axes[i][0]] = values[rest % values.length];
+			rest = Math.floor(rest / values.length);
+		}
+		const actual = Math.floor(evaluate(this.table, point) * this.table.scale + 0.5);
+		if (actual !== expected) {
+			this.mismatchCount++;
+			if (this.mismatches.length < MAX_REPORTED_MISMATCHES) {
+				this.mismatches.push(
+					`${this.table.name}(${JSON.stringify(point)}): ${actual} != ${expected}`,
+				);
+			}
+		}
+		this.index++;
+	}
+}
+
+it("matches the golden tables from scripts/xivmath.py", async () => {
+	const stream = fs.createReadStream(GOLDEN_PATH).pipe(zlib.createGunzip());
+	let checkers: TableChecker[] | undefined = undefined;
+	let current = 0;
+	let pending = Buffer.alloc(0);
+	for await (const chunk of stream) {
+		pending = Buffer.concat([pending, chunk]);
+		if (checkers === undefined) {
+			const newline = pending.indexOf("\n");
+			if (newline < 0) {
+				continue;
+			}
+			const header = JSON.parse(pending.subarray(0, newline).toString("utf8"));
+			expect(header.version).toBe(1);
+			checkers = (header.tables as GoldenTable[]).map((table) => new TableChecker(table));
+			pending = pending.subarray(newline + 1);
+		}
+		let offset = 0;
+		for (; offset + 4 <= pending.length; offset += 4) {
+			while (checkers[current].done()) {
+				current++;
+			}
+			checkers[current].check(pending.readInt32LE(offset));
+		}
+		pending = pending.subarray(offset);
+	}
+	expect(checkers).toBeDefined();
+	expect(pending.length).toBe(0);
+	for (const checker of checkers!) {
+		expect(checker.done()).toBe(true);
+		expect(checker.mismatches).toEqual([]);
+		expect(checker.mismatchCount).toBe(0);
+	}
+});